@@ -0,0 +1,89 @@
+"""Модуль для условных GET-запросов (ETag, Last-Modified и ответ 304)"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Сильный ETag из версий, от которых зависит представление ресурса
+    :param parts: версии (или другие значения), определяющие ответ
+    """
+    raw = ":".join(map(str, parts)).encode()
+    return f'"{hashlib.blake2b(raw, digest_size=12).hexdigest()}"'
+
+
+def conditional_headers(
+    etag: str,
+    last_modified: datetime | None = None,
+) -> dict[str, str]:
+    """
+    Заголовки валидаторов ответа
+    :param etag: ETag ответа
+    :param last_modified: время последнего изменения ресурса (с часовым поясом)
+    """
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def is_not_modified(
+    request: Request,
+    etag: str,
+    last_modified: datetime | None = None,
+) -> bool:
+    """
+    Проверка условных заголовков запроса (RFC 9110, раздел 13.2.2):
+    `If-None-Match` проверяется первым, `If-Modified-Since` - только без него
+    :param request: объект запроса
+    :param etag: текущий ETag ресурса
+    :param last_modified: время последнего изменения ресурса (с часовым поясом)
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return etag in (
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        )
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # В заголовке время передаётся с точностью до секунды
+    return last_modified.replace(microsecond=0) <= since
+
+
+def has_conditions(request: Request) -> bool:
+    """
+    Есть ли в запросе условные заголовки
+    :param request: объект запроса
+    """
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def not_modified_response(
+    etag: str,
+    last_modified: datetime | None = None,
+) -> Response:
+    """
+    Ответ 304 без тела с валидаторами ресурса
+    :param etag: ETag ресурса
+    :param last_modified: время последнего изменения ресурса (с часовым поясом)
+    """
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=conditional_headers(etag, last_modified),
+    )
@@ -0,0 +1,53 @@
+"""Модуль для потоковой выгрузки данных в форматах NDJSON и CSV"""
+
+import csv
+import io
+import json
+from enum import Enum
+from typing import Iterable, Sequence
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+}
+
+
+def export_headers(name: str, export_format: ExportFormat) -> dict[str, str]:
+    """
+    Заголовки ответа для скачивания выгрузки файлом
+    :param name: имя файла без расширения
+    :param export_format: формат выгрузки
+    """
+    return {
+        "Content-Disposition": f'attachment; filename="{name}.{export_format.value}"'
+    }
+
+
+def encode_ndjson(documents: Iterable[dict]) -> bytes:
+    """
+    Кодирование пачки документов в NDJSON (по документу на строку)
+    :param documents: документы для выгрузки
+    """
+    return "".join(
+        json.dumps(document, ensure_ascii=False, separators=(",", ":")) + "\n"
+        for document in documents
+    ).encode()
+
+
+def encode_csv(rows: Iterable[Sequence]) -> bytes:
+    """
+    Кодирование пачки строк таблицы в CSV
+    :param rows: строки для выгрузки
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().encode()
@@ -0,0 +1,229 @@
+"""
+Модуль для идемпотентных POST-запросов с заголовком `Idempotency-Key`.
+
+Ключ и ответ записываются в БД в той же транзакции, что и изменения
+CRUD-функции (перед её фиксацией), поэтому повтор запроса с тем же ключом,
+пришедший во время выполнения первого, ждёт на уникальном индексе, пока
+первая транзакция не завершится, а затем получает сохранённый ответ без
+повторного выполнения CRUD-функции. Если первая транзакция откатилась
+(например, из-за нехватки товара или ошибки БД), ни ключ, ни ответ
+не остаются в БД, и повтор выполняется заново.
+"""
+
+import asyncio
+import hashlib
+import logging
+from datetime import timedelta
+from functools import lru_cache
+from time import monotonic
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings_idempotency
+from models import DBConnect, IdempotencyKeyModel
+from .responses import FastJSONResponse
+
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+_POLL_INTERVAL = 0.05
+
+
+async def request_fingerprint(request: Request) -> str:
+    """
+    Отпечаток запроса: метод, путь, параметры и тело.
+    Ключ нельзя повторно использовать для запроса с другим отпечатком
+    :param request: объект запроса
+    """
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(b"\n" + request.url.path.encode())
+    digest.update(b"\n" + repr(sorted(request.query_params.multi_items())).encode())
+    digest.update(b"\n" + await request.body())
+    return digest.hexdigest()
+
+
+async def claim_idempotency_key(
+    session: AsyncSession,
+    key: str,
+    fingerprint: str,
+) -> Response | None:
+    """
+    Захват ключа в текущей транзакции сессии.
+    Возвращает `None`, если ключ захвачен и запрос нужно выполнить,
+    или сохранённый ответ, если запрос с этим ключом уже выполнен
+    :param session: объект сессии
+    :param key: значение заголовка `Idempotency-Key`
+    :param fingerprint: отпечаток запроса
+    """
+    deadline = monotonic() + settings_idempotency.idempotency_wait_timeout
+    while True:
+        # Пока транзакция с тем же ключом не завершена, вставка ждёт на индексе
+        claimed = await session.scalar(
+            insert(IdempotencyKeyModel)
+            .values(key=key, fingerprint=fingerprint)
+            .on_conflict_do_nothing(index_elements=[IdempotencyKeyModel.key])
+            .returning(IdempotencyKeyModel.id)
+        )
+        if claimed is not None:
+            return None
+
+        stored = (
+            await session.execute(
+                select(
+                    IdempotencyKeyModel.fingerprint,
+                    IdempotencyKeyModel.status_code,
+                    IdempotencyKeyModel.response,
+                ).filter(IdempotencyKeyModel.key == key)
+            )
+        ).one_or_none()
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"{IDEMPOTENCY_HEADER} '{key}' was used with another request!",
+                )
+            if stored.status_code is not None:
+                return Response(
+                    content=stored.response,
+                    status_code=stored.status_code,
+                    media_type=FastJSONResponse.media_type,
+                    headers={REPLAYED_HEADER: "true"},
+                )
+
+        # Ключ только что удалён очисткой (зафиксированный ключ всегда
+        # с ответом): подключение возвращается в пул на время ожидания
+        await session.rollback()
+        if monotonic() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Request with {IDEMPOTENCY_HEADER} '{key}' is still in progress!",
+            )
+        await asyncio.sleep(_POLL_INTERVAL)
+
+
+async def save_idempotent_response(
+    session: AsyncSession,
+    key: str,
+    status_code: int,
+    content: bytes,
+) -> None:
+    """
+    Сохранение ответа для повторов запроса в текущей транзакции сессии
+    (фиксирует её вызывающий код вместе с изменениями запроса)
+    :param session: объект сессии
+    :param key: значение заголовка `Idempotency-Key`
+    :param status_code: статус ответа
+    :param content: тело ответа в JSON
+    """
+    await session.execute(
+        update(IdempotencyKeyModel)
+        .filter(IdempotencyKeyModel.key == key)
+        .values(status_code=status_code, response=content)
+    )
+
+
+@lru_cache
+def _adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+async def idempotent(
+    request: Request,
+    session: AsyncSession,
+    idempotency_key: str | None,
+    response_model: Any,
+    status_code: int,
+    handler: Callable[..., Awaitable[Any]],
+) -> Any:
+    """
+    Выполнение CRUD-функции не больше одного раза для каждого ключа.
+    Без ключа CRUD-функция просто выполняется
+    :param request: объект запроса
+    :param session: объект сессии, в которой работает `handler`
+    :param idempotency_key: значение заголовка `Idempotency-Key`
+    :param response_model: схема ответа endpoint`а
+    :param status_code: статус успешного ответа
+    :param handler: CRUD-функция, фиксирующая транзакцию сессии; перед фиксацией
+        она вызывает переданный ей `before_commit` с результатом
+    """
+    if idempotency_key is None:
+        return await handler()
+
+    replay = await claim_idempotency_key(
+        session=session,
+        key=idempotency_key,
+        fingerprint=await request_fingerprint(request),
+    )
+    if replay is not None:
+        return replay
+
+    adapter = _adapter(response_model)
+    content = b""
+
+    async def save_response(result: Any) -> None:
+        nonlocal content
+        await session.flush()
+        content = adapter.dump_json(
+            adapter.validate_python(result, from_attributes=True)
+        )
+        await save_idempotent_response(
+            session=session,
+            key=idempotency_key,
+            status_code=status_code,
+            content=content,
+        )
+
+    await handler(before_commit=save_response)
+    return Response(
+        content=content,
+        status_code=status_code,
+        media_type=FastJSONResponse.media_type,
+    )
+
+
+async def delete_expired_idempotency_keys(db: DBConnect, ttl: float) -> int:
+    """
+    Удаление ключей старше `ttl` секунд
+    :param db: подключение к основной БД
+    :param ttl: время хранения ключа в секундах
+    """
+    async with db.async_session() as session:
+        result = await session.execute(
+            delete(IdempotencyKeyModel).filter(
+                IdempotencyKeyModel.created_at < func.now() - timedelta(seconds=ttl)
+            )
+        )
+        await session.commit()
+    return result.rowcount
+
+
+async def run_idempotency_keys_cleanup(
+    db: DBConnect,
+    ttl: float = settings_idempotency.idempotency_key_ttl,
+    interval: float = settings_idempotency.idempotency_cleanup_interval,
+) -> None:
+    """
+    Фоновая периодическая очистка устаревших ключей
+    :param db: подключение к основной БД
+    :param ttl: время хранения ключа в секундах
+    :param interval: период очистки в секундах
+    """
+    while True:
+        try:
+            deleted = await delete_expired_idempotency_keys(db, ttl)
+            if deleted:
+                logger.info("Deleted %s expired idempotency keys", deleted)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Idempotency keys cleanup failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,88 @@
+"""Модуль для метрик приложения: пул подключений, кэш и снимок каталога товаров"""
+
+from models.base import DBConnect, e_store_db
+from monitoring.metrics import MetricFamily, metrics_registry
+from ..products.cache import CacheBackend, product_cache
+from ..products.catalog import CatalogSnapshot, product_catalog
+
+
+def collect_pool_metrics(db: DBConnect = e_store_db) -> list[MetricFamily]:
+    """
+    Состояние пула подключений к основной БД
+    :param db: подключение к БД
+    """
+    pool = db.pool_status()
+    families = []
+    for key, name, help in (
+        ("size", "db_pool_size", "Постоянные подключения в пуле"),
+        ("checked_out", "db_pool_checked_out", "Выданные подключения"),
+        ("idle", "db_pool_idle", "Свободные подключения"),
+        ("overflow", "db_pool_overflow", "Подключения сверх пула"),
+    ):
+        family = MetricFamily(name, "gauge", help)
+        family.add(pool[key])
+        families.append(family)
+
+    for key, name, help in (
+        ("checkouts", "db_pool_checkouts_total", "Выдачи подключений"),
+        ("timeouts", "db_pool_timeouts_total", "Тайм-ауты ожидания подключения"),
+    ):
+        family = MetricFamily(name, "counter", help)
+        family.add(pool[key])
+        families.append(family)
+
+    wait = MetricFamily(
+        "db_pool_wait_seconds_total", "counter", "Суммарное ожидание подключения"
+    )
+    wait.add(db.engine.pool.wait_total)
+    families.append(wait)
+    return families
+
+
+def collect_cache_metrics(cache: CacheBackend = product_cache) -> list[MetricFamily]:
+    """
+    Счётчики кэша товаров
+    :param cache: кэш товаров
+    """
+    stats = cache.stats()
+    requests = MetricFamily(
+        "product_cache_requests_total", "counter", "Обращения к кэшу товаров"
+    )
+    requests.add(stats.hits, result="hit")
+    requests.add(stats.misses, result="miss")
+    removed = MetricFamily(
+        "product_cache_removals_total", "counter", "Удалённые из кэша товаров записи"
+    )
+    removed.add(stats.evictions, reason="eviction")
+    removed.add(stats.expirations, reason="expiration")
+    size = MetricFamily("product_cache_size", "gauge", "Записи в кэше товаров")
+    size.add(stats.size)
+    return [requests, removed, size]
+
+
+def collect_catalog_metrics(
+    catalog: CatalogSnapshot = product_catalog,
+) -> list[MetricFamily]:
+    """
+    Состояние снимка каталога товаров
+    :param catalog: снимок каталога
+    """
+    stats = catalog.stats()
+    fresh = MetricFamily("product_catalog_fresh", "gauge", "Снимок каталога актуален")
+    fresh.add(int(stats.fresh))
+    products = MetricFamily("product_catalog_products", "gauge", "Товары в снимке")
+    products.add(stats.products)
+    memory = MetricFamily(
+        "product_catalog_memory_bytes", "gauge", "Память снимка каталога"
+    )
+    memory.add(stats.memory_bytes)
+    rebuilds = MetricFamily(
+        "product_catalog_rebuilds_total", "counter", "Полные загрузки снимка"
+    )
+    rebuilds.add(stats.rebuilds)
+    return [fresh, products, memory, rebuilds]
+
+
+metrics_registry.register(collect_pool_metrics)
+metrics_registry.register(collect_cache_metrics)
+metrics_registry.register(collect_catalog_metrics)
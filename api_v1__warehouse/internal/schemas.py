@@ -0,0 +1,38 @@
+"""Модуль для описания схем служебных endpoint`ов"""
+
+from pydantic import BaseModel
+
+
+class PoolStatus(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+
+
+class ReplicaStatus(BaseModel):
+    name: str
+    healthy: bool
+
+
+class HistogramSnapshot(BaseModel):
+    buckets: list[float]
+    counts: list[int]
+    sum: float
+    count: int
+
+
+class RouteTimings(BaseModel):
+    method: str
+    route: str
+    status: int
+    requests: int
+    duration: HistogramSnapshot
+    sql_time: HistogramSnapshot
+    pool_wait: HistogramSnapshot
+    queries: HistogramSnapshot
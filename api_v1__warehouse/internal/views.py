@@ -0,0 +1,97 @@
+"""Модуль для описания служебных endpoint`ов (состояние кэшей, подключений и очередей)"""
+
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import PlainTextResponse
+
+from config import settings_monitoring
+from models.base import DBConnect, e_store_db
+from monitoring import route_metrics
+from monitoring.metrics import CONTENT_TYPE, metrics_registry
+from ..outbox.worker import OutboxStats, outbox_worker
+from ..products.cache import CacheStats, product_cache
+from ..products.catalog import CatalogStats, product_catalog
+from ..responses import FastJSONRoute
+from . import metrics  # noqa: F401 (регистрация метрик приложения)
+from .schemas import PoolStatus, ReplicaStatus, RouteTimings
+
+
+router = APIRouter(prefix="/internal", tags=["Internal"], route_class=FastJSONRoute)
+metrics_router = APIRouter(tags=["Internal"])
+
+
+@router.get(
+    "/cache/products", response_model=CacheStats, status_code=status.HTTP_200_OK
+)
+async def get_product_cache_stats():
+    """
+    Endpoint для получения счётчиков кэша товаров
+    """
+    return product_cache.stats()
+
+
+@router.get(
+    "/catalog/products", response_model=CatalogStats, status_code=status.HTTP_200_OK
+)
+async def get_product_catalog_stats():
+    """
+    Endpoint для получения состояния снимка каталога товаров и занимаемой им памяти
+    """
+    return product_catalog.stats()
+
+
+@router.get("/db/pool", response_model=PoolStatus, status_code=status.HTTP_200_OK)
+async def get_db_pool_status(db: DBConnect = Depends(e_store_db.db_dependency)):
+    """
+    Endpoint для получения состояния пула подключений к БД
+    * :param db: подключение к БД
+    """
+    return db.pool_status()
+
+
+@router.get(
+    "/db/replicas", response_model=list[ReplicaStatus], status_code=status.HTTP_200_OK
+)
+async def get_db_replicas_status(db: DBConnect = Depends(e_store_db.db_dependency)):
+    """
+    Endpoint для получения доступности реплик БД
+    * :param db: подключение к БД
+    """
+    return db.replicas_status()
+
+
+@router.get("/outbox", response_model=OutboxStats, status_code=status.HTTP_200_OK)
+async def get_outbox_stats(db: DBConnect = Depends(e_store_db.db_dependency)):
+    """
+    Endpoint для получения размера исходящей очереди событий и счётчиков
+    её обработки в текущем процессе
+    * :param db: подключение к БД
+    """
+    await outbox_worker.refresh_queue(db)
+    return outbox_worker.stats()
+
+
+@router.get(
+    "/requests", response_model=list[RouteTimings], status_code=status.HTTP_200_OK
+)
+async def get_request_timings():
+    """
+    Endpoint для получения гистограмм запросов по маршрутам и статусам:
+    длительность, время SQL, ожидание пула и количество SQL-запросов
+    """
+    return route_metrics.snapshot()
+
+
+@metrics_router.get(
+    "/metrics", response_class=PlainTextResponse, status_code=status.HTTP_200_OK
+)
+async def get_metrics():
+    """
+    Endpoint для метрик в текстовом формате Prometheus
+    """
+    return PlainTextResponse(
+        metrics_registry.exposition(
+            directory=settings_monitoring.metrics_multiprocess_dir or None,
+            max_age=settings_monitoring.metrics_flush_interval * 3,
+        ),
+        media_type=CONTENT_TYPE,
+    )
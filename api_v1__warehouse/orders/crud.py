@@ -1,13 +1,167 @@
 """Модуль для описания CRUD-действий модели `Order`"""
 
+import json
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable
+
 from fastapi import HTTPException, status
-from sqlalchemy import desc, select
-from sqlalchemy.engine import Result
+from sqlalchemy import (
+    Integer,
+    Select,
+    Text,
+    any_,
+    case,
+    cast,
+    desc,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import (
+    DBConnect,
+    OrderModel,
+    OrderItemModel,
+    OrderStatus,
+    OrderStatusHistoryModel,
+    ProductModel,
+)
+from models.order import ORDER_STATUS_TRANSITIONS
+from monitoring.metrics import orders_created
+from ..conditional import make_etag
+from ..export import EXPORT_BATCH_SIZE, ExportFormat, encode_csv, encode_ndjson
+from ..outbox.events import (
+    order_created_event,
+    order_product_added_event,
+    order_status_changed_events,
+)
+from ..pagination import cursor_int, decode_typed_cursor, split_page
+from ..products.cache import product_cache
+from ..products.crud import reserve_product, reserve_products
+from ..products.inventory import record_reservations, release_reservations
+from .schemas import (
+    OrderCreate,
+    OrderStatusChange,
+    OrderStatusResult,
+    OrdersStatusReport,
+)
+
+
+# Позиции заказов и их товары загружаются одним дополнительным запросом
+ORDER_DETAILS_LOADER = selectinload(OrderModel.products_details).joinedload(
+    OrderItemModel.product
+)
+
+
+def _sql_text(value: str):
+    """Текстовый литерал для сборки JSON на стороне БД"""
+    return literal(value, Text)
+
+
+def _json_text(column):
+    """JSON-представление значения колонки (строка экранируется средствами БД)"""
+    return cast(func.to_json(column), Text)
+
+
+# Документ заказа в формате схемы `Order`, собранный средствами БД.
+# `json_build_object` и `json_agg` добавляют в вывод пробелы,
+# поэтому документ склеивается из частей и совпадает с ответом FastAPI побайтно
+_ORDER_STATUS_JSON = case(
+    *(
+        (
+            OrderModel.status == order_status,
+            _sql_text(json.dumps(order_status.value, ensure_ascii=False)),
+        )
+        for order_status in OrderStatus
+    )
+)
+_ORDER_CREATED_AT_JSON = func.concat(
+    _sql_text('"'),
+    func.to_char(OrderModel.created_at, _sql_text('YYYY-MM-DD"T"HH24:MI:SS')),
+    case(
+        (
+            func.date_trunc("second", OrderModel.created_at) != OrderModel.created_at,
+            func.to_char(OrderModel.created_at, _sql_text(".US")),
+        ),
+        else_=_sql_text(""),
+    ),
+    _sql_text('"'),
+)
+_ORDER_ITEM_JSON = func.concat(
+    _sql_text('{"product_count":'),
+    OrderItemModel.product_count,
+    _sql_text(',"product":{"title":'),
+    _json_text(ProductModel.title),
+    _sql_text(',"description":'),
+    _json_text(ProductModel.description),
+    _sql_text(',"price":'),
+    ProductModel.price,
+    _sql_text("}}"),
+)
+_ORDER_ITEMS_JSON = (
+    select(
+        func.string_agg(
+            _ORDER_ITEM_JSON,
+            aggregate_order_by(_sql_text(","), OrderItemModel.id),
+        )
+    )
+    .join(ProductModel, ProductModel.id == OrderItemModel.product_id)
+    .filter(OrderItemModel.order_id == OrderModel.id)
+    .scalar_subquery()
+)
+ORDER_JSON = func.concat(
+    _sql_text('{"id":'),
+    OrderModel.id,
+    _sql_text(',"status":'),
+    _ORDER_STATUS_JSON,
+    _sql_text(',"created_at":'),
+    _ORDER_CREATED_AT_JSON,
+    _sql_text(',"products_details":['),
+    _ORDER_ITEMS_JSON,
+    _sql_text("]}"),
+).label("document")
+
+
+def _order_products_aggregate(aggregate):
+    """Агрегат по товарам позиций заказа (коррелированный подзапрос)"""
+    return (
+        select(aggregate)
+        .select_from(OrderItemModel)
+        .join(ProductModel, ProductModel.id == OrderItemModel.product_id)
+        .filter(OrderItemModel.order_id == OrderModel.id)
+        .scalar_subquery()
+    )
 
-from models import OrderModel, OrderItemModel, OrderStatus
-from ..products.crud import read_product_by_id
+
+# Представление заказа меняется вместе с его версией (статус, позиции)
+# или с версией любого из его товаров (название, описание, цена).
+# Версии только растут, поэтому сумма версий товаров меняется при любом изменении
+ORDER_VERSION_COLUMNS = (
+    OrderModel.version,
+    _order_products_aggregate(func.coalesce(func.sum(ProductModel.version), 0)).label(
+        "products_version"
+    ),
+    func.greatest(
+        OrderModel.updated_at,
+        _order_products_aggregate(func.max(ProductModel.updated_at)),
+    ).label("last_modified"),
+)
+
+ORDERS_CSV_HEADER = (
+    "order_id",
+    "status",
+    "created_at",
+    "product_id",
+    "title",
+    "product_count",
+    "price",
+)
 
 
 async def create_order(
@@ -15,6 +169,7 @@ async def create_order(
     product_id: int,
     product_count: int,
     order_status: OrderStatus,
+    before_commit: Callable[[OrderModel], Awaitable[None]] | None = None,
 ) -> OrderModel:
     """
     Создание в БД записи о новом заказе
@@ -22,29 +177,109 @@ async def create_order(
     :param product_id: id товара добавляемого в новый заказ
     :param product_count: количество товара добавляемого в новый заказ
     :param order_status: статус нового заказа
+    :param before_commit: действия в той же транзакции перед её фиксацией
+        (например, сохранение ответа для `Idempotency-Key`)
     """
-    product = await read_product_by_id(session=session, product_id=product_id)
+    product = await reserve_product(
+        session=session,
+        product_id=product_id,
+        product_count=product_count,
+    )
 
-    if product.quantity >= product_count:
+    order = OrderModel(status=order_status)
+    session.add(order)
+    order.products_details.append(
+        OrderItemModel(
+            product=product,
+            product_count=product_count,
+        )
+    )
+    # id заказа нужен для события, которое фиксируется вместе с заказом
+    await session.flush()
+    session.add(order_created_event(order))
+    await record_reservations(
+        session,
+        products=[product],
+        sold_counts={product_id: product_count},
+        reserved_counts=(
+            {product_id: product_count}
+            if order_status is OrderStatus.in_process
+            else {}
+        ),
+    )
+    if before_commit is not None:
+        await before_commit(order)
+    await session.commit()
+    orders_created.inc()
+    await product_cache.delete(product_id)
+
+    return order
+
+
+async def create_orders(
+    session: AsyncSession,
+    new_orders: list[OrderCreate],
+    before_commit: Callable[[list[OrderModel]], Awaitable[None]] | None = None,
+) -> list[OrderModel]:
+    """
+    Создание в БД сразу нескольких заказов с несколькими позициями
+    в одной транзакции: весь товар резервируется одним запросом,
+    заказы и позиции вставляются пачками при фиксации
+    :param session: объект сессии
+    :param new_orders: информация о новых заказах и их позициях
+    :param before_commit: действия в той же транзакции перед её фиксацией
+        (например, сохранение ответа для `Idempotency-Key`)
+    """
+    orders_lines: list[dict[int, int]] = []
+    products_counts: dict[int, int] = {}
+    reserved_counts: dict[int, int] = {}
+
+    for new_order in new_orders:
+        lines: dict[int, int] = {}
+        for line in new_order.products_details:
+            lines[line.product_id] = lines.get(line.product_id, 0) + line.product_count
+            products_counts[line.product_id] = (
+                products_counts.get(line.product_id, 0) + line.product_count
+            )
+            if new_order.status is OrderStatus.in_process:
+                reserved_counts[line.product_id] = (
+                    reserved_counts.get(line.product_id, 0) + line.product_count
+                )
+        orders_lines.append(lines)
 
-        product.quantity -= product_count
-        order = OrderModel(status=order_status)
-        session.add(order)
-        order.products_details.append(
+    products = await reserve_products(
+        session=session,
+        products_counts=products_counts,
+    )
+
+    orders = []
+    for new_order, lines in zip(new_orders, orders_lines):
+        order = OrderModel(status=new_order.status)
+        order.products_details.extend(
             OrderItemModel(
-                product=product,
+                product=products[product_id],
                 product_count=product_count,
             )
+            for product_id, product_count in lines.items()
         )
-        await session.commit()
+        orders.append(order)
 
-        return order
+    session.add_all(orders)
+    await session.flush()
+    session.add_all(order_created_event(order) for order in orders)
+    await record_reservations(
+        session,
+        products=products.values(),
+        sold_counts=products_counts,
+        reserved_counts=reserved_counts,
+    )
+    if before_commit is not None:
+        await before_commit(orders)
+    await session.commit()
+    orders_created.inc(len(orders))
+    await product_cache.delete(*products_counts)
 
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"There ara only {product.quantity} products with id={product_id} left in the warehouse!",
-        )
+    return orders
 
 
 async def add_product_in_order(
@@ -52,6 +287,7 @@ async def add_product_in_order(
     order_id: int,
     product_id: int,
     product_count: int,
+    before_commit: Callable[[OrderModel], Awaitable[None]] | None = None,
 ) -> OrderModel:
     """
     Добавление в БД записи о присвоении заказу товара
@@ -59,79 +295,298 @@ async def add_product_in_order(
     :param order_id: id заказa в который нужно добавить товар
     :param product_id: id товара добавляемого в существующий заказ
     :param product_count: количество товара добавляемого в существующий заказ
+    :param before_commit: действия в той же транзакции перед её фиксацией
+        (например, сохранение ответа для `Idempotency-Key`)
     """
-    product = await read_product_by_id(session=session, product_id=product_id)
+    query_order = (
+        select(OrderModel)
+        .options(ORDER_DETAILS_LOADER)
+        .filter(OrderModel.id == order_id)
+    )
+    order_result: OrderModel | None = await session.scalar(query_order)
 
-    if product.quantity >= product_count:
+    if order_result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Order with id={order_id} not found!",
+        )
 
-        query_order = (
-            select(OrderModel)
-            .options(
-                selectinload(OrderModel.products_details),
-                selectinload(OrderModel.products),
+    product = await reserve_product(
+        session=session,
+        product_id=product_id,
+        product_count=product_count,
+    )
+
+    order_result.touch()
+    for product_detail in order_result.products_details:
+        if product_detail.product_id == product_id:
+            product_detail.product_count += product_count
+            break
+
+    else:
+        order_result.products_details.append(
+            OrderItemModel(
+                product=product,
+                product_count=product_count,
             )
-            .filter(OrderModel.id == order_id)
         )
-        order_result: OrderModel | None = await session.scalar(query_order)
+    session.add(order_product_added_event(order_id, product_id, product_count))
+    await record_reservations(
+        session,
+        products=[product],
+        sold_counts={product_id: product_count},
+        reserved_counts=(
+            {product_id: product_count}
+            if order_result.status is OrderStatus.in_process
+            else {}
+        ),
+    )
+    if before_commit is not None:
+        await before_commit(order_result)
+    await session.commit()
+    await product_cache.delete(product_id)
 
-        if order_result is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Order with id={order_id} not found!",
-            )
-        product.quantity -= product_count
-
-        for product_detail in order_result.products_details:
-            if (
-                product_detail.product_id == product_id
-                and product_detail.order_id == order_id
-            ):
-                product_detail.product_count += product_count
-                await session.commit()
-
-                return order_result
-
-        else:
-            order_result.products_details.append(
-                OrderItemModel(
-                    product=product,
-                    product_count=product_count,
-                )
-            )
-            await session.commit()
+    return order_result
 
-            return order_result
 
-    else:
+async def read_orders(
+    session: AsyncSession,
+    limit: int,
+    cursor: str | None = None,
+    order_status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> tuple[list[OrderModel], str | None]:
+    """
+    Получение из БД страницы списка заказов (от новых к старым)
+    :param session: объект сессии
+    :param limit: максимальное количество заказов на странице
+    :param cursor: курсор, полученный с предыдущей страницей
+    :param order_status: статус заказов для фильтрации
+    :param created_from: нижняя граница даты создания заказа (включительно)
+    :param created_to: верхняя граница даты создания заказа (не включительно)
+    """
+    query = _select_orders_page(
+        select(OrderModel).options(ORDER_DETAILS_LOADER),
+        limit=limit,
+        cursor=cursor,
+        order_status=order_status,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    orders_list = (await session.scalars(query)).all()
+
+    return split_page(orders_list, limit, "created_at", "id")
+
+
+async def read_orders_json(
+    session: AsyncSession,
+    limit: int,
+    cursor: str | None = None,
+    order_status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> bytes:
+    """
+    Получение из БД страницы списка заказов в виде готового JSON-документа
+    схемы `Page[Order]` без создания ORM-объектов
+    :param session: объект сессии
+    :param limit: максимальное количество заказов на странице
+    :param cursor: курсор, полученный с предыдущей страницей
+    :param order_status: статус заказов для фильтрации
+    :param created_from: нижняя граница даты создания заказа (включительно)
+    :param created_to: верхняя граница даты создания заказа (не включительно)
+    """
+    query = _select_orders_page(
+        select(OrderModel.id, OrderModel.created_at, ORDER_JSON),
+        limit=limit,
+        cursor=cursor,
+        order_status=order_status,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    rows = (await session.execute(query)).all()
+    rows, next_cursor = split_page(rows, limit, "created_at", "id")
+
+    return (
+        '{"items":['
+        + ",".join(row.document for row in rows)
+        + '],"next_cursor":'
+        + json.dumps(next_cursor)
+        + "}"
+    ).encode()
+
+
+def _select_orders_page(
+    query: Select,
+    limit: int,
+    cursor: str | None,
+    order_status: OrderStatus | None,
+    created_from: datetime | None,
+    created_to: datetime | None,
+) -> Select:
+    """
+    Добавление в запрос сортировки, фильтров и границы страницы заказов.
+    Выбирается на одну запись больше, чтобы узнать, есть ли следующая страница
+    :param query: запрос к заказам
+    :param limit: максимальное количество заказов на странице
+    :param cursor: курсор, полученный с предыдущей страницей
+    :param order_status: статус заказов для фильтрации
+    :param created_from: нижняя граница даты создания заказа (включительно)
+    :param created_to: верхняя граница даты создания заказа (не включительно)
+    """
+    query = _filter_orders(
+        query.order_by(desc(OrderModel.created_at), desc(OrderModel.id)).limit(
+            limit + 1
+        ),
+        order_status=order_status,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    if cursor is not None:
+        last_created_at, last_id = decode_typed_cursor(
+            cursor, datetime.fromisoformat, cursor_int
+        )
+        last_created_at = _as_created_at(last_created_at)
+        query = query.filter(
+            tuple_(OrderModel.created_at, OrderModel.id) < (last_created_at, last_id),
+            # Избыточное условие по одной колонке отсекает более новые секции
+            # (по сравнению кортежей планировщик секции не отбрасывает)
+            OrderModel.created_at <= last_created_at,
+        )
+    return query
+
+
+def _filter_orders(
+    query: Select,
+    order_status: OrderStatus | None,
+    created_from: datetime | None,
+    created_to: datetime | None,
+) -> Select:
+    """
+    Добавление в запрос фильтров по статусу и дате создания заказа
+    :param query: запрос к заказам
+    :param order_status: статус заказов для фильтрации
+    :param created_from: нижняя граница даты создания заказа (включительно)
+    :param created_to: верхняя граница даты создания заказа (не включительно)
+    """
+    if order_status is not None:
+        query = query.filter(OrderModel.status == order_status)
+    if created_from is not None:
+        query = query.filter(OrderModel.created_at >= _as_created_at(created_from))
+    if created_to is not None:
+        query = query.filter(OrderModel.created_at < _as_created_at(created_to))
+    return query
+
+
+def _as_created_at(value: datetime) -> datetime:
+    """
+    Приведение даты к времени колонки `orders.created_at` (локальное время
+    без часового пояса): дата с часовым поясом переводится в локальное время
+    :param value: дата из фильтра или курсора
+    """
+    if value.tzinfo is None:
+        return value
+    try:
+        return value.astimezone().replace(tzinfo=None)
+    except OverflowError:
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"There ara only {product.quantity} products with id={product_id} left in the warehouse!",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Date {value.isoformat()} is out of range!",
         )
 
 
-async def read_orders(session: AsyncSession) -> list[OrderModel] | None:
+async def stream_orders(
+    db: DBConnect,
+    export_format: ExportFormat,
+    order_status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> AsyncIterator[bytes]:
     """
-    Получение из БД списка всех заказов
-    :param session: объект сессии
+    Потоковая выгрузка заказов из БД через серверный курсор.
+    В NDJSON каждая строка - заказ в формате схемы `Order`,
+    в CSV каждая строка - одна позиция заказа.
+    :param db: подключение к БД, сессия для чтения открывается на время выгрузки
+    :param export_format: формат выгрузки
+    :param order_status: статус заказов для фильтрации
+    :param created_from: нижняя граница даты создания заказа (включительно)
+    :param created_to: верхняя граница даты создания заказа (не включительно)
     """
     query = (
-        select(OrderModel)
-        .options(
-            selectinload(OrderModel.products_details),
-            selectinload(OrderModel.products),
+        select(
+            OrderModel.id,
+            OrderModel.status,
+            OrderModel.created_at,
+            OrderItemModel.product_id,
+            OrderItemModel.product_count,
+            ProductModel.title,
+            ProductModel.description,
+            ProductModel.price,
         )
-        .order_by(desc(OrderModel.created_at))
+        .outerjoin(OrderItemModel, OrderItemModel.order_id == OrderModel.id)
+        .outerjoin(ProductModel, ProductModel.id == OrderItemModel.product_id)
+        .order_by(desc(OrderModel.created_at), desc(OrderModel.id), OrderItemModel.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    query = _filter_orders(
+        query,
+        order_status=order_status,
+        created_from=created_from,
+        created_to=created_to,
     )
-    results: Result = await session.execute(query)
-    orders_list = results.scalars().all()
 
-    if orders_list is None:
+    async with db.read_session_factory()() as session:
+        results = await session.stream(query)
 
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Orders not found!",
-        )
-    return list(orders_list)
+        if export_format is ExportFormat.csv:
+            yield encode_csv([ORDERS_CSV_HEADER])
+            async for rows in results.partitions():
+                yield encode_csv(
+                    (
+                        row.id,
+                        row.status.value,
+                        row.created_at.isoformat(),
+                        row.product_id,
+                        row.title,
+                        row.product_count,
+                        row.price,
+                    )
+                    for row in rows
+                )
+            return
+
+        # Позиции одного заказа идут подряд и могут попасть в разные пачки,
+        # поэтому последний заказ пачки выгружается вместе со следующей
+        order = None
+        async for rows in results.partitions():
+            documents = []
+            for row in rows:
+                if order is None or order["id"] != row.id:
+                    if order is not None:
+                        documents.append(order)
+                    order = {
+                        "id": row.id,
+                        "status": row.status.value,
+                        "created_at": row.created_at.isoformat(),
+                        "products_details": [],
+                    }
+                if row.product_id is not None:
+                    order["products_details"].append(
+                        {
+                            "product_count": row.product_count,
+                            "product": {
+                                "title": row.title,
+                                "description": row.description,
+                                "price": row.price,
+                            },
+                        }
+                    )
+            if documents:
+                yield encode_ndjson(documents)
+
+        if order is not None:
+            yield encode_ndjson([order])
 
 
 async def read_order(
@@ -145,10 +600,7 @@ async def read_order(
     """
     query = (
         select(OrderModel)
-        .options(
-            selectinload(OrderModel.products_details),
-            selectinload(OrderModel.products),
-        )
+        .options(ORDER_DETAILS_LOADER)
         .filter(OrderModel.id == order_id)
     )
     order: OrderModel | None = await session.scalar(query)
@@ -162,27 +614,194 @@ async def read_order(
     )
 
 
-async def change_order_status(
+async def read_order_json(
     session: AsyncSession,
-    order_id: id,
-    order_status: OrderStatus,
-) -> OrderModel:
+    order_id: int,
+) -> tuple[bytes, str, datetime]:
     """
-    Обновляем в БД статус заказа по `id`
-    :param order_id: id обновляемого заказа
-    :param order_status: новый статус заказа
+    Получение из БД заказа по его `id` в виде готового JSON-документа
+    схемы `Order` без создания ORM-объектов, вместе с его ETag
+    и временем последнего изменения
     :param session: объект сессии
+    :param order_id: id искомого заказа
     """
-    query = select(OrderModel).filter(OrderModel.id == order_id)
-    order: OrderModel | None = await session.scalar(query)
+    query = select(ORDER_JSON, *ORDER_VERSION_COLUMNS).filter(OrderModel.id == order_id)
+    row = (await session.execute(query)).first()
 
-    if order is not None:
-        order.status = order_status
-        await session.commit()
+    if row is not None:
+        return row.document.encode(), _order_etag(row), row.last_modified
 
-        return order
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Order with id={order_id} not found!",
+    )
+
+
+async def read_order_version(
+    session: AsyncSession,
+    order_id: int,
+) -> tuple[str, datetime]:
+    """
+    Получение из БД ETag и времени последнего изменения заказа по его `id`
+    без сборки самого заказа
+    :param session: объект сессии
+    :param order_id: id искомого заказа
+    """
+    query = select(*ORDER_VERSION_COLUMNS).filter(OrderModel.id == order_id)
+    row = (await session.execute(query)).first()
+
+    if row is not None:
+        return _order_etag(row), row.last_modified
 
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail=f"Order with id={order_id} not found!",
     )
+
+
+def _order_etag(row) -> str:
+    """
+    ETag заказа по его версии и версиям его товаров
+    :param row: строка с колонками `ORDER_VERSION_COLUMNS`
+    """
+    return make_etag(row.version, row.products_version)
+
+
+async def change_orders_status(
+    session: AsyncSession,
+    order_status: OrderStatus,
+    order_ids: list[int] | None = None,
+    current_status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> OrdersStatusReport:
+    """
+    Смена статуса заказов одним `UPDATE ... RETURNING` с записью истории,
+    событий исходящей очереди и снятием резерва товара в том же запросе.
+    Статус меняется только у заказов, для которых переход допустим
+    (`ORDER_STATUS_TRANSITIONS`); остальные заказы из `order_ids` попадают
+    в отчёт вместе с текущим статусом.
+    :param session: объект сессии
+    :param order_status: новый статус заказов
+    :param order_ids: id обновляемых заказов (`None` - все подходящие под фильтр)
+    :param current_status: текущий статус заказов для фильтрации
+    :param created_from: нижняя граница даты создания заказа (включительно)
+    :param created_to: верхняя граница даты создания заказа (не включительно)
+    """
+    allowed_statuses = [
+        previous_status
+        for previous_status, next_statuses in ORDER_STATUS_TRANSITIONS.items()
+        if order_status in next_statuses
+    ]
+    updated_ids = []
+
+    if allowed_statuses:
+        previous = _filter_orders(
+            select(OrderModel.id, OrderModel.status).filter(
+                OrderModel.status.in_(allowed_statuses)
+            ),
+            order_status=current_status,
+            created_from=created_from,
+            created_to=created_to,
+        )
+        if order_ids is not None:
+            previous = previous.filter(
+                OrderModel.id == any_(literal(order_ids, ARRAY(Integer)))
+            )
+        previous = previous.with_for_update().subquery("previous")
+
+        updated = (
+            update(OrderModel)
+            .where(OrderModel.id == previous.c.id)
+            .values(status=order_status, **OrderModel.next_version())
+            .returning(OrderModel.id, previous.c.status.label("from_status"))
+            .cte("updated")
+        )
+        to_status = literal(order_status, OrderStatusHistoryModel.to_status.type)
+        # События смены статуса пишутся в исходящую очередь тем же запросом
+        outbox = order_status_changed_events(updated, to_status).cte("outbox")
+        released = release_reservations(updated).cte("released")
+        query = (
+            insert(OrderStatusHistoryModel)
+            .from_select(
+                ["order_id", "from_status", "to_status"],
+                select(updated.c.id, updated.c.from_status, to_status),
+            )
+            .returning(OrderStatusHistoryModel.order_id)
+            .add_cte(updated, outbox, released)
+        )
+        updated_ids = list(await session.scalars(query))
+
+    results = {
+        order_id: OrderStatusResult(
+            id=order_id,
+            result=OrderStatusChange.updated,
+            status=order_status,
+        )
+        for order_id in updated_ids
+    }
+    report = OrdersStatusReport(updated=len(results))
+
+    if order_ids is not None:
+        rejected_ids = [order_id for order_id in order_ids if order_id not in results]
+        query_statuses = select(OrderModel.id, OrderModel.status).filter(
+            OrderModel.id == any_(literal(rejected_ids, ARRAY(Integer)))
+        )
+        statuses = (
+            dict((await session.execute(query_statuses)).tuples().all())
+            if rejected_ids
+            else {}
+        )
+
+        for order_id in rejected_ids:
+            if order_id not in statuses:
+                result = OrderStatusChange.not_found
+            elif statuses[order_id] is order_status:
+                result = OrderStatusChange.unchanged
+            else:
+                result = OrderStatusChange.invalid_transition
+            if result is not OrderStatusChange.unchanged:
+                report.rejected += 1
+            results[order_id] = OrderStatusResult(
+                id=order_id,
+                result=result,
+                status=statuses.get(order_id),
+            )
+        results = {order_id: results[order_id] for order_id in order_ids}
+
+    await session.commit()
+    report.results = list(results.values())
+
+    return report
+
+
+async def change_order_status(
+    session: AsyncSession,
+    order_id: int,
+    order_status: OrderStatus,
+) -> OrderModel:
+    """
+    Обновляем в БД статус заказа по `id`, если переход в новый статус допустим
+    :param order_id: id обновляемого заказа
+    :param order_status: новый статус заказа
+    :param session: объект сессии
+    """
+    report = await change_orders_status(
+        session=session,
+        order_status=order_status,
+        order_ids=[order_id],
+    )
+    result = report.results[0]
+
+    if result.result is OrderStatusChange.not_found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Order with id={order_id} not found!",
+        )
+    if result.result is OrderStatusChange.invalid_transition:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Order with id={order_id} can't change status from '{result.status.value}' to '{order_status.value}'!",
+        )
+
+    return await session.get(OrderModel, order_id)
@@ -0,0 +1,212 @@
+"""
+Модуль для обслуживания помесячных секций заказов и их позиций.
+
+Секции на ближайшие месяцы создаются при запуске приложения и затем
+периодически (`DB_ORDERS_PARTITIONS_CHECK_INTERVAL`). Старые секции
+отсоединяются командой и переносятся в архивную схему (или удаляются),
+после чего заказы этих месяцев больше не видны в API.
+
+Запуск:
+python -m api_v1__warehouse.orders.partitions list
+python -m api_v1__warehouse.orders.partitions ensure --ahead 6
+python -m api_v1__warehouse.orders.partitions detach --before 2024-01 --archive-schema archive
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+from datetime import date
+
+from pydantic import BaseModel
+from sqlalchemy import text
+
+from config import settings_db
+from models import DBConnect, OrderItemModel, OrderModel, e_store_db
+from models.partitioning import (
+    create_partitions,
+    month_start,
+    partition_name,
+    upcoming_months,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Родительская таблица раньше дочерней: секции позиций ссылаются на заказы
+PARTITIONED_TABLES = (OrderModel.__table__, OrderItemModel.__table__)
+# Ключ блокировки, чтобы процессы не создавали одни и те же секции одновременно
+PARTITIONS_LOCK_KEY = 0x6F72646572
+
+_MONTH_SUFFIX = re.compile(r"_(\d{4})_(\d{2})$")
+
+
+class OrdersPartition(BaseModel):
+    table: str
+    name: str
+    month: date | None
+    rows: int
+
+
+async def ensure_partitions(db: DBConnect, months: list[date]) -> None:
+    """
+    Создание отсутствующих секций заказов и позиций за месяцы `months`
+    :param db: подключение к основной БД
+    :param months: первые числа месяцев
+    """
+    async with db.engine.begin() as conn:
+        await conn.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITIONS_LOCK_KEY}
+        )
+        for table in PARTITIONED_TABLES:
+            await conn.run_sync(create_partitions, table, months)
+
+
+async def run_partitions_maintenance(db: DBConnect, interval: float) -> None:
+    """
+    Фоновое создание секций на `DB_ORDERS_PARTITIONS_AHEAD` месяцев вперёд
+    :param db: подключение к основной БД
+    :param interval: период проверки в секундах
+    """
+    while True:
+        try:
+            await ensure_partitions(db, upcoming_months())
+        except Exception:
+            logger.exception("Orders partitions maintenance failed")
+        await asyncio.sleep(interval)
+
+
+async def list_partitions(db: DBConnect) -> list[OrdersPartition]:
+    """
+    Секции заказов и позиций с оценкой количества строк
+    :param db: подключение к основной БД
+    """
+    query = text(
+        "SELECT parent.relname AS table, child.relname AS name, "
+        "greatest(child.reltuples, 0)::bigint AS rows "
+        "FROM pg_inherits "
+        "JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = ANY(:tables) "
+        "ORDER BY parent.relname, child.relname"
+    )
+    tables = [table.name for table in PARTITIONED_TABLES]
+    async with db.engine.connect() as conn:
+        rows = (await conn.execute(query, {"tables": tables})).all()
+
+    partitions = []
+    for table, name, rows_count in rows:
+        match = _MONTH_SUFFIX.search(name)
+        month = date(int(match[1]), int(match[2]), 1) if match else None
+        partitions.append(
+            OrdersPartition(table=table, name=name, month=month, rows=rows_count)
+        )
+    return partitions
+
+
+async def detach_partitions(
+    db: DBConnect,
+    before: date,
+    archive_schema: str | None,
+) -> list[str]:
+    """
+    Отсоединение секций месяцев раньше `before`: сначала позиций (с их
+    внешним ключом на заказы), затем заказов. Каждый месяц отсоединяется
+    в своей транзакции и переносится в схему `archive_schema`
+    или удаляется, если схема не задана
+    :param db: подключение к основной БД
+    :param before: первый месяц, секции которого остаются
+    :param archive_schema: схема для отсоединённых секций (`None` - удалить)
+    """
+    before = month_start(before)
+    months = sorted(
+        {
+            partition.month
+            for partition in await list_partitions(db)
+            if partition.month is not None and partition.month < before
+        }
+    )
+
+    detached = []
+    for month in months:
+        async with db.engine.begin() as conn:
+            quote = conn.dialect.identifier_preparer.quote
+            if archive_schema is not None:
+                await conn.execute(
+                    text(f"CREATE SCHEMA IF NOT EXISTS {quote(archive_schema)}")
+                )
+            for table in reversed(PARTITIONED_TABLES):
+                name = partition_name(table.name, month)
+                exists = await conn.scalar(
+                    text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}
+                )
+                if not exists:
+                    continue
+                await conn.execute(
+                    text(f"ALTER TABLE {table.name} DETACH PARTITION {name}")
+                )
+                # Отсоединённая секция позиций сохраняет ссылку на заказы,
+                # которая не дала бы отсоединить секцию заказов
+                foreign_keys = await conn.scalars(
+                    text(
+                        "SELECT conname FROM pg_constraint "
+                        "WHERE conrelid = to_regclass(:name) AND contype = 'f' "
+                        "AND confrelid = to_regclass(:orders)"
+                    ),
+                    {"name": name, "orders": OrderModel.__tablename__},
+                )
+                for foreign_key in foreign_keys.all():
+                    await conn.execute(
+                        text(f"ALTER TABLE {name} DROP CONSTRAINT {quote(foreign_key)}")
+                    )
+                if archive_schema is not None:
+                    await conn.execute(
+                        text(f"ALTER TABLE {name} SET SCHEMA {quote(archive_schema)}")
+                    )
+                else:
+                    await conn.execute(text(f"DROP TABLE {name}"))
+                detached.append(name)
+    return detached
+
+
+def _month(value: str) -> date:
+    return date.fromisoformat(f"{value}-01")
+
+
+async def main(
+    command: str, ahead: int, before: date | None, archive_schema: str | None
+):
+    try:
+        if command == "list":
+            return [
+                partition.model_dump(mode="json")
+                for partition in await list_partitions(e_store_db)
+            ]
+        if command == "ensure":
+            await ensure_partitions(e_store_db, upcoming_months(ahead))
+            return [
+                partition_name(table.name, month)
+                for table in PARTITIONED_TABLES
+                for month in upcoming_months(ahead)
+            ]
+        return await detach_partitions(e_store_db, before, archive_schema)
+    finally:
+        await e_store_db.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("command", choices=("list", "ensure", "detach"))
+    parser.add_argument(
+        "--ahead", type=int, default=settings_db.db_orders_partitions_ahead
+    )
+    parser.add_argument("--before", type=_month, help="YYYY-MM")
+    parser.add_argument("--archive-schema", default=None)
+    args = parser.parse_args()
+    if args.command == "detach" and args.before is None:
+        parser.error("detach requires --before")
+
+    print(json.dumps(asyncio.run(main(**vars(args))), indent=2, default=str))
@@ -1,8 +1,9 @@
 """Модуль для описания схем `Order`"""
 
 from datetime import datetime
+from enum import Enum
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 from ..products.schemas import ProductInOrder
 from models.order import OrderStatus
@@ -29,3 +30,69 @@ class Order(OrderBase):
     model_config = ConfigDict(from_attributes=True)
 
     products_details: list[OrderItemBase]
+
+
+class OrderItemCreate(BaseModel):
+    product_id: int
+    product_count: int = Field(gt=0)
+
+
+class OrderCreate(BaseModel):
+    status: OrderStatus
+    products_details: list[OrderItemCreate] = Field(min_length=1)
+
+
+MAX_STATUS_UPDATE_IDS = 10_000
+
+
+class OrdersFilter(BaseModel):
+    """Отбор заказов по статусу и дате создания (хотя бы по одному условию)"""
+
+    status: OrderStatus | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+    @model_validator(mode="after")
+    def check_criteria(self) -> "OrdersFilter":
+        if (
+            self.status is None
+            and self.created_from is None
+            and self.created_to is None
+        ):
+            raise ValueError(
+                "At least one of `status`, `created_from` or `created_to` must be set"
+            )
+        return self
+
+
+class OrdersStatusUpdate(BaseModel):
+    """Новый статус для заказов из списка `ids` или подходящих под `filter`"""
+
+    status: OrderStatus
+    ids: list[int] | None = Field(None, min_length=1, max_length=MAX_STATUS_UPDATE_IDS)
+    filter: OrdersFilter | None = None
+
+    @model_validator(mode="after")
+    def check_orders_selection(self) -> "OrdersStatusUpdate":
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Exactly one of `ids` or `filter` must be set")
+        return self
+
+
+class OrderStatusChange(Enum):
+    updated = "updated"
+    unchanged = "unchanged"
+    not_found = "not_found"
+    invalid_transition = "invalid_transition"
+
+
+class OrderStatusResult(BaseModel):
+    id: int
+    result: OrderStatusChange
+    status: OrderStatus | None = None
+
+
+class OrdersStatusReport(BaseModel):
+    updated: int = 0
+    rejected: int = 0
+    results: list[OrderStatusResult] = []
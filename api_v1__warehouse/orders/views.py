@@ -1,38 +1,115 @@
 """Модуль для описания endpoint`ов к модели `Order` """
 
+from datetime import datetime
+from functools import partial
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Path, status
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    Path,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.base import e_store_db
+from models.base import DBConnect, e_store_db
+from ..conditional import (
+    conditional_headers,
+    has_conditions,
+    is_not_modified,
+    not_modified_response,
+)
+from ..idempotency import IDEMPOTENCY_HEADER, IDEMPOTENCY_KEY_MAX_LENGTH, idempotent
+from ..export import EXPORT_MEDIA_TYPES, ExportFormat, export_headers
+from ..pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, Page
+from ..responses import FastJSONRoute
 from . import crud
-from .schemas import OrderBase, Order
+from .schemas import (
+    OrderBase,
+    Order,
+    OrderCreate,
+    OrdersStatusReport,
+    OrdersStatusUpdate,
+)
 from models.order import OrderStatus
 
 
-router = APIRouter(prefix="/api/orders", tags=["Orders"])
+IdempotencyKey = Annotated[
+    str | None,
+    Header(alias=IDEMPOTENCY_HEADER, max_length=IDEMPOTENCY_KEY_MAX_LENGTH),
+]
+
+
+router = APIRouter(prefix="/api/orders", tags=["Orders"], route_class=FastJSONRoute)
 
 
 @router.post("/", response_model=Order, status_code=status.HTTP_201_CREATED)
 async def post_order(
+    request: Request,
     product_id: int,
-    product_count: int,
+    product_count: Annotated[int, Query(gt=0)],
     order_status: OrderStatus,
+    idempotency_key: IdempotencyKey = None,
     session: AsyncSession = Depends(e_store_db.session_dependency),
 ):
     """
-    Endpoint для создания нового заказа
+    Endpoint для создания нового заказа.
+    Повтор запроса с тем же `Idempotency-Key` возвращает сохранённый ответ
+    * :param request: объект запроса
     * :param product_id: id товара добавляемого в новый заказ
     * :param product_count: количество товара добавляемого в новый заказ
     * :param order_status: статус нового заказа
+    * :param idempotency_key: ключ идемпотентности запроса
     * :param session: объект сессии
     """
-    return await crud.create_order(
+    return await idempotent(
+        request=request,
         session=session,
-        product_id=product_id,
-        product_count=product_count,
-        order_status=order_status,
+        idempotency_key=idempotency_key,
+        response_model=Order,
+        status_code=status.HTTP_201_CREATED,
+        handler=partial(
+            crud.create_order,
+            session=session,
+            product_id=product_id,
+            product_count=product_count,
+            order_status=order_status,
+        ),
+    )
+
+
+@router.post("/batch", response_model=list[Order], status_code=status.HTTP_201_CREATED)
+async def post_orders_batch(
+    request: Request,
+    new_orders: Annotated[list[OrderCreate], Body(min_length=1)],
+    idempotency_key: IdempotencyKey = None,
+    session: AsyncSession = Depends(e_store_db.session_dependency),
+):
+    """
+    Endpoint для создания нескольких заказов в одной транзакции.
+    Повтор запроса с тем же `Idempotency-Key` возвращает сохранённый ответ
+    * :param request: объект запроса
+    * :param new_orders: информация о новых заказах и их позициях
+    * :param idempotency_key: ключ идемпотентности запроса
+    * :param session: объект сессии
+    """
+    return await idempotent(
+        request=request,
+        session=session,
+        idempotency_key=idempotency_key,
+        response_model=list[Order],
+        status_code=status.HTTP_201_CREATED,
+        handler=partial(
+            crud.create_orders,
+            session=session,
+            new_orders=new_orders,
+        ),
     )
 
 
@@ -40,46 +117,153 @@ async def post_order(
     "/{order_id}/product", response_model=Order, status_code=status.HTTP_201_CREATED
 )
 async def post_product_in_order(
+    request: Request,
     order_id: Annotated[int, Path(..., ge=1)],
     product_id: int,
-    product_count: int,
+    product_count: Annotated[int, Query(gt=0)],
+    idempotency_key: IdempotencyKey = None,
     session: AsyncSession = Depends(e_store_db.session_dependency),
 ):
     """
-    Endpoint для добавления товара в существующий заказ
+    Endpoint для добавления товара в существующий заказ.
+    Повтор запроса с тем же `Idempotency-Key` возвращает сохранённый ответ
+    * :param request: объект запроса
     * :param order_id: id заказa в который нужно добавить товар
     * :param product_id: id товара добавляемого в существующий заказ
     * :param product_count: количество товара добавляемого в существующий заказ
+    * :param idempotency_key: ключ идемпотентности запроса
     * :param session: объект сессии
     """
-    return await crud.add_product_in_order(
+    return await idempotent(
+        request=request,
         session=session,
-        product_id=product_id,
-        order_id=order_id,
-        product_count=product_count,
+        idempotency_key=idempotency_key,
+        response_model=Order,
+        status_code=status.HTTP_201_CREATED,
+        handler=partial(
+            crud.add_product_in_order,
+            session=session,
+            product_id=product_id,
+            order_id=order_id,
+            product_count=product_count,
+        ),
     )
 
 
-@router.get("/", response_model=list[Order], status_code=status.HTTP_200_OK)
-async def get_orders(session: AsyncSession = Depends(e_store_db.session_dependency)):
+@router.get("/", response_model=Page[Order], status_code=status.HTTP_200_OK)
+async def get_orders(
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_LIMIT)] = DEFAULT_PAGE_LIMIT,
+    cursor: str | None = None,
+    order_status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
+):
     """
-    Endpoint для получения списка заказов
+    Endpoint для получения страницы списка заказов
+    * :param limit: максимальное количество заказов на странице
+    * :param cursor: курсор `next_cursor` из предыдущей страницы
+    * :param order_status: статус заказов для фильтрации
+    * :param created_from: нижняя граница даты создания заказа (включительно)
+    * :param created_to: верхняя граница даты создания заказа (не включительно)
     * :param session: объект сессии
     """
-    return await crud.read_orders(session=session)
+    return Response(
+        content=await crud.read_orders_json(
+            session=session,
+            limit=limit,
+            cursor=cursor,
+            order_status=order_status,
+            created_from=created_from,
+            created_to=created_to,
+        ),
+        media_type="application/json",
+    )
+
+
+@router.get("/export", response_class=StreamingResponse, status_code=status.HTTP_200_OK)
+async def export_orders(
+    export_format: ExportFormat = ExportFormat.ndjson,
+    order_status: OrderStatus | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    db: DBConnect = Depends(e_store_db.db_dependency),
+):
+    """
+    Endpoint для потоковой выгрузки заказов
+    * :param export_format: формат выгрузки (ndjson или csv)
+    * :param order_status: статус заказов для фильтрации
+    * :param created_from: нижняя граница даты создания заказа (включительно)
+    * :param created_to: верхняя граница даты создания заказа (не включительно)
+    * :param db: подключение к БД
+    """
+    return StreamingResponse(
+        crud.stream_orders(
+            db=db,
+            export_format=export_format,
+            order_status=order_status,
+            created_from=created_from,
+            created_to=created_to,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers=export_headers("orders", export_format),
+    )
 
 
 @router.get("/{id}", response_model=Order, status_code=status.HTTP_200_OK)
 async def get_order_by_id(
+    request: Request,
     id: Annotated[int, Path(..., ge=1)],
-    session: AsyncSession = Depends(e_store_db.session_dependency),
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
 ):
     """
-    Endpoint для получения информации о заказе по `id`
+    Endpoint для получения информации о заказе по `id`.
+    Ответ содержит `ETag` и `Last-Modified`; при совпадении с `If-None-Match`
+    или `If-Modified-Since` возвращается 304 после запроса одних версий
+    * :param request: объект запроса
     * :param id: id искомого заказа
     * :param session: объект сессии
     """
-    return await crud.read_order(session=session, order_id=id)
+    if has_conditions(request):
+        etag, last_modified = await crud.read_order_version(
+            session=session, order_id=id
+        )
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+    document, etag, last_modified = await crud.read_order_json(
+        session=session, order_id=id
+    )
+    return Response(
+        content=document,
+        media_type="application/json",
+        headers=conditional_headers(etag, last_modified),
+    )
+
+
+@router.patch(
+    "/status", response_model=OrdersStatusReport, status_code=status.HTTP_200_OK
+)
+async def update_orders_status(
+    status_update: OrdersStatusUpdate,
+    session: AsyncSession = Depends(e_store_db.session_dependency),
+):
+    """
+    Endpoint для смены статуса многих заказов (по списку `ids` или по `filter`).
+    Допустимые переходы: в процессе -> отправлен -> доставлен.
+    В ответе результат по каждому заказу.
+    * :param status_update: новый статус и выбор заказов
+    * :param session: объект сессии
+    """
+    orders_filter = status_update.filter
+    return await crud.change_orders_status(
+        session=session,
+        order_status=status_update.status,
+        order_ids=status_update.ids,
+        current_status=orders_filter.status if orders_filter else None,
+        created_from=orders_filter.created_from if orders_filter else None,
+        created_to=orders_filter.created_to if orders_filter else None,
+    )
 
 
 @router.patch("/{id}/status", response_model=OrderBase, status_code=status.HTTP_200_OK)
@@ -0,0 +1,79 @@
+"""Модуль для событий заказов, которые записываются в исходящую очередь"""
+
+from sqlalchemy import String, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+
+from models import OrderModel, OutboxEventModel
+
+
+ORDER_CREATED = "order.created"
+ORDER_PRODUCT_ADDED = "order.product_added"
+ORDER_STATUS_CHANGED = "order.status_changed"
+
+
+def order_created_event(order: OrderModel) -> OutboxEventModel:
+    """
+    Событие создания заказа (после `flush`, когда у заказа и позиций есть id)
+    :param order: новый заказ с позициями
+    """
+    return OutboxEventModel(
+        event_type=ORDER_CREATED,
+        payload={
+            "order_id": order.id,
+            "status": order.status.name,
+            "products": [
+                {
+                    "product_id": item.product_id,
+                    "product_count": item.product_count,
+                }
+                for item in order.products_details
+            ],
+        },
+    )
+
+
+def order_product_added_event(
+    order_id: int,
+    product_id: int,
+    product_count: int,
+) -> OutboxEventModel:
+    """
+    Событие добавления товара в заказ
+    :param order_id: id заказа
+    :param product_id: id добавленного товара
+    :param product_count: добавленное количество товара
+    """
+    return OutboxEventModel(
+        event_type=ORDER_PRODUCT_ADDED,
+        payload={
+            "order_id": order_id,
+            "product_id": product_id,
+            "product_count": product_count,
+        },
+    )
+
+
+def order_status_changed_events(updated, to_status):
+    """
+    Вставка событий смены статуса для строк CTE `updated` (`id`, `from_status`),
+    которая выполняется в одном запросе со сменой статуса
+    :param updated: CTE изменённых заказов
+    :param to_status: выражение нового статуса
+    """
+    return insert(OutboxEventModel).from_select(
+        ["event_type", "payload"],
+        select(
+            literal(ORDER_STATUS_CHANGED, String),
+            func.jsonb_build_object(
+                literal("order_id", String),
+                updated.c.id,
+                literal("from_status", String),
+                updated.c.from_status,
+                literal("to_status", String),
+                to_status,
+            ),
+        ),
+        # Значения по умолчанию подставляет БД: в составе CTE параметры
+        # значений по умолчанию со стороны Python не передаются
+        include_defaults=False,
+    )
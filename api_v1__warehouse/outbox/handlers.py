@@ -0,0 +1,82 @@
+"""
+Модуль для обработчиков событий исходящей очереди.
+
+Обработчик получает подключение к БД и данные события. Исключение
+в обработчике означает неудачную попытку: событие будет обработано
+повторно, поэтому обработчики должны быть идемпотентными
+"""
+
+import json
+import logging
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import select
+
+from config import settings_outbox
+from models import DBConnect, ProductModel
+from .events import ORDER_CREATED, ORDER_PRODUCT_ADDED, ORDER_STATUS_CHANGED
+
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[DBConnect, dict[str, Any]], Awaitable[None]]
+
+HANDLERS: dict[str, list[Handler]] = {}
+
+
+def handles(*event_types: str) -> Callable[[Handler], Handler]:
+    """
+    Регистрация обработчика событий
+    :param event_types: типы событий
+    """
+
+    def register(handler: Handler) -> Handler:
+        for event_type in event_types:
+            HANDLERS.setdefault(event_type, []).append(handler)
+        return handler
+
+    return register
+
+
+@handles(ORDER_CREATED, ORDER_PRODUCT_ADDED)
+async def stock_alert(db: DBConnect, payload: dict[str, Any]) -> None:
+    """Предупреждение о товарах заказа, остаток которых опустился до порога"""
+    product_ids = [line["product_id"] for line in payload.get("products", [])]
+    if "product_id" in payload:
+        product_ids.append(payload["product_id"])
+
+    async with db.async_session() as session:
+        low_stock = (
+            await session.execute(
+                select(ProductModel.id, ProductModel.quantity).filter(
+                    ProductModel.id.in_(product_ids),
+                    ProductModel.quantity <= settings_outbox.stock_alert_threshold,
+                )
+            )
+        ).all()
+
+    for product_id, quantity in low_stock:
+        logger.warning(
+            json.dumps(
+                {
+                    "event": "low_stock",
+                    "order_id": payload["order_id"],
+                    "product_id": product_id,
+                    "quantity": quantity,
+                }
+            )
+        )
+
+
+@handles(ORDER_STATUS_CHANGED)
+async def fulfilment_notification(db: DBConnect, payload: dict[str, Any]) -> None:
+    """Уведомление об отправке и доставке заказа"""
+    if payload["to_status"] in ("sent", "delivered"):
+        logger.info(
+            json.dumps(
+                {
+                    "event": f"order_{payload['to_status']}",
+                    "order_id": payload["order_id"],
+                }
+            )
+        )
@@ -0,0 +1,275 @@
+"""
+Модуль для фоновой обработки исходящей очереди событий.
+
+Несколько задач asyncio (в каждом процессе) забирают события пачками
+через `FOR UPDATE SKIP LOCKED`, поэтому одно событие не достаётся двум
+обработчикам. Забранное событие «арендуется» на `lease` секунд: если
+процесс упал, после аренды событие снова попадёт в очередь.
+Успешно обработанные события удаляются, неудачные откладываются
+с экспоненциально растущей паузой, а после `max_attempts` попыток
+получают статус `dead` и больше не обрабатываются
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+from time import monotonic
+
+from pydantic import BaseModel
+from sqlalchemy import delete, extract, func, select, update
+
+from config import settings_outbox
+from models import DBConnect, OutboxEventModel, OutboxStatus
+from monitoring.metrics import (
+    Counter,
+    MetricFamily,
+    add_histogram,
+    metrics_registry,
+)
+from monitoring.stats import Histogram
+from .handlers import HANDLERS, Handler
+
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+QUEUE_CHECK_INTERVAL = 5.0
+_ERROR_MAX_LENGTH = 2000
+
+outbox_events_processed = Counter(
+    "outbox_events_processed_total",
+    "Обработанные события исходящей очереди по результату (done, retry, dead)",
+)
+
+
+class OutboxStats(BaseModel):
+    enabled: bool
+    workers: int
+    pending: int
+    dead: int
+    oldest_pending_age: float | None
+    processed: int
+    retried: int
+    dead_lettered: int
+
+
+class OutboxWorker:
+    """Пул задач, обрабатывающих исходящую очередь событий"""
+
+    def __init__(
+        self,
+        workers: int,
+        batch_size: int,
+        poll_interval: float,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        lease: float,
+        handlers: dict[str, list[Handler]] = HANDLERS,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.handlers = handlers
+        self._db: DBConnect | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._results = {"done": 0, "retry": 0, "dead": 0}
+        self._lag = Histogram(LAG_BUCKETS)
+        self._queue = {"pending": 0, "dead": 0, "oldest_pending_age": None}
+        self._queue_checked = -QUEUE_CHECK_INTERVAL
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    async def start(self, db: DBConnect) -> None:
+        """
+        Запуск задач обработки
+        :param db: подключение к основной БД
+        """
+        self._db = db
+        if not self.enabled or self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._run(index)) for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Остановка задач обработки (текущая пачка прерывается и вернётся после аренды)"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def backoff(self, attempts: int) -> float:
+        """
+        Пауза перед следующей попыткой в секундах
+        :param attempts: количество выполненных попыток
+        """
+        return min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+
+    async def process_batch(self) -> int:
+        """Обработка одной пачки событий; возвращает количество забранных событий"""
+        claimable = (
+            select(OutboxEventModel.id)
+            .filter(
+                OutboxEventModel.status == OutboxStatus.pending,
+                OutboxEventModel.available_at <= func.now(),
+            )
+            .order_by(OutboxEventModel.available_at, OutboxEventModel.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        claim = (
+            update(OutboxEventModel)
+            .where(OutboxEventModel.id.in_(claimable.scalar_subquery()))
+            .values(
+                available_at=func.now() + timedelta(seconds=self.lease),
+                attempts=OutboxEventModel.attempts + 1,
+            )
+            .returning(
+                OutboxEventModel.id,
+                OutboxEventModel.event_type,
+                OutboxEventModel.payload,
+                OutboxEventModel.attempts,
+                extract("epoch", func.now() - OutboxEventModel.created_at).label("lag"),
+            )
+        )
+        async with self._db.async_session() as session:
+            events = (await session.execute(claim)).all()
+            await session.commit()
+        if not events:
+            return 0
+
+        done_ids = []
+        failed = []
+        for event in events:
+            try:
+                for handler in self.handlers.get(event.event_type, ()):
+                    await asyncio.wait_for(handler(self._db, event.payload), self.lease)
+            except Exception as exc:
+                logger.exception("Outbox event %s failed", event.id)
+                failed.append((event, repr(exc)[:_ERROR_MAX_LENGTH]))
+            else:
+                done_ids.append(event.id)
+                self._lag.observe(float(event.lag))
+                self._count(event.event_type, "done")
+
+        async with self._db.async_session() as session:
+            if done_ids:
+                await session.execute(
+                    delete(OutboxEventModel).filter(OutboxEventModel.id.in_(done_ids))
+                )
+            for event, error in failed:
+                if event.attempts >= self.max_attempts:
+                    values = {"status": OutboxStatus.dead, "last_error": error}
+                    self._count(event.event_type, "dead")
+                else:
+                    values = {
+                        "available_at": func.now()
+                        + timedelta(seconds=self.backoff(event.attempts)),
+                        "last_error": error,
+                    }
+                    self._count(event.event_type, "retry")
+                await session.execute(
+                    update(OutboxEventModel)
+                    .filter(OutboxEventModel.id == event.id)
+                    .values(**values)
+                )
+            await session.commit()
+
+        return len(events)
+
+    async def refresh_queue(self, db: DBConnect) -> None:
+        """
+        Размер очереди и возраст самого старого необработанного события
+        :param db: подключение к основной БД
+        """
+        query = select(
+            OutboxEventModel.status,
+            func.count(),
+            extract("epoch", func.now() - func.min(OutboxEventModel.created_at)),
+        ).group_by(OutboxEventModel.status)
+        async with db.async_session() as session:
+            rows = (await session.execute(query)).all()
+
+        queue = {"pending": 0, "dead": 0, "oldest_pending_age": None}
+        for status, count, oldest_age in rows:
+            queue[status.name] = count
+            if status is OutboxStatus.pending:
+                queue["oldest_pending_age"] = float(oldest_age)
+        self._queue = queue
+        self._queue_checked = monotonic()
+
+    def stats(self) -> OutboxStats:
+        """Счётчики обработки и последний известный размер очереди"""
+        return OutboxStats(
+            enabled=self.enabled,
+            workers=len(self._tasks),
+            **self._queue,
+            processed=self._results["done"],
+            retried=self._results["retry"],
+            dead_lettered=self._results["dead"],
+        )
+
+    def collect_metrics(self) -> list[MetricFamily]:
+        """Метрики очереди для `/metrics`"""
+        queue = MetricFamily(
+            "outbox_events", "gauge", "События в исходящей очереди по статусу"
+        )
+        queue.add(self._queue["pending"], status="pending")
+        queue.add(self._queue["dead"], status="dead")
+        age = MetricFamily(
+            "outbox_oldest_pending_age_seconds",
+            "gauge",
+            "Возраст самого старого необработанного события",
+        )
+        age.add(self._queue["oldest_pending_age"] or 0.0)
+
+        lag = MetricFamily(
+            "outbox_event_lag_seconds",
+            "histogram",
+            "Время от записи события до его обработки",
+        )
+        add_histogram(lag, self._lag)
+        return [queue, age, lag, outbox_events_processed.collect()]
+
+    def _count(self, event_type: str, result: str) -> None:
+        self._results[result] += 1
+        outbox_events_processed.inc(event_type=event_type, result=result)
+
+    async def _run(self, index: int) -> None:
+        """Цикл обработки: пачки без пауз, пока очередь не опустеет"""
+        while True:
+            try:
+                checked = monotonic() - self._queue_checked
+                if index == 0 and checked >= QUEUE_CHECK_INTERVAL:
+                    await self.refresh_queue(self._db)
+                claimed = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox worker failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+
+outbox_worker = OutboxWorker(
+    workers=settings_outbox.outbox_workers,
+    batch_size=settings_outbox.outbox_batch_size,
+    poll_interval=settings_outbox.outbox_poll_interval,
+    max_attempts=settings_outbox.outbox_max_attempts,
+    backoff_base=settings_outbox.outbox_backoff_base,
+    backoff_max=settings_outbox.outbox_backoff_max,
+    lease=settings_outbox.outbox_lease,
+)
+metrics_registry.register(outbox_worker.collect_metrics)
@@ -0,0 +1,112 @@
+"""Модуль для курсорной (keyset) пагинации списков"""
+
+import base64
+import json
+from typing import Any, Callable, Generic, Sequence, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 500
+# Диапазон `integer` в Postgres: значение вне его нельзя передать в запрос
+CURSOR_INT_MIN = -(2**31)
+CURSOR_INT_MAX = 2**31 - 1
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    """Страница списка и курсор для запроса следующей страницы"""
+
+    items: list[ItemT]
+    next_cursor: str | None = None
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Кодирование ключа последней записи страницы в непрозрачный курсор
+    :param values: значения ключа сортировки последней записи
+    """
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Раскодирование курсора, полученного от клиента
+    :param cursor: курсор из предыдущего ответа
+    :param size: ожидаемое количество значений в ключе
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor!",
+        )
+    return values
+
+
+def cursor_int(value: Any) -> int:
+    """
+    Целое число из курсора в диапазоне `integer`
+    :param value: значение из курсора
+    """
+    value = int(value)
+    if not CURSOR_INT_MIN <= value <= CURSOR_INT_MAX:
+        raise ValueError(f"{value} is out of range")
+    return value
+
+
+def decode_typed_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> tuple:
+    """
+    Раскодирование курсора с преобразованием каждого значения ключа
+    (например, `(datetime.fromisoformat, cursor_int)` для `(created_at, id)`)
+    :param cursor: курсор из предыдущего ответа
+    :param parsers: функции преобразования значений ключа по порядку
+    """
+    values = decode_cursor(cursor, size=len(parsers))
+    try:
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (TypeError, ValueError, OverflowError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor!",
+        )
+
+
+def decode_int_cursor(cursor: str, size: int) -> tuple[int, ...]:
+    """
+    Раскодирование курсора из целых чисел (например, `(price, id)`)
+    :param cursor: курсор из предыдущего ответа
+    :param size: ожидаемое количество значений в ключе
+    """
+    return decode_typed_cursor(cursor, *[cursor_int] * size)
+
+
+def split_page(
+    items: Sequence[ItemT],
+    limit: int,
+    *key: str,
+) -> tuple[list[ItemT], str | None]:
+    """
+    Отделение лишней записи страницы (страница выбирается на одну запись
+    больше `limit`) и получение курсора следующей страницы
+    :param items: записи страницы
+    :param limit: максимальное количество записей на странице
+    :param key: атрибуты записи, из которых состоит ключ сортировки
+    """
+    items = list(items)
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(*(getattr(items[-1], name) for name in key))
+
+    return items, next_cursor
@@ -0,0 +1,114 @@
+"""Модуль для кэширования товаров при чтении"""
+
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Hashable
+
+from pydantic import BaseModel
+
+from config import settings_cache
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+    max_size: int
+
+
+class CacheBackend(ABC):
+    """
+    Интерфейс кэша. Методы асинхронные, чтобы рядом с `LRUCache`
+    можно было добавить сетевую реализацию (например, на Redis)
+    """
+
+    @abstractmethod
+    async def get(self, key: Hashable) -> object | None:
+        """Получение значения по ключу (`None`, если его нет в кэше)"""
+
+    @abstractmethod
+    async def set(self, key: Hashable, value: object) -> None:
+        """Сохранение значения по ключу"""
+
+    @abstractmethod
+    async def delete(self, *keys: Hashable) -> None:
+        """Инвалидация значений по ключам"""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Очистка всего кэша"""
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        """Счётчики попаданий, промахов и вытеснений"""
+
+
+class LRUCache(CacheBackend):
+    """
+    Кэш в памяти процесса с вытеснением давно не использованных значений
+    и ограниченным временем жизни записи. `max_size=0` отключает кэш.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    async def get(self, key: Hashable) -> object | None:
+        entry = self._data.get(key)
+
+        if entry is None:
+            self._misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._expirations += 1
+            self._misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self._hits += 1
+        return value
+
+    async def set(self, key: Hashable, value: object) -> None:
+        if self.max_size <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self._evictions += 1
+
+    async def delete(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+            size=len(self._data),
+            max_size=self.max_size,
+        )
+
+
+product_cache: CacheBackend = LRUCache(
+    max_size=settings_cache.product_cache_size,
+    ttl=settings_cache.product_cache_ttl,
+)
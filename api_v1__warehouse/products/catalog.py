@@ -0,0 +1,372 @@
+"""
+Модуль для снимка каталога товаров в памяти процесса.
+
+Снимок хранит товары, отсортированные по цене, вместе с готовым JSON каждого
+товара, поэтому страница списка собирается без обращения к БД.
+Любое изменение таблицы `products` оповещает все процессы через
+`LISTEN/NOTIFY` (триггер в БД), и они перечитывают только изменённые товары.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import sys
+from bisect import bisect_left, bisect_right, insort
+from time import monotonic
+from typing import NamedTuple
+
+import asyncpg
+from pydantic import BaseModel
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from config import settings_cache
+from models import DBConnect
+from models.product import ProductModel
+from ..pagination import decode_int_cursor, split_page
+from .crud import products_page_etag
+from .schemas import Product
+
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CHANNEL = "products_changed"
+FULL_REFRESH = "*"
+RECONNECT_INTERVAL = 1.0
+_SYNC_PREFIX = "sync:"
+
+# Полезная нагрузка NOTIFY ограничена 8000 байт: при большем количестве
+# изменённых товаров процессы перечитывают каталог целиком
+CATALOG_TRIGGERS_DDL = (
+    "SELECT pg_advisory_xact_lock(hashtext('products_changed'))",
+    f"""
+    CREATE OR REPLACE FUNCTION notify_products_changed() RETURNS trigger AS $$
+    DECLARE
+        ids text;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            SELECT string_agg(id::text, ',') INTO ids FROM old_rows;
+        ELSE
+            SELECT string_agg(id::text, ',') INTO ids FROM new_rows;
+        END IF;
+        IF length(ids) > 7000 THEN
+            ids := '{FULL_REFRESH}';
+        END IF;
+        IF ids IS NOT NULL THEN
+            PERFORM pg_notify('{CATALOG_CHANNEL}', ids);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE TRIGGER products_changed_insert AFTER INSERT ON products
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_products_changed()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER products_changed_update AFTER UPDATE ON products
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_products_changed()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER products_changed_delete AFTER DELETE ON products
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_products_changed()
+    """,
+)
+
+
+async def install_catalog_triggers(conn: AsyncConnection) -> None:
+    """
+    Установка триггеров оповещения об изменениях таблицы `products`.
+    Выполняется один раз вместе с созданием таблиц, а не при запуске снимка
+    :param conn: подключение к основной БД в открытой транзакции
+    """
+    for ddl in CATALOG_TRIGGERS_DDL:
+        await conn.execute(text(ddl))
+
+
+class CatalogEntry(NamedTuple):
+    id: int
+    price: int
+    version: int
+    document: bytes
+
+
+class CatalogStats(BaseModel):
+    enabled: bool
+    fresh: bool
+    staleness: float | None
+    products: int
+    documents_bytes: int
+    memory_bytes: int
+    rebuilds: int
+    refreshed_products: int
+
+
+def _sort_key(price: int, product_id: int) -> tuple[int, int]:
+    """Ключ сортировки по возрастанию, соответствующий `price DESC, id DESC`"""
+    return -price, -product_id
+
+
+class CatalogSnapshot:
+    """
+    Снимок каталога товаров, отсортированный по `(price DESC, id DESC)`.
+    Снимком пользуются, только пока он отстаёт от БД не больше чем
+    на `max_staleness` секунд, иначе список читается из БД.
+    Отставание измеряется собственными служебными оповещениями: когда оповещение
+    процесса возвращается к нему, все изменения, зафиксированные до его отправки,
+    уже получены и применены. `max_staleness=0` отключает снимок.
+    """
+
+    def __init__(self, max_staleness: float):
+        self.max_staleness = max_staleness
+        self._db: DBConnect | None = None
+        self._task: asyncio.Task | None = None
+        self._keys: list[tuple[int, int]] = []
+        self._entries: dict[int, CatalogEntry] = {}
+        self._synced_at: float | None = None
+        self._rebuilds = 0
+        self._refreshed_products = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_staleness > 0
+
+    async def start(self, db: DBConnect) -> None:
+        """
+        Запуск фонового обновления снимка (триггеры оповещения
+        устанавливает `install_catalog_triggers`)
+        :param db: подключение к основной БД
+        """
+        if not self.enabled or self._task is not None:
+            return
+
+        self._db = db
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановка фонового обновления снимка"""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._synced_at = None
+
+    def is_fresh(self) -> bool:
+        """Отстаёт ли снимок от БД не больше чем на `max_staleness` секунд"""
+        return (
+            self._synced_at is not None
+            and monotonic() - self._synced_at <= self.max_staleness
+        )
+
+    def page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        min_price: int | None = None,
+        max_price: int | None = None,
+    ) -> tuple[bytes, str] | None:
+        """
+        Страница списка товаров в виде готового JSON-документа схемы
+        `Page[Product]` и её ETag (`None`, если снимок устарел)
+        :param limit: максимальное количество товаров на странице
+        :param cursor: курсор, полученный с предыдущей страницей
+        :param min_price: нижняя граница цены (включительно)
+        :param max_price: верхняя граница цены (включительно)
+        """
+        if not self.is_fresh():
+            return None
+
+        start = 0
+        stop = len(self._keys)
+        if max_price is not None:
+            start = bisect_left(self._keys, (-max_price, -math.inf))
+        if min_price is not None:
+            stop = bisect_left(self._keys, (-min_price, math.inf))
+        if cursor is not None:
+            last_price, last_id = decode_int_cursor(cursor, size=2)
+            start = max(start, bisect_right(self._keys, _sort_key(last_price, last_id)))
+
+        entries = [
+            self._entries[-product_id]
+            for _price, product_id in self._keys[start : min(stop, start + limit + 1)]
+        ]
+        entries, next_cursor = split_page(entries, limit, "price", "id")
+
+        document = (
+            b'{"items":['
+            + b",".join(entry.document for entry in entries)
+            + b'],"next_cursor":'
+            + json.dumps(next_cursor).encode()
+            + b"}"
+        )
+        return document, products_page_etag(entries, next_cursor)
+
+    def stats(self) -> CatalogStats:
+        """Состояние снимка и занимаемая им память (приблизительно)"""
+        documents_bytes = sum(len(entry.document) for entry in self._entries.values())
+        memory_bytes = (
+            sys.getsizeof(self._keys)
+            + sys.getsizeof(self._entries)
+            + sum(sys.getsizeof(key) for key in self._keys)
+            + sum(
+                sys.getsizeof(entry) + sys.getsizeof(entry.document)
+                for entry in self._entries.values()
+            )
+        )
+        return CatalogStats(
+            enabled=self.enabled,
+            fresh=self.is_fresh(),
+            staleness=(
+                monotonic() - self._synced_at if self._synced_at is not None else None
+            ),
+            products=len(self._entries),
+            documents_bytes=documents_bytes,
+            memory_bytes=memory_bytes,
+            rebuilds=self._rebuilds,
+            refreshed_products=self._refreshed_products,
+        )
+
+    async def _run(self) -> None:
+        """Прослушивание оповещений с переподключением при обрыве связи"""
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Catalog listener failed, reconnecting")
+                await asyncio.sleep(RECONNECT_INTERVAL)
+
+    async def _listen(self) -> None:
+        """
+        Подписка на оповещения, полная загрузка снимка и применение изменений.
+        Оповещения, пришедшие во время загрузки, применяются после неё
+        """
+        url = self._db.engine.url.set(drivername="postgresql")
+        conn = await asyncpg.connect(url.render_as_string(hide_password=False))
+        queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue()
+        try:
+            await conn.add_listener(
+                CATALOG_CHANNEL,
+                lambda _conn, pid, _channel, payload: queue.put_nowait((pid, payload)),
+            )
+            listening_since = monotonic()
+            await self._rebuild()
+            self._synced_at = listening_since
+
+            await self._consume(conn, queue)
+        finally:
+            self._synced_at = None
+            await conn.close()
+
+    async def _consume(
+        self,
+        conn: asyncpg.Connection,
+        queue: asyncio.Queue[tuple[int, str]],
+    ) -> None:
+        """
+        Применение оповещений пачками и отправка служебных оповещений
+        :param conn: подключение, подписанное на оповещения
+        :param queue: очередь полученных оповещений `(pid, payload)`
+        """
+        own_pid = conn.get_server_pid()
+        interval = self.max_staleness / 3
+        last_sync = -math.inf
+
+        while True:
+            if monotonic() - last_sync >= interval:
+                last_sync = monotonic()
+                await conn.execute(
+                    "SELECT pg_notify($1, $2)",
+                    CATALOG_CHANNEL,
+                    f"{_SYNC_PREFIX}{last_sync}",
+                )
+
+            try:
+                notifications = [await asyncio.wait_for(queue.get(), interval)]
+            except asyncio.TimeoutError:
+                continue
+            while not queue.empty():
+                notifications.append(queue.get_nowait())
+
+            product_ids: set[int] = set()
+            full_refresh = False
+            synced_at = None
+            for pid, payload in notifications:
+                if payload.startswith(_SYNC_PREFIX):
+                    if pid == own_pid:
+                        synced_at = float(payload.removeprefix(_SYNC_PREFIX))
+                elif payload == FULL_REFRESH:
+                    full_refresh = True
+                else:
+                    product_ids.update(map(int, payload.split(",")))
+
+            if full_refresh:
+                rebuild_started = monotonic()
+                await self._rebuild()
+                synced_at = max(synced_at or rebuild_started, rebuild_started)
+            elif product_ids:
+                await self._refresh(product_ids)
+
+            if synced_at is not None:
+                self._synced_at = max(self._synced_at, synced_at)
+
+    async def _rebuild(self) -> None:
+        """Полная загрузка снимка из БД"""
+        async with self._db.async_session() as session:
+            products = (await session.scalars(select(ProductModel))).all()
+
+        entries = {product.id: self._entry(product) for product in products}
+        self._keys = sorted(
+            _sort_key(entry.price, entry.id) for entry in entries.values()
+        )
+        self._entries = entries
+        self._rebuilds += 1
+
+    async def _refresh(self, product_ids: set[int]) -> None:
+        """
+        Перечитывание изменённых товаров (отсутствующие в БД удаляются из снимка)
+        :param product_ids: id изменённых товаров
+        """
+        async with self._db.async_session() as session:
+            products = (
+                await session.scalars(
+                    select(ProductModel).filter(ProductModel.id.in_(product_ids))
+                )
+            ).all()
+
+        for product_id in product_ids:
+            entry = self._entries.pop(product_id, None)
+            if entry is not None:
+                del self._keys[
+                    bisect_left(self._keys, _sort_key(entry.price, entry.id))
+                ]
+
+        for product in products:
+            entry = self._entry(product)
+            self._entries[entry.id] = entry
+            insort(self._keys, _sort_key(entry.price, entry.id))
+        self._refreshed_products += len(product_ids)
+
+    @staticmethod
+    def _entry(product: ProductModel) -> CatalogEntry:
+        return CatalogEntry(
+            id=product.id,
+            price=product.price,
+            version=product.version,
+            document=Product.model_validate(product).model_dump_json().encode(),
+        )
+
+
+product_catalog = CatalogSnapshot(
+    max_staleness=settings_cache.product_catalog_max_staleness,
+)
@@ -1,12 +1,59 @@
 """Модуль для описания CRUD-действий модели `Product`"""
 
+from typing import AsyncIterator, Sequence
+
 from fastapi import HTTPException, status
-from sqlalchemy import desc, select
-from sqlalchemy.engine import Result
+from pydantic import ValidationError
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Integer,
+    Select,
+    and_,
+    case,
+    cast,
+    column,
+    desc,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models.product import ProductModel
-from .schemas import ProductCreate, ProductUpdate
+from config import settings_inventory
+from models import DBConnect, ProductInventoryModel, ProductSalesModel
+from models.base import is_replica_session
+from models.product import SEARCH_CONFIG, ProductModel
+from monitoring.metrics import stock_reservation_conflicts
+from ..conditional import make_etag
+from ..export import EXPORT_BATCH_SIZE, ExportFormat, encode_csv, encode_ndjson
+from ..pagination import cursor_int, decode_int_cursor, decode_typed_cursor, split_page
+from .cache import product_cache
+from .inventory import record_stock
+from .schemas import (
+    LowStockProduct,
+    Product,
+    ProductCreate,
+    ProductSales,
+    ProductSalesDay,
+    ProductSearchResult,
+    ProductSnapshot,
+    ProductSuggestion,
+    ProductUpdate,
+    ProductsImportError,
+    ProductsImportResult,
+)
+
+
+PRODUCTS_CSV_HEADER = ("id", "title", "description", "price", "quantity")
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_ERRORS = 100
 
 
 async def create_product(
@@ -20,28 +67,471 @@ async def create_product(
     """
     product = ProductModel(**new_product.model_dump())
     session.add(product)
+    await session.flush()
+    await record_stock(session, {product.id: product.quantity})
     await session.commit()
     await session.refresh(product)
     return product
 
 
-async def read_products(session: AsyncSession) -> list[ProductModel] | None:
+async def upsert_products(
+    session: AsyncSession,
+    rows: AsyncIterator[object],
+) -> ProductsImportResult:
     """
-    Получение из БД списка всех продуктов
+    Загрузка каталога товаров пачками через
+    `INSERT ... ON CONFLICT (title) DO UPDATE` с одной фиксацией в конце.
+    Строки, не прошедшие проверку, пропускаются и попадают в отчёт.
     :param session: объект сессии
+    :param rows: строки каталога в порядке загрузки
     """
-    query = select(ProductModel).order_by(desc(ProductModel.price))
-    results: Result = await session.execute(query)
-    products_list = results.scalars().all()
+    result = ProductsImportResult()
+    batch: dict[str, dict] = {}
+    updated_ids: list[int] = []
+
+    row_number = 0
+    async for row in rows:
+        row_number += 1
+        try:
+            if isinstance(row, Exception):
+                raise row
+            new_product = ProductCreate.model_validate(row)
+        except ValueError as exc:
+            result.rejected += 1
+            if len(result.errors) < MAX_IMPORT_ERRORS:
+                result.errors.append(
+                    ProductsImportError(row=row_number, error=_describe_error(exc))
+                )
+            continue
+
+        # Повтор названия внутри пачки равносилен обновлению
+        if new_product.title in batch:
+            result.updated += 1
+        batch[new_product.title] = new_product.model_dump()
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await _upsert_products_batch(session, batch, result, updated_ids)
+            batch = {}
+
+    if batch:
+        await _upsert_products_batch(session, batch, result, updated_ids)
+    await session.commit()
+    await product_cache.delete(*updated_ids)
+
+    return result
+
+
+def _describe_error(exc: ValueError) -> str:
+    """
+    Краткое описание причины отказа в загрузке строки каталога
+    :param exc: ошибка разбора или проверки строки
+    """
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, error['loc'])) or 'row'}: {error['msg']}"
+            for error in exc.errors()
+        )
+    return str(exc)
+
+
+async def _upsert_products_batch(
+    session: AsyncSession,
+    batch: dict[str, dict],
+    result: ProductsImportResult,
+    updated_ids: list[int],
+) -> None:
+    """
+    Вставка или обновление пачки товаров. Запрос передаётся как executemany,
+    и SQLAlchemy собирает его в многострочный INSERT с кэшированной компиляцией.
+    Для вставленных строк `xmax = 0`, для обновлённых - нет.
+    :param session: объект сессии
+    :param batch: данные товаров по названию
+    :param result: отчёт о загрузке, в который добавляются счётчики
+    :param updated_ids: список, в который добавляются `id` обновлённых товаров
+    """
+    query = insert(ProductModel.__table__)
+    query = query.on_conflict_do_update(
+        index_elements=[ProductModel.title],
+        set_={
+            "description": query.excluded.description,
+            "price": query.excluded.price,
+            "quantity": query.excluded.quantity,
+            **ProductModel.next_version(),
+        },
+    ).returning(ProductModel.id, ProductModel.quantity, literal_column("xmax = 0"))
+
+    quantities = {}
+    for _id, quantity, inserted in await session.execute(query, list(batch.values())):
+        quantities[_id] = quantity
+        if inserted:
+            result.inserted += 1
+        else:
+            result.updated += 1
+            updated_ids.append(_id)
+    await record_stock(session, quantities)
+
+
+async def read_products(
+    session: AsyncSession,
+    limit: int,
+    cursor: str | None = None,
+    min_price: int | None = None,
+    max_price: int | None = None,
+) -> tuple[list[ProductModel], str | None]:
+    """
+    Получение из БД страницы списка продуктов (от дорогих к дешёвым)
+    :param session: объект сессии
+    :param limit: максимальное количество продуктов на странице
+    :param cursor: курсор, полученный с предыдущей страницей
+    :param min_price: нижняя граница цены (включительно)
+    :param max_price: верхняя граница цены (включительно)
+    """
+    query = _select_products_page(
+        select(ProductModel),
+        limit=limit,
+        cursor=cursor,
+        min_price=min_price,
+        max_price=max_price,
+    )
+    products_list = (await session.scalars(query)).all()
+
+    return split_page(products_list, limit, "price", "id")
+
+
+async def read_products_etag(
+    session: AsyncSession,
+    limit: int,
+    cursor: str | None = None,
+    min_price: int | None = None,
+    max_price: int | None = None,
+) -> str:
+    """
+    Получение ETag страницы списка продуктов по их версиям,
+    без загрузки самих продуктов
+    :param session: объект сессии
+    :param limit: максимальное количество продуктов на странице
+    :param cursor: курсор, полученный с предыдущей страницей
+    :param min_price: нижняя граница цены (включительно)
+    :param max_price: верхняя граница цены (включительно)
+    """
+    query = _select_products_page(
+        select(ProductModel.id, ProductModel.price, ProductModel.version),
+        limit=limit,
+        cursor=cursor,
+        min_price=min_price,
+        max_price=max_price,
+    )
+    rows = (await session.execute(query)).all()
+
+    return products_page_etag(*split_page(rows, limit, "price", "id"))
+
+
+def products_page_etag(products_list: Sequence, next_cursor: str | None) -> str:
+    """
+    ETag страницы списка продуктов: меняется при изменении любого продукта
+    страницы, а также при появлении или удалении продуктов на ней
+    :param products_list: продукты (или строки с `id` и `version`) страницы
+    :param next_cursor: курсор следующей страницы
+    """
+    return make_etag(
+        next_cursor,
+        *(f"{product.id}.{product.version}" for product in products_list),
+    )
+
+
+def _select_products_page(
+    query: Select,
+    limit: int,
+    cursor: str | None,
+    min_price: int | None,
+    max_price: int | None,
+) -> Select:
+    """
+    Добавление в запрос сортировки, фильтров и границы страницы продуктов.
+    Выбирается на одну запись больше, чтобы узнать, есть ли следующая страница
+    :param query: запрос к продуктам
+    :param limit: максимальное количество продуктов на странице
+    :param cursor: курсор, полученный с предыдущей страницей
+    :param min_price: нижняя граница цены (включительно)
+    :param max_price: верхняя граница цены (включительно)
+    """
+    query = query.order_by(desc(ProductModel.price), desc(ProductModel.id)).limit(
+        limit + 1
+    )
+
+    if min_price is not None:
+        query = query.filter(ProductModel.price >= min_price)
+    if max_price is not None:
+        query = query.filter(ProductModel.price <= max_price)
+    if cursor is not None:
+        last_price, last_id = decode_int_cursor(cursor, size=2)
+        query = query.filter(
+            tuple_(ProductModel.price, ProductModel.id) < (last_price, last_id)
+        )
+    return query
+
+
+def _title_prefix(prefix: str) -> ColumnElement[bool]:
+    """
+    Условие «название начинается с `prefix`» без учёта регистра в виде диапазона
+    по побайтовому порядку, чтобы запрос читал индекс `idx_products_title_prefix`
+    и при подготовленных запросах
+    :param prefix: начало названия
+    """
+    title = func.lower(ProductModel.title).collate("C")
+    prefix = prefix.lower()
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(title >= prefix, title < upper_bound)
+
+
+def _filter_products(
+    query: Select,
+    min_price: int | None,
+    max_price: int | None,
+    min_quantity: int | None,
+) -> Select:
+    """
+    Добавление в запрос фильтров по цене и остатку
+    :param query: запрос к продуктам
+    :param min_price: нижняя граница цены (включительно)
+    :param max_price: верхняя граница цены (включительно)
+    :param min_quantity: нижняя граница остатка (включительно)
+    """
+    if min_price is not None:
+        query = query.filter(ProductModel.price >= min_price)
+    if max_price is not None:
+        query = query.filter(ProductModel.price <= max_price)
+    if min_quantity is not None:
+        query = query.filter(ProductModel.quantity >= min_quantity)
+    return query
+
+
+async def search_products(
+    session: AsyncSession,
+    q: str,
+    limit: int,
+    cursor: str | None = None,
+    min_price: int | None = None,
+    max_price: int | None = None,
+    min_quantity: int | None = None,
+) -> tuple[list[ProductSearchResult], str | None]:
+    """
+    Полнотекстовый поиск продуктов по названию и описанию.
+    Находятся продукты, подходящие под запрос (синтаксис `websearch_to_tsquery`:
+    слова, "фразы", `or`, `-исключение`) или название которых начинается с `q`;
+    сначала идут совпадения по началу названия, затем по убыванию релевантности
+    :param session: объект сессии
+    :param q: поисковый запрос
+    :param limit: максимальное количество продуктов на странице
+    :param cursor: курсор, полученный с предыдущей страницей
+    :param min_price: нижняя граница цены (включительно)
+    :param max_price: верхняя граница цены (включительно)
+    :param min_quantity: нижняя граница остатка (включительно)
+    """
+    q = q.strip()
+    if not q:
+        return [], None
+
+    ts_query = func.websearch_to_tsquery(cast(literal(SEARCH_CONFIG), REGCONFIG), q)
+    title_prefix = _title_prefix(q)
+    rank = cast(func.ts_rank_cd(ProductModel.search_vector, ts_query), Float) + case(
+        (title_prefix, 1.0), else_=0.0
+    )
+    query = (
+        select(
+            ProductModel.id,
+            ProductModel.title,
+            ProductModel.description,
+            ProductModel.price,
+            ProductModel.quantity,
+            rank.label("rank"),
+        )
+        .filter(or_(ProductModel.search_vector.bool_op("@@")(ts_query), title_prefix))
+        .order_by(desc(rank), desc(ProductModel.id))
+        .limit(limit + 1)
+    )
+    query = _filter_products(query, min_price, max_price, min_quantity)
+    if cursor is not None:
+        last_rank, last_id = decode_typed_cursor(cursor, float, cursor_int)
+        query = query.filter(tuple_(rank, ProductModel.id) < (last_rank, last_id))
+    rows, next_cursor = split_page(
+        (await session.execute(query)).all(), limit, "rank", "id"
+    )
+
+    return [ProductSearchResult.model_validate(row) for row in rows], next_cursor
+
+
+async def suggest_products(
+    session: AsyncSession,
+    q: str,
+    limit: int,
+    min_price: int | None = None,
+    max_price: int | None = None,
+    min_quantity: int | None = None,
+) -> list[ProductSuggestion]:
+    """
+    Подсказки для ввода: продукты, название которых начинается с `q`
+    (без учёта регистра), по алфавиту. Запрос читает диапазон индекса
+    `idx_products_title_prefix` и останавливается на `limit` записях
+    :param session: объект сессии
+    :param q: начало названия
+    :param limit: максимальное количество подсказок
+    :param min_price: нижняя граница цены (включительно)
+    :param max_price: верхняя граница цены (включительно)
+    :param min_quantity: нижняя граница остатка (включительно)
+    """
+    q = q.strip()
+    if not q:
+        return []
+
+    query = (
+        select(
+            ProductModel.id,
+            ProductModel.title,
+            ProductModel.price,
+            ProductModel.quantity,
+        )
+        .filter(_title_prefix(q))
+        .order_by(func.lower(ProductModel.title).collate("C"), ProductModel.id)
+        .limit(limit)
+    )
+    query = _filter_products(query, min_price, max_price, min_quantity)
+    rows = (await session.execute(query)).all()
+
+    return [ProductSuggestion.model_validate(row) for row in rows]
 
-    if products_list is None:
 
+async def read_low_stock_products(
+    session: AsyncSession,
+    limit: int,
+    cursor: str | None = None,
+) -> tuple[list[LowStockProduct], str | None]:
+    """
+    Получение из складской проекции страницы товаров для дозаказа
+    (остаток не больше уровня дозаказа) по возрастанию остатка.
+    Страница читается по частичному индексу без обращения к заказам
+    :param session: объект сессии
+    :param limit: максимальное количество товаров на странице
+    :param cursor: курсор, полученный с предыдущей страницей
+    """
+    query = (
+        select(
+            ProductInventoryModel.product_id,
+            ProductModel.title,
+            ProductInventoryModel.available,
+            ProductInventoryModel.reserved,
+            ProductInventoryModel.reorder_level,
+        )
+        .join(ProductModel, ProductModel.id == ProductInventoryModel.product_id)
+        .filter(ProductInventoryModel.needs_reorder)
+        .order_by(ProductInventoryModel.available, ProductInventoryModel.product_id)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        last_available, last_id = decode_int_cursor(cursor, size=2)
+        query = query.filter(
+            tuple_(ProductInventoryModel.available, ProductInventoryModel.product_id)
+            > (last_available, last_id)
+        )
+    rows, next_cursor = split_page(
+        (await session.execute(query)).all(), limit, "available", "product_id"
+    )
+
+    return [LowStockProduct.model_validate(row) for row in rows], next_cursor
+
+
+async def read_product_sales(
+    session: AsyncSession,
+    product_id: int,
+    days: int,
+) -> ProductSales:
+    """
+    Получение из складской проекции остатка, резерва и продаж товара
+    по дням за последние `days` дней (включая текущий)
+    :param session: объект сессии
+    :param product_id: id товара
+    :param days: количество дней
+    """
+    query_inventory = (
+        select(
+            ProductModel.id,
+            func.coalesce(ProductInventoryModel.available, ProductModel.quantity),
+            func.coalesce(ProductInventoryModel.reserved, 0),
+            func.coalesce(
+                ProductInventoryModel.reorder_level,
+                settings_inventory.inventory_reorder_level,
+            ),
+        )
+        .outerjoin(
+            ProductInventoryModel,
+            ProductInventoryModel.product_id == ProductModel.id,
+        )
+        .filter(ProductModel.id == product_id)
+    )
+    inventory = (await session.execute(query_inventory)).one_or_none()
+
+    if inventory is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Products not found!",
+            detail=f"Product with id={product_id} not found!",
         )
 
-    return list(products_list)
+    query_sales = (
+        select(ProductSalesModel.day, ProductSalesModel.units)
+        .filter(
+            ProductSalesModel.product_id == product_id,
+            ProductSalesModel.day > func.current_date() - days,
+        )
+        .order_by(ProductSalesModel.day)
+    )
+    sales_days = [
+        ProductSalesDay.model_validate(row)
+        for row in (await session.execute(query_sales)).all()
+    ]
+    _, available, reserved, reorder_level = inventory
+
+    return ProductSales(
+        product_id=product_id,
+        available=available,
+        reserved=reserved,
+        reorder_level=reorder_level,
+        needs_reorder=available <= reorder_level,
+        units=sum(sales_day.units for sales_day in sales_days),
+        days=sales_days,
+    )
+
+
+async def stream_products(
+    db: DBConnect,
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    """
+    Потоковая выгрузка всех продуктов из БД через серверный курсор
+    :param db: подключение к БД, сессия для чтения открывается на время выгрузки
+    :param export_format: формат выгрузки
+    """
+    query = (
+        select(
+            ProductModel.id,
+            ProductModel.title,
+            ProductModel.description,
+            ProductModel.price,
+            ProductModel.quantity,
+        )
+        .order_by(ProductModel.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    async with db.read_session_factory()() as session:
+        results = await session.stream(query)
+
+        if export_format is ExportFormat.csv:
+            yield encode_csv([PRODUCTS_CSV_HEADER])
+            async for rows in results.partitions():
+                yield encode_csv(rows)
+        else:
+            async for rows in results.partitions():
+                yield encode_ndjson(row._asdict() for row in rows)
 
 
 async def read_product_by_id(
@@ -64,6 +554,148 @@ async def read_product_by_id(
     )
 
 
+async def read_product_by_id_cached(
+    session: AsyncSession,
+    product_id: int,
+    use_cache: bool = True,
+) -> ProductSnapshot:
+    """
+    Получение товара и его версии по `id` через кэш: при промахе товар читается
+    из БД и сохраняется в кэш. Кэш сбрасывается всеми изменениями товара,
+    а время жизни записи ограничивает устаревание в остальных случаях.
+    Товар, прочитанный с реплики, в кэш не сохраняется: отстающая реплика
+    вернула бы в кэш версию, которую только что сбросила запись
+    :param session: объект сессии
+    :param product_id: id искомого товара
+    :param use_cache: читать из кэша (`False` - сразу из БД)
+    """
+    snapshot = await product_cache.get(product_id) if use_cache else None
+
+    if snapshot is None:
+        product = await read_product_by_id(session=session, product_id=product_id)
+        snapshot = ProductSnapshot(
+            product=Product.model_validate(product),
+            version=product.version,
+            updated_at=product.updated_at,
+        )
+        if not is_replica_session(session):
+            await product_cache.set(product_id, snapshot)
+
+    return snapshot
+
+
+async def reserve_product(
+    session: AsyncSession,
+    product_id: int,
+    product_count: int,
+) -> ProductModel:
+    """
+    Резервирование товара на складе одним условным `UPDATE ... RETURNING`.
+    Проверка остатка и списание выполняются атомарно в БД, поэтому
+    параллельные заказы не могут списать больше, чем есть на складе.
+    Изменение фиксируется вызывающим кодом вместе с заказом,
+    он же после фиксации сбрасывает товар в кэше.
+    :param session: объект сессии
+    :param product_id: id резервируемого товара
+    :param product_count: резервируемое количество товара
+    """
+    query = (
+        update(ProductModel)
+        .where(
+            ProductModel.id == product_id,
+            ProductModel.quantity >= product_count,
+        )
+        .values(
+            quantity=ProductModel.quantity - product_count,
+            **ProductModel.next_version(),
+        )
+        .returning(ProductModel)
+        .execution_options(populate_existing=True)
+    )
+    product: ProductModel | None = await session.scalar(query)
+
+    if product is not None:
+        return product
+
+    quantity: int | None = await session.scalar(
+        select(ProductModel.quantity).filter(ProductModel.id == product_id)
+    )
+    if quantity is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with id={product_id} not found!",
+        )
+    stock_reservation_conflicts.inc()
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"There ara only {quantity} products with id={product_id} left in the warehouse!",
+    )
+
+
+async def reserve_products(
+    session: AsyncSession,
+    products_counts: dict[int, int],
+) -> dict[int, ProductModel]:
+    """
+    Резервирование сразу нескольких товаров одним
+    `UPDATE ... FROM (VALUES ...) RETURNING`. Резерв выполняется целиком:
+    если хотя бы одного товара не хватает, возвращается ошибка и вызывающий
+    код не фиксирует транзакцию. При успехе он после фиксации сбрасывает
+    товары в кэше. Порядок блокировки строк в `UPDATE ... FROM` зависит
+    от плана запроса, поэтому товары сначала блокируются
+    `SELECT ... ORDER BY id FOR UPDATE`: параллельные резервы пересекающихся
+    товаров ждут друг друга, а не взаимно блокируются.
+    :param session: объект сессии
+    :param products_counts: резервируемое количество по `id` товара
+    """
+    reserved = values(
+        column("id", Integer),
+        column("count", Integer),
+        name="reserved",
+    ).data(sorted(products_counts.items()))
+    await session.execute(
+        select(ProductModel.id)
+        .filter(ProductModel.id.in_(products_counts))
+        .order_by(ProductModel.id)
+        .with_for_update()
+    )
+    query = (
+        update(ProductModel)
+        .where(
+            ProductModel.id == reserved.c.id,
+            ProductModel.quantity >= reserved.c.count,
+        )
+        .values(
+            quantity=ProductModel.quantity - reserved.c.count,
+            **ProductModel.next_version(),
+        )
+        .returning(ProductModel)
+        .execution_options(populate_existing=True, synchronize_session=False)
+    )
+    products = {product.id: product for product in await session.scalars(query)}
+
+    if len(products) == len(products_counts):
+        return products
+
+    failed_ids = [_id for _id in sorted(products_counts) if _id not in products]
+    query_quantities = select(ProductModel.id, ProductModel.quantity).filter(
+        ProductModel.id.in_(failed_ids)
+    )
+    quantities = dict((await session.execute(query_quantities)).tuples().all())
+
+    for product_id in failed_ids:
+        if product_id not in quantities:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Product with id={product_id} not found!",
+            )
+    stock_reservation_conflicts.inc()
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"There ara only {quantities[failed_ids[0]]} products with id={failed_ids[0]} left in the warehouse!",
+    )
+
+
 async def update_product_by_id(
     session: AsyncSession,
     product: ProductModel,
@@ -77,8 +709,11 @@ async def update_product_by_id(
     """
     for _name, _value in new_product_info.model_dump().items():
         setattr(product, _name, _value)
+    product.touch()
 
+    await record_stock(session, {product.id: product.quantity})
     await session.commit()
+    await product_cache.delete(product.id)
     return product
 
 
@@ -91,5 +726,7 @@ async def delete_product_by_id(
     :param product: удаляемый продукт
     :param session: объект сессии
     """
+    product_id = product.id
     await session.delete(product)
     await session.commit()
+    await product_cache.delete(product_id)
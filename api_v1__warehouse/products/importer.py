@@ -0,0 +1,104 @@
+"""Модуль для разбора загружаемых каталогов товаров (JSON, NDJSON, CSV)"""
+
+import codecs
+import csv
+import json
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request, status
+
+
+IMPORT_MEDIA_TYPES = ("application/json", "application/x-ndjson", "text/csv")
+
+
+async def iter_import_rows(request: Request) -> AsyncIterator[object]:
+    """
+    Получение строк каталога из тела запроса в зависимости от `Content-Type`.
+    NDJSON и CSV разбираются по мере поступления данных, JSON-массив целиком.
+    Строка, которую не удалось разобрать, возвращается как исключение.
+    :param request: объект запроса
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    if media_type == "application/json":
+        try:
+            rows = json.loads(await request.body())
+        except ValueError:
+            rows = None
+        if not isinstance(rows, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body must be a JSON array!",
+            )
+        for row in rows:
+            yield row
+
+    elif media_type == "application/x-ndjson":
+        async for line in _iter_lines(request.stream()):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield exc
+
+    elif media_type == "text/csv":
+        async for row in _iter_csv_rows(request.stream()):
+            yield row
+
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Supported content types: {', '.join(IMPORT_MEDIA_TYPES)}",
+        )
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Разбиение потока байт на строки без чтения всего тела в память
+    :param chunks: поток байт из тела запроса
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+
+    async for chunk in chunks:
+        *lines, tail = (tail + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def _iter_csv_rows(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[dict | ValueError]:
+    """
+    Разбор потока CSV с заголовком в словари.
+    Запись считается законченной, когда в ней чётное количество кавычек,
+    поэтому поля в кавычках могут содержать переводы строк.
+    :param chunks: поток байт из тела запроса
+    """
+    header = None
+    record: list[str] = []
+    quotes = 0
+
+    async for line in _iter_lines(chunks):
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+
+        fields = next(csv.reader(["\n".join(record)]), [])
+        record, quotes = [], 0
+
+        if not fields:
+            continue
+        if header is None:
+            header = fields
+            continue
+        yield dict(zip(header, fields))
+
+    if record:
+        yield ValueError("Unterminated quoted field at the end of CSV")
@@ -0,0 +1,222 @@
+"""
+Модуль для складской проекции товаров: остаток, резерв, признак дозаказа
+и продажи по дням.
+
+Проекция обновляется в транзакции, которая меняет товар или заказ, одним
+`INSERT ... ON CONFLICT DO UPDATE` с приращениями (резерв, продажи) или
+значением остатка, уже заблокированного строкой товара. Пересчёт по всем
+заказам нужен только для начального заполнения:
+`python -m api_v1__warehouse.products.inventory`
+"""
+
+import asyncio
+from typing import Iterable
+
+from sqlalchemy import (
+    Date,
+    Integer,
+    Select,
+    cast,
+    column,
+    delete,
+    func,
+    literal,
+    select,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings_inventory
+from models import (
+    OrderItemModel,
+    OrderModel,
+    OrderStatus,
+    ProductInventoryModel,
+    ProductModel,
+    ProductSalesModel,
+    e_store_db,
+)
+
+
+def _upsert_inventory(rows: Select):
+    """
+    Вставка строк проекции; для существующих остаток заменяется,
+    а резерв увеличивается на переданное приращение
+    :param rows: `product_id`, `available`, `reserved`, `reorder_level`
+        по возрастанию `product_id`
+    """
+    query = insert(ProductInventoryModel).from_select(
+        ["product_id", "available", "reserved", "reorder_level"], rows
+    )
+    return query.on_conflict_do_update(
+        index_elements=[ProductInventoryModel.product_id],
+        set_={
+            "available": query.excluded.available,
+            "reserved": ProductInventoryModel.reserved + query.excluded.reserved,
+            "updated_at": func.now(),
+        },
+    )
+
+
+async def record_stock(session: AsyncSession, quantities: dict[int, int]) -> None:
+    """
+    Запись остатков созданных или изменённых товаров
+    :param session: объект сессии
+    :param quantities: остаток по `id` товара
+    """
+    if not quantities:
+        return
+    stock = values(
+        column("product_id", Integer),
+        column("available", Integer),
+        name="stock",
+    ).data(sorted(quantities.items()))
+    await session.execute(
+        _upsert_inventory(
+            select(
+                stock.c.product_id,
+                stock.c.available,
+                literal(0),
+                literal(settings_inventory.inventory_reorder_level),
+            )
+        )
+    )
+
+
+async def record_reservations(
+    session: AsyncSession,
+    products: Iterable[ProductModel],
+    sold_counts: dict[int, int],
+    reserved_counts: dict[int, int],
+) -> None:
+    """
+    Запись резерва товара под заказы одним запросом: остаток берётся
+    из строки товара после резервирования, резерв и продажи за текущий
+    день увеличиваются на заказанное количество
+    :param session: объект сессии
+    :param products: зарезервированные товары
+    :param sold_counts: заказанное количество по `id` товара
+    :param reserved_counts: количество в заказах «В процессе» по `id` товара
+    """
+    ordered = values(
+        column("product_id", Integer),
+        column("available", Integer),
+        column("sold", Integer),
+        column("reserved", Integer),
+        name="ordered",
+    ).data(
+        sorted(
+            (
+                product.id,
+                product.quantity,
+                sold_counts[product.id],
+                reserved_counts.get(product.id, 0),
+            )
+            for product in products
+        )
+    )
+
+    sales = insert(ProductSalesModel).from_select(
+        ["product_id", "day", "units"],
+        select(ordered.c.product_id, func.current_date(), ordered.c.sold),
+    )
+    sales = sales.on_conflict_do_update(
+        constraint="idx_unique_product_sales_day",
+        set_={"units": ProductSalesModel.units + sales.excluded.units},
+    ).cte("sales")
+    query = _upsert_inventory(
+        select(
+            ordered.c.product_id,
+            ordered.c.available,
+            ordered.c.reserved,
+            literal(settings_inventory.inventory_reorder_level),
+        )
+    ).add_cte(sales)
+    await session.execute(query)
+
+
+def release_reservations(updated):
+    """
+    Снятие резерва с товаров заказов, которые перешли из статуса «В процессе»;
+    выполняется в запросе смены статуса
+    :param updated: CTE изменённых заказов (`id`, `from_status`)
+    """
+    released = (
+        select(
+            OrderItemModel.product_id,
+            ProductModel.quantity,
+            -func.sum(OrderItemModel.product_count),
+            literal(settings_inventory.inventory_reorder_level),
+        )
+        .join(updated, updated.c.id == OrderItemModel.order_id)
+        .join(ProductModel, ProductModel.id == OrderItemModel.product_id)
+        .filter(updated.c.from_status == OrderStatus.in_process)
+        .group_by(OrderItemModel.product_id, ProductModel.quantity)
+        .order_by(OrderItemModel.product_id)
+    )
+    query = insert(ProductInventoryModel).from_select(
+        ["product_id", "available", "reserved", "reorder_level"], released
+    )
+    return query.on_conflict_do_update(
+        index_elements=[ProductInventoryModel.product_id],
+        set_={
+            "reserved": ProductInventoryModel.reserved + query.excluded.reserved,
+            "updated_at": func.now(),
+        },
+    )
+
+
+async def rebuild_inventory(session: AsyncSession) -> None:
+    """
+    Полный пересчёт проекции по товарам и заказам (начальное заполнение)
+    :param session: объект сессии
+    """
+    reserved = (
+        select(
+            OrderItemModel.product_id,
+            func.sum(OrderItemModel.product_count).label("reserved"),
+        )
+        .join(OrderModel, OrderModel.id == OrderItemModel.order_id)
+        .filter(OrderModel.status == OrderStatus.in_process)
+        .group_by(OrderItemModel.product_id)
+        .subquery("reserved")
+    )
+    await session.execute(delete(ProductInventoryModel))
+    await session.execute(
+        insert(ProductInventoryModel).from_select(
+            ["product_id", "available", "reserved", "reorder_level"],
+            select(
+                ProductModel.id,
+                ProductModel.quantity,
+                func.coalesce(reserved.c.reserved, 0),
+                literal(settings_inventory.inventory_reorder_level),
+            ).outerjoin(reserved, reserved.c.product_id == ProductModel.id),
+        )
+    )
+
+    day = cast(OrderModel.created_at, Date)
+    await session.execute(delete(ProductSalesModel))
+    await session.execute(
+        insert(ProductSalesModel).from_select(
+            ["product_id", "day", "units"],
+            select(
+                OrderItemModel.product_id,
+                day,
+                func.sum(OrderItemModel.product_count),
+            )
+            .join(OrderModel, OrderModel.id == OrderItemModel.order_id)
+            .group_by(OrderItemModel.product_id, day),
+        )
+    )
+    await session.commit()
+
+
+async def main() -> None:
+    async with e_store_db.async_session() as session:
+        await rebuild_inventory(session)
+    await e_store_db.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,11 +1,13 @@
 """Модуль для описания схем `Product`"""
 
-from pydantic import BaseModel, ConfigDict
+from datetime import date, datetime
+
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ProductBase(BaseModel):
 
-    title: str
+    title: str = Field(max_length=50)
     description: str
     price: int
 
@@ -17,6 +19,27 @@ class Product(ProductBase):
     quantity: int
 
 
+class ProductSearchResult(Product):
+    rank: float
+
+
+class ProductSuggestion(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    price: int
+    quantity: int
+
+
+class ProductSnapshot(BaseModel):
+    """Товар вместе с версией, по которой строятся ETag и Last-Modified"""
+
+    product: Product
+    version: int
+    updated_at: datetime
+
+
 class ProductInOrder(ProductBase):
     model_config = ConfigDict(from_attributes=True)
 
@@ -27,3 +50,42 @@ class ProductCreate(ProductBase):
 
 class ProductUpdate(ProductBase):
     quantity: int
+
+
+class ProductsImportError(BaseModel):
+    row: int
+    error: str
+
+
+class ProductsImportResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: list[ProductsImportError] = []
+
+
+class LowStockProduct(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    product_id: int
+    title: str
+    available: int
+    reserved: int
+    reorder_level: int
+
+
+class ProductSalesDay(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    day: date
+    units: int
+
+
+class ProductSales(BaseModel):
+    product_id: int
+    available: int
+    reserved: int
+    reorder_level: int
+    needs_reorder: bool
+    units: int
+    days: list[ProductSalesDay]
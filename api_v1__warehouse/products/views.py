@@ -2,16 +2,44 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Path, status
+from fastapi import APIRouter, Depends, Path, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import ProductModel
-from models.base import e_store_db
+from models import DBConnect, ProductModel
+from models.base import e_store_db, read_your_writes
+from ..conditional import (
+    conditional_headers,
+    has_conditions,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+)
+from ..export import EXPORT_MEDIA_TYPES, ExportFormat, export_headers
+from ..pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, Page
+from ..responses import FastJSONRoute
 from . import crud
-from .schemas import ProductCreate, Product, ProductUpdate
+from .catalog import product_catalog
+from .importer import IMPORT_MEDIA_TYPES, iter_import_rows
+from .schemas import (
+    LowStockProduct,
+    ProductCreate,
+    Product,
+    ProductSales,
+    ProductSearchResult,
+    ProductSuggestion,
+    ProductUpdate,
+    ProductsImportResult,
+)
 
 
-router = APIRouter(prefix="/api/products", tags=["Products"])
+DEFAULT_SALES_DAYS = 30
+MAX_SALES_DAYS = 366
+MAX_SEARCH_QUERY_LENGTH = 100
+DEFAULT_SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 50
+
+router = APIRouter(prefix="/api/products", tags=["Products"], route_class=FastJSONRoute)
 
 
 @router.post("/", response_model=Product, status_code=status.HTTP_201_CREATED)
@@ -30,22 +58,264 @@ async def post_product(
     )
 
 
-@router.get("/", response_model=list[Product], status_code=status.HTTP_200_OK)
-async def get_products(session: AsyncSession = Depends(e_store_db.session_dependency)):
+@router.post(
+    "/bulk",
+    response_model=ProductsImportResult,
+    status_code=status.HTTP_200_OK,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                media_type: {"schema": {"type": "string"}}
+                for media_type in IMPORT_MEDIA_TYPES
+            },
+        }
+    },
+)
+async def post_products_bulk(
+    request: Request,
+    session: AsyncSession = Depends(e_store_db.session_dependency),
+):
+    """
+    Endpoint для загрузки каталога товаров: новые товары создаются,
+    существующие (по `title`) обновляются.
+    Тело запроса - JSON-массив, NDJSON или CSV с заголовком
+    `title,description,price,quantity`.
+    * :param request: объект запроса
+    * :param session: объект сессии
+    """
+    return await crud.upsert_products(
+        session=session,
+        rows=iter_import_rows(request),
+    )
+
+
+@router.get("/", response_model=Page[Product], status_code=status.HTTP_200_OK)
+async def get_products(
+    request: Request,
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_LIMIT)] = DEFAULT_PAGE_LIMIT,
+    cursor: str | None = None,
+    min_price: int | None = None,
+    max_price: int | None = None,
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
+):
+    """
+    Endpoint для получения страницы списка товаров.
+    Пока снимок каталога в памяти свежий, страница отдаётся из него без запроса
+    к БД (кроме запросов с заголовком `X-Read-Your-Writes`).
+    Ответ содержит `ETag`; при совпадении с `If-None-Match`
+    возвращается 304 (из БД при этом читаются только версии товаров страницы).
+    * :param request: объект запроса
+    * :param response: объект ответа (для заголовка `ETag`)
+    * :param limit: максимальное количество товаров на странице
+    * :param cursor: курсор `next_cursor` из предыдущей страницы
+    * :param min_price: нижняя граница цены (включительно)
+    * :param max_price: верхняя граница цены (включительно)
+    * :param session: объект сессии
+    """
+    page = None
+    if not read_your_writes(request):
+        page = product_catalog.page(
+            limit=limit,
+            cursor=cursor,
+            min_price=min_price,
+            max_price=max_price,
+        )
+    if page is not None:
+        document, etag = page
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        return Response(
+            content=document,
+            media_type="application/json",
+            headers=conditional_headers(etag),
+        )
+
+    if has_conditions(request):
+        etag = await crud.read_products_etag(
+            session=session,
+            limit=limit,
+            cursor=cursor,
+            min_price=min_price,
+            max_price=max_price,
+        )
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+    products_list, next_cursor = await crud.read_products(
+        session=session,
+        limit=limit,
+        cursor=cursor,
+        min_price=min_price,
+        max_price=max_price,
+    )
+    response.headers.update(
+        conditional_headers(crud.products_page_etag(products_list, next_cursor))
+    )
+    return {"items": products_list, "next_cursor": next_cursor}
+
+
+@router.get("/export", response_class=StreamingResponse, status_code=status.HTTP_200_OK)
+async def export_products(
+    export_format: ExportFormat = ExportFormat.ndjson,
+    db: DBConnect = Depends(e_store_db.db_dependency),
+):
+    """
+    Endpoint для потоковой выгрузки всех товаров
+    * :param export_format: формат выгрузки (ndjson или csv)
+    * :param db: подключение к БД
+    """
+    return StreamingResponse(
+        crud.stream_products(db=db, export_format=export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers=export_headers("products", export_format),
+    )
+
+
+@router.get(
+    "/search", response_model=Page[ProductSearchResult], status_code=status.HTTP_200_OK
+)
+async def search_products(
+    q: Annotated[str, Query(min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_LIMIT)] = DEFAULT_PAGE_LIMIT,
+    cursor: str | None = None,
+    min_price: int | None = None,
+    max_price: int | None = None,
+    min_quantity: int | None = None,
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
+):
+    """
+    Endpoint для полнотекстового поиска товаров по названию и описанию
+    (сначала товары, название которых начинается с `q`, затем по релевантности)
+    * :param q: поисковый запрос
+    * :param limit: максимальное количество товаров на странице
+    * :param cursor: курсор `next_cursor` из предыдущей страницы
+    * :param min_price: нижняя граница цены (включительно)
+    * :param max_price: верхняя граница цены (включительно)
+    * :param min_quantity: нижняя граница остатка (включительно)
+    * :param session: объект сессии
+    """
+    products_list, next_cursor = await crud.search_products(
+        session=session,
+        q=q,
+        limit=limit,
+        cursor=cursor,
+        min_price=min_price,
+        max_price=max_price,
+        min_quantity=min_quantity,
+    )
+    return {"items": products_list, "next_cursor": next_cursor}
+
+
+@router.get(
+    "/suggest",
+    response_model=list[ProductSuggestion],
+    status_code=status.HTTP_200_OK,
+)
+async def suggest_products(
+    q: Annotated[str, Query(min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH)],
+    limit: Annotated[int, Query(ge=1, le=MAX_SUGGEST_LIMIT)] = DEFAULT_SUGGEST_LIMIT,
+    min_price: int | None = None,
+    max_price: int | None = None,
+    min_quantity: int | None = None,
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
+):
     """
-    Endpoint для получения списка товаров
+    Endpoint для подсказок при вводе: товары, название которых
+    начинается с `q` (без учёта регистра), по алфавиту
+    * :param q: начало названия
+    * :param limit: максимальное количество подсказок
+    * :param min_price: нижняя граница цены (включительно)
+    * :param max_price: верхняя граница цены (включительно)
+    * :param min_quantity: нижняя граница остатка (включительно)
     * :param session: объект сессии
     """
-    return await crud.read_products(session=session)
+    return await crud.suggest_products(
+        session=session,
+        q=q,
+        limit=limit,
+        min_price=min_price,
+        max_price=max_price,
+        min_quantity=min_quantity,
+    )
+
+
+@router.get(
+    "/low-stock", response_model=Page[LowStockProduct], status_code=status.HTTP_200_OK
+)
+async def get_low_stock_products(
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_LIMIT)] = DEFAULT_PAGE_LIMIT,
+    cursor: str | None = None,
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
+):
+    """
+    Endpoint для получения страницы товаров, остаток которых опустился
+    до уровня дозаказа (по возрастанию остатка)
+    * :param limit: максимальное количество товаров на странице
+    * :param cursor: курсор `next_cursor` из предыдущей страницы
+    * :param session: объект сессии
+    """
+    products_list, next_cursor = await crud.read_low_stock_products(
+        session=session,
+        limit=limit,
+        cursor=cursor,
+    )
+    return {"items": products_list, "next_cursor": next_cursor}
+
+
+@router.get("/{id}/sales", response_model=ProductSales, status_code=status.HTTP_200_OK)
+async def get_product_sales(
+    id: Annotated[int, Path(..., ge=1)],
+    days: Annotated[int, Query(ge=1, le=MAX_SALES_DAYS)] = DEFAULT_SALES_DAYS,
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
+):
+    """
+    Endpoint для получения остатка, резерва и продаж товара по дням
+    * :param id: id товара
+    * :param days: количество последних дней (включая текущий)
+    * :param session: объект сессии
+    """
+    return await crud.read_product_sales(session=session, product_id=id, days=days)
 
 
 @router.get("/{id}", response_model=Product, status_code=status.HTTP_200_OK)
 async def get_product_by_id(
+    request: Request,
+    response: Response,
     id: Annotated[int, Path(..., ge=1)],
-    session: AsyncSession = Depends(e_store_db.session_dependency),
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
 ):
     """
-    Endpoint для получения информации о товаре по `id`
+    Endpoint для получения информации о товаре по `id`.
+    Ответ содержит `ETag` и `Last-Modified`; при совпадении с `If-None-Match`
+    или `If-Modified-Since` возвращается 304 без тела.
+    С заголовком `X-Read-Your-Writes` товар читается из основной БД мимо кэша
+    * :param request: объект запроса
+    * :param response: объект ответа (для заголовков `ETag` и `Last-Modified`)
+    * :param id: id искомого товара
+    * :param session: объект сессии
+    """
+    snapshot = await crud.read_product_by_id_cached(
+        session=session,
+        product_id=id,
+        use_cache=not read_your_writes(request),
+    )
+    etag = make_etag(snapshot.version)
+
+    if is_not_modified(request, etag, snapshot.updated_at):
+        return not_modified_response(etag, snapshot.updated_at)
+
+    response.headers.update(conditional_headers(etag, snapshot.updated_at))
+    return snapshot.product
+
+
+async def product_by_id(
+    id: Annotated[int, Path(..., ge=1)],
+    session: AsyncSession = Depends(e_store_db.session_dependency),
+) -> ProductModel:
+    """
+    Зависимость для получения из БД (в обход кэша) изменяемого товара по `id`
     * :param id: id искомого товара
     * :param session: объект сессии
     """
@@ -55,7 +325,7 @@ async def get_product_by_id(
 @router.put("/{id}", response_model=Product, status_code=status.HTTP_200_OK)
 async def update_product(
     new_product_info: ProductUpdate,
-    product: ProductModel = Depends(get_product_by_id),
+    product: ProductModel = Depends(product_by_id),
     session: AsyncSession = Depends(e_store_db.session_dependency),
 ):
     """
@@ -73,7 +343,7 @@ async def update_product(
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
-    product: ProductModel = Depends(get_product_by_id),
+    product: ProductModel = Depends(product_by_id),
     session: AsyncSession = Depends(e_store_db.session_dependency),
 ):
     """
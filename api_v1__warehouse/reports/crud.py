@@ -0,0 +1,171 @@
+"""
+Модуль для чтения отчётов по выручке из дневных итогов.
+Запросы читают только строки итогов за период, поэтому их время
+не зависит от количества заказов в БД
+"""
+
+from datetime import date, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings_reports
+from models import (
+    OrderStatus,
+    ProductModel,
+    ReportDailyProductModel,
+    ReportDailyStatusModel,
+    ReportWatermarkModel,
+)
+from .rollups import REPORTS_WATERMARK
+from .schemas import DailyRevenue, ProductRevenue, Report, StatusRevenue
+
+
+MAX_REPORT_DAYS = 366
+
+
+async def _report(
+    session: AsyncSession,
+    date_from: date | None,
+    date_to: date | None,
+) -> Report:
+    """
+    Пустой отчёт с проверенным периодом и отметкой пересчёта
+    :param session: объект сессии
+    :param date_from: первый день периода (по умолчанию `REPORTS_DEFAULT_DAYS` дней до `date_to`)
+    :param date_to: последний день периода (по умолчанию текущий)
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(
+        days=settings_reports.reports_default_days - 1
+    )
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must not be later than date_to!",
+        )
+    if (date_to - date_from).days >= MAX_REPORT_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Report period must not exceed {MAX_REPORT_DAYS} days!",
+        )
+
+    refreshed_to = await session.scalar(
+        select(ReportWatermarkModel.watermark).filter(
+            ReportWatermarkModel.name == REPORTS_WATERMARK
+        )
+    )
+    return Report(
+        date_from=date_from, date_to=date_to, refreshed_to=refreshed_to, items=[]
+    )
+
+
+async def read_daily_revenue(
+    session: AsyncSession,
+    date_from: date | None,
+    date_to: date | None,
+    order_status: OrderStatus | None,
+) -> Report[DailyRevenue]:
+    """
+    Получение заказов, проданных единиц и выручки по дням
+    :param session: объект сессии
+    :param date_from: первый день периода
+    :param date_to: последний день периода
+    :param order_status: учитывать только заказы с этим статусом
+    """
+    report = await _report(session, date_from, date_to)
+    query = (
+        select(
+            ReportDailyStatusModel.day,
+            func.sum(ReportDailyStatusModel.orders).label("orders"),
+            func.sum(ReportDailyStatusModel.units).label("units"),
+            func.sum(ReportDailyStatusModel.revenue).label("revenue"),
+        )
+        .filter(ReportDailyStatusModel.day.between(report.date_from, report.date_to))
+        .group_by(ReportDailyStatusModel.day)
+        .order_by(ReportDailyStatusModel.day)
+    )
+    if order_status is not None:
+        query = query.filter(ReportDailyStatusModel.status == order_status)
+
+    report.items = [
+        DailyRevenue.model_validate(row) for row in await session.execute(query)
+    ]
+    return report
+
+
+async def read_status_revenue(
+    session: AsyncSession,
+    date_from: date | None,
+    date_to: date | None,
+) -> Report[StatusRevenue]:
+    """
+    Получение заказов, проданных единиц и выручки за период по статусу заказа
+    :param session: объект сессии
+    :param date_from: первый день периода
+    :param date_to: последний день периода
+    """
+    report = await _report(session, date_from, date_to)
+    query = (
+        select(
+            ReportDailyStatusModel.status,
+            func.sum(ReportDailyStatusModel.orders).label("orders"),
+            func.sum(ReportDailyStatusModel.units).label("units"),
+            func.sum(ReportDailyStatusModel.revenue).label("revenue"),
+        )
+        .filter(ReportDailyStatusModel.day.between(report.date_from, report.date_to))
+        .group_by(ReportDailyStatusModel.status)
+        .order_by(ReportDailyStatusModel.status)
+    )
+
+    report.items = [
+        StatusRevenue.model_validate(row) for row in await session.execute(query)
+    ]
+    return report
+
+
+async def read_products_revenue(
+    session: AsyncSession,
+    date_from: date | None,
+    date_to: date | None,
+    limit: int,
+) -> Report[ProductRevenue]:
+    """
+    Получение товаров с наибольшей выручкой за период
+    :param session: объект сессии
+    :param date_from: первый день периода
+    :param date_to: последний день периода
+    :param limit: количество товаров
+    """
+    report = await _report(session, date_from, date_to)
+    totals = (
+        select(
+            ReportDailyProductModel.product_id,
+            func.sum(ReportDailyProductModel.units).label("units"),
+            func.sum(ReportDailyProductModel.revenue).label("revenue"),
+        )
+        .filter(ReportDailyProductModel.day.between(report.date_from, report.date_to))
+        .group_by(ReportDailyProductModel.product_id)
+        .order_by(
+            func.sum(ReportDailyProductModel.revenue).desc(),
+            ReportDailyProductModel.product_id,
+        )
+        .limit(limit)
+        .subquery("totals")
+    )
+    query = (
+        select(
+            totals.c.product_id,
+            ProductModel.title,
+            totals.c.units,
+            totals.c.revenue,
+        )
+        .join(ProductModel, ProductModel.id == totals.c.product_id)
+        .order_by(totals.c.revenue.desc(), totals.c.product_id)
+    )
+
+    report.items = [
+        ProductRevenue.model_validate(row) for row in await session.execute(query)
+    ]
+    return report
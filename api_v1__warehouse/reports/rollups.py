@@ -0,0 +1,216 @@
+"""
+Модуль для пересчёта дневных итогов заказов (отчёты по выручке).
+
+Итоги хранятся по дню создания заказа: по статусу заказа
+(`report_daily_status`) и по товару (`report_daily_product`).
+Фоновая задача периодически находит дни заказов, изменённых после
+отметки `report_watermarks`, и пересчитывает строки только этих дней
+по цене товара на момент заказа (`order_product_relation.unit_price`).
+Время изменения заказа - время начала его транзакции (`now()`), поэтому
+новая отметка не позже начала самой старой открытой транзакции в БД:
+заказы, которые она ещё зафиксирует, попадут в следующий пересчёт.
+Кроме того, отметка отстаёт от текущего времени на `REPORTS_REFRESH_LAG`
+секунд.
+
+Полный пересчёт (например, для существующей БД):
+python -m api_v1__warehouse.reports.rollups --full
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    cast,
+    delete,
+    distinct,
+    func,
+    literal,
+    select,
+    text,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings_reports
+from models import (
+    DBConnect,
+    OrderItemModel,
+    OrderModel,
+    ReportDailyProductModel,
+    ReportDailyStatusModel,
+    ReportWatermarkModel,
+    e_store_db,
+)
+
+
+logger = logging.getLogger(__name__)
+
+REPORTS_WATERMARK = "orders"
+# Ключ блокировки, чтобы процессы не пересчитывали одни и те же дни одновременно
+REPORTS_LOCK_KEY = 0x7265706F7274
+# Новая отметка: не позже начала самой старой открытой транзакции в БД,
+# кроме текущей (время транзакций других процессов видно при той же роли
+# или `pg_read_all_stats`; `least` пропускает NULL, если их нет)
+WATERMARK_UPPER_QUERY = text(
+    "SELECT least(now() - make_interval(secs => :lag), "
+    "(SELECT min(xact_start) FROM pg_stat_activity "
+    "WHERE datname = current_database() AND pid <> pg_backend_pid()))"
+)
+
+
+def _line_revenue():
+    return cast(OrderItemModel.product_count, BigInteger) * OrderItemModel.unit_price
+
+
+async def rebuild_day(session: AsyncSession, day: date) -> None:
+    """
+    Пересчёт итогов одного дня: строки дня удаляются и вставляются заново
+    по заказам и позициям, созданным в этот день
+    :param session: объект сессии
+    :param day: день создания заказов
+    """
+    start = datetime.combine(day, time.min)
+    end = start + timedelta(days=1)
+    lines_in_day = (
+        OrderItemModel.order_created_at >= start,
+        OrderItemModel.order_created_at < end,
+    )
+
+    await session.execute(
+        delete(ReportDailyStatusModel).filter(ReportDailyStatusModel.day == day)
+    )
+    await session.execute(
+        delete(ReportDailyProductModel).filter(ReportDailyProductModel.day == day)
+    )
+
+    lines = (
+        select(
+            OrderItemModel.order_id,
+            func.sum(OrderItemModel.product_count).label("units"),
+            func.sum(_line_revenue()).label("revenue"),
+        )
+        .filter(*lines_in_day)
+        .group_by(OrderItemModel.order_id)
+        .subquery("lines")
+    )
+    await session.execute(
+        insert(ReportDailyStatusModel).from_select(
+            ["day", "status", "orders", "units", "revenue"],
+            select(
+                literal(day, Date),
+                OrderModel.status,
+                func.count(),
+                func.coalesce(func.sum(lines.c.units), 0),
+                func.coalesce(func.sum(lines.c.revenue), 0),
+            )
+            .outerjoin(lines, lines.c.order_id == OrderModel.id)
+            .filter(OrderModel.created_at >= start, OrderModel.created_at < end)
+            .group_by(OrderModel.status),
+        )
+    )
+    await session.execute(
+        insert(ReportDailyProductModel).from_select(
+            ["day", "product_id", "units", "revenue"],
+            select(
+                literal(day, Date),
+                OrderItemModel.product_id,
+                func.sum(OrderItemModel.product_count),
+                func.sum(_line_revenue()),
+            )
+            .filter(*lines_in_day)
+            .group_by(OrderItemModel.product_id),
+        )
+    )
+
+
+async def refresh_reports(
+    db: DBConnect,
+    lag: float = settings_reports.reports_refresh_lag,
+    full: bool = False,
+) -> int:
+    """
+    Пересчёт дней, в которые созданы заказы, изменённые после отметки;
+    возвращает количество пересчитанных дней. Если пересчёт уже выполняет
+    другой процесс, ничего не делает
+    :param db: подключение к основной БД
+    :param lag: отставание новой отметки от текущего времени в секундах
+        (отметка также не позже начала самой старой открытой транзакции)
+    :param full: пересчитать все дни независимо от отметки
+    """
+    async with db.async_session() as session:
+        locked = await session.scalar(
+            select(func.pg_try_advisory_xact_lock(REPORTS_LOCK_KEY))
+        )
+        if not locked:
+            return 0
+
+        upper = await session.scalar(WATERMARK_UPPER_QUERY, {"lag": lag})
+        watermark = await session.scalar(
+            select(ReportWatermarkModel.watermark).filter(
+                ReportWatermarkModel.name == REPORTS_WATERMARK
+            )
+        )
+        query_days = select(distinct(cast(OrderModel.created_at, Date))).filter(
+            OrderModel.updated_at < upper
+        )
+        if watermark is not None and not full:
+            query_days = query_days.filter(OrderModel.updated_at >= watermark)
+        days = sorted((await session.scalars(query_days)).all())
+
+        for day in days:
+            await rebuild_day(session, day)
+
+        query_watermark = insert(ReportWatermarkModel).values(
+            name=REPORTS_WATERMARK, watermark=upper
+        )
+        await session.execute(
+            query_watermark.on_conflict_do_update(
+                index_elements=[ReportWatermarkModel.name],
+                set_={"watermark": query_watermark.excluded.watermark},
+            )
+        )
+        await session.commit()
+    return len(days)
+
+
+async def run_reports_refresh(
+    db: DBConnect,
+    interval: float = settings_reports.reports_refresh_interval,
+    lag: float = settings_reports.reports_refresh_lag,
+) -> None:
+    """
+    Фоновый периодический пересчёт отчётов
+    :param db: подключение к основной БД
+    :param interval: период пересчёта в секундах
+    :param lag: отставание отметки от текущего времени в секундах
+    """
+    while True:
+        try:
+            days = await refresh_reports(db, lag=lag)
+            if days:
+                logger.info("Refreshed reports for %s days", days)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Reports refresh failed")
+        await asyncio.sleep(interval)
+
+
+async def main(full: bool) -> None:
+    try:
+        days = await refresh_reports(e_store_db, full=full)
+    finally:
+        await e_store_db.dispose()
+    print(f"Refreshed reports for {days} days")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--full", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(full=args.full))
@@ -0,0 +1,50 @@
+"""Модуль для описания схем отчётов по выручке"""
+
+from datetime import date, datetime
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel, ConfigDict
+
+from models.order import OrderStatus
+
+
+ItemT = TypeVar("ItemT")
+
+
+class DailyRevenue(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    day: date
+    orders: int
+    units: int
+    revenue: int
+
+
+class StatusRevenue(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    status: OrderStatus
+    orders: int
+    units: int
+    revenue: int
+
+
+class ProductRevenue(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    product_id: int
+    title: str
+    units: int
+    revenue: int
+
+
+class Report(BaseModel, Generic[ItemT]):
+    """
+    Строки отчёта за период и время изменения заказов,
+    до которого учтены изменения (`None` - отчёты ещё не пересчитывались)
+    """
+
+    date_from: date
+    date_to: date
+    refreshed_to: datetime | None
+    items: list[ItemT]
@@ -0,0 +1,94 @@
+"""Модуль для описания endpoint`ов отчётов по выручке"""
+
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import OrderStatus
+from models.base import e_store_db
+from ..pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from ..responses import FastJSONRoute
+from . import crud
+from .schemas import DailyRevenue, ProductRevenue, Report, StatusRevenue
+
+
+router = APIRouter(prefix="/api/reports", tags=["Reports"], route_class=FastJSONRoute)
+
+
+@router.get(
+    "/revenue/daily",
+    response_model=Report[DailyRevenue],
+    status_code=status.HTTP_200_OK,
+)
+async def get_daily_revenue(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    order_status: OrderStatus | None = None,
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
+):
+    """
+    Endpoint для получения заказов, проданных единиц и выручки по дням
+    создания заказов (по ценам на момент заказа)
+    * :param date_from: первый день периода (по умолчанию `REPORTS_DEFAULT_DAYS` дней до `date_to`)
+    * :param date_to: последний день периода (по умолчанию текущий)
+    * :param order_status: учитывать только заказы с этим статусом
+    * :param session: объект сессии
+    """
+    return await crud.read_daily_revenue(
+        session=session,
+        date_from=date_from,
+        date_to=date_to,
+        order_status=order_status,
+    )
+
+
+@router.get(
+    "/revenue/statuses",
+    response_model=Report[StatusRevenue],
+    status_code=status.HTTP_200_OK,
+)
+async def get_status_revenue(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
+):
+    """
+    Endpoint для получения заказов, проданных единиц и выручки за период
+    по текущему статусу заказа
+    * :param date_from: первый день периода (по умолчанию `REPORTS_DEFAULT_DAYS` дней до `date_to`)
+    * :param date_to: последний день периода (по умолчанию текущий)
+    * :param session: объект сессии
+    """
+    return await crud.read_status_revenue(
+        session=session,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@router.get(
+    "/revenue/products",
+    response_model=Report[ProductRevenue],
+    status_code=status.HTTP_200_OK,
+)
+async def get_products_revenue(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_LIMIT)] = DEFAULT_PAGE_LIMIT,
+    session: AsyncSession = Depends(e_store_db.read_session_dependency),
+):
+    """
+    Endpoint для получения товаров с наибольшей выручкой за период
+    * :param date_from: первый день периода (по умолчанию `REPORTS_DEFAULT_DAYS` дней до `date_to`)
+    * :param date_to: последний день периода (по умолчанию текущий)
+    * :param limit: количество товаров
+    * :param session: объект сессии
+    """
+    return await crud.read_products_revenue(
+        session=session,
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit,
+    )
@@ -0,0 +1,169 @@
+"""Модуль для быстрой сериализации ответов в JSON средствами pydantic-core"""
+
+import gc
+import inspect
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Iterator
+
+from fastapi import Response
+from fastapi.dependencies.utils import get_typed_signature
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from fastapi.utils import is_body_allowed_for_status_code
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import to_json
+
+
+FAST_JSON_ATTRIBUTE = "__fast_json__"
+_WRAPPED_ATTRIBUTE = "__fast_json_wrapper__"
+
+# Имя параметра, через который FastAPI передаёт обёртке служебный объект ответа
+# (в нём заголовки и статус, выставленные endpoint`ом и зависимостями)
+_SUB_RESPONSE_PARAM = "fast_json_sub_response"
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """
+    Приостановка сборщика мусора на время синхронной сериализации.
+    При разборе больших списков ORM-объектов создаются десятки тысяч
+    моделей, и сборщик многократно обходит все объекты процесса
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Ответ в JSON, который кодируется pydantic-core (без `json.dumps`).
+    Результат совпадает с `JSONResponse`: без пробелов и без экранирования Unicode
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def standard_serialization(endpoint: Callable) -> Callable:
+    """
+    Отключение быстрой сериализации для отдельного endpoint`а:
+    ответ проходит штатные валидацию и кодирование FastAPI.
+    Декоратор ставится под декоратором роутера
+    :param endpoint: функция endpoint`а
+    """
+    setattr(endpoint, FAST_JSON_ATTRIBUTE, False)
+    return endpoint
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Маршрут, который валидирует результат endpoint`а по `response_model`
+    и кодирует его в JSON за один проход `TypeAdapter` (`from_attributes`),
+    вместо валидации, преобразования в словарь и `json.dumps` в FastAPI.
+    Схема OpenAPI и поведение ответа не меняются.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        super().__init__(path, endpoint, **kwargs)
+
+        if (
+            self.response_model is None
+            or not getattr(endpoint, FAST_JSON_ATTRIBUTE, True)
+            or getattr(endpoint, _WRAPPED_ATTRIBUTE, False)
+            or not inspect.iscoroutinefunction(endpoint)
+        ):
+            return
+
+        # Маршрут собирается заново с обёрткой, чтобы FastAPI разобрал
+        # её сигнатуру (параметры endpoint`а и служебный объект ответа).
+        # При подключении роутера к приложению маршрут создаётся из обёртки
+        # повторно, поэтому обёртка помечается и второй раз не оборачивается
+        super().__init__(
+            path,
+            self._fast_json_endpoint(endpoint),
+            **{**kwargs, "response_model": self.response_model},
+        )
+
+    def _fast_json_endpoint(self, endpoint: Callable) -> Callable:
+        """
+        Обёртка над endpoint`ом, возвращающая готовый ответ в JSON
+        :param endpoint: функция endpoint`а
+        """
+        adapter = TypeAdapter(self.response_model)
+        dump_options = {
+            "include": self.response_model_include,
+            "exclude": self.response_model_exclude,
+            "by_alias": self.response_model_by_alias,
+            "exclude_unset": self.response_model_exclude_unset,
+            "exclude_defaults": self.response_model_exclude_defaults,
+            "exclude_none": self.response_model_exclude_none,
+        }
+        default_status_code = self.status_code
+
+        # Если endpoint сам принимает объект ответа, обёртка берёт его оттуда
+        signature = get_typed_signature(endpoint)
+        response_param = next(
+            (
+                param.name
+                for param in signature.parameters.values()
+                if inspect.isclass(param.annotation)
+                and issubclass(param.annotation, Response)
+            ),
+            None,
+        )
+
+        @wraps(endpoint)
+        async def wrapper(**kwargs: Any) -> Any:
+            if response_param is None:
+                sub_response: Response = kwargs.pop(_SUB_RESPONSE_PARAM)
+            else:
+                sub_response = kwargs[response_param]
+            result = await endpoint(**kwargs)
+
+            if isinstance(result, Response):
+                return result
+
+            status_code = sub_response.status_code or default_status_code or 200
+            with _gc_paused():
+                try:
+                    value = adapter.validate_python(result, from_attributes=True)
+                except ValidationError as exc:
+                    raise ResponseValidationError(
+                        errors=exc.errors(include_url=False), body=result
+                    )
+                content = (
+                    adapter.dump_json(value, **dump_options)
+                    if is_body_allowed_for_status_code(status_code)
+                    else b""
+                )
+
+            response = Response(
+                content=content,
+                status_code=status_code,
+                media_type=FastJSONResponse.media_type,
+            )
+            response.headers.raw.extend(sub_response.headers.raw)
+            return response
+
+        setattr(wrapper, _WRAPPED_ATTRIBUTE, True)
+        if response_param is None:
+            signature = signature.replace(
+                parameters=[
+                    *signature.parameters.values(),
+                    inspect.Parameter(
+                        _SUB_RESPONSE_PARAM,
+                        inspect.Parameter.KEYWORD_ONLY,
+                        annotation=Response,
+                    ),
+                ]
+            )
+        wrapper.__signature__ = signature.replace(
+            return_annotation=inspect.Signature.empty
+        )
+        return wrapper
@@ -0,0 +1,4 @@
+"""
+Пакет с бенчмарками API. Все сценарии работают с тестовой БД
+(`DB_*_TEST` из файла ".env") и удаляют созданные таблицы по завершении.
+"""
@@ -0,0 +1,183 @@
+"""Модуль с общими функциями бенчмарков: подготовка БД и замеры времени"""
+
+import re
+import statistics
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from config import TEST_DB_PATH
+from models import Base, DBConnect, e_store_db
+from monitoring import instrument_db
+from api_v1__warehouse.products.catalog import install_catalog_triggers
+
+
+bench_db = DBConnect(url=TEST_DB_PATH, pool_size=20, max_overflow=0)
+
+
+@asynccontextmanager
+async def bench_schema(db: DBConnect = bench_db) -> AsyncIterator[DBConnect]:
+    """
+    Создание таблиц в БД на время бенчмарка
+    :param db: подключение к БД бенчмарка
+    """
+    async with db.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await install_catalog_triggers(conn)
+    try:
+        yield db
+    finally:
+        async with db.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await db.dispose()
+
+
+async def seed_products(db: DBConnect, products: int, quantity: int = 10**6) -> None:
+    """
+    Наполнение каталога товарами средствами SQL
+    :param db: подключение к БД бенчмарка
+    :param products: количество товаров
+    :param quantity: остаток каждого товара на складе
+    """
+    async with db.engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO products (title, description, price, quantity) "
+                "SELECT 'bench-' || g, 'Benchmark product ' || g, 1 + g % 1000, :quantity "
+                "FROM generate_series(1, :products) AS g"
+            ),
+            {"products": products, "quantity": quantity},
+        )
+
+
+async def seed_orders(db: DBConnect, orders: int, lines: int) -> None:
+    """
+    Наполнение БД заказами (по минуте между заказами) с `lines` позициями
+    :param db: подключение к БД бенчмарка
+    :param orders: количество заказов
+    :param lines: количество позиций в каждом заказе (не больше числа товаров)
+    """
+    async with db.engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO orders (created_at, status) "
+                "SELECT now() - g * interval '1 minute', 'in_process' "
+                "FROM generate_series(1, :orders) AS g"
+            ),
+            {"orders": orders},
+        )
+        await conn.execute(
+            text(
+                "WITH bounds AS (SELECT min(id) AS first, count(*) AS total FROM products) "
+                "INSERT INTO order_product_relation "
+                "(order_id, order_created_at, product_id, product_count, unit_price) "
+                "SELECT o.id, o.created_at, p.id, 1, p.price "
+                "FROM orders AS o CROSS JOIN bounds "
+                "CROSS JOIN generate_series(0, :lines - 1) AS k "
+                "JOIN products AS p ON p.id = bounds.first + (o.id * 7 + k) % bounds.total"
+            ),
+            {"lines": lines},
+        )
+
+
+def summarize(durations: list[float]) -> dict[str, float]:
+    """
+    Перцентили длительностей в миллисекундах
+    :param durations: длительности в секундах
+    """
+    ordered = sorted(durations)
+    quantiles = (
+        statistics.quantiles(ordered, n=100) if len(ordered) > 1 else ordered * 99
+    )
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+class Stopwatch:
+    """Секундомер для замера длительностей повторяющихся операций"""
+
+    def __init__(self):
+        self.durations: list[float] = []
+
+    @contextmanager
+    def measure(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations.append(time.perf_counter() - started)
+
+
+@asynccontextmanager
+async def bench_client(db: DBConnect = bench_db) -> AsyncIterator[AsyncClient]:
+    """
+    Клиент приложения `main:app` без сети (`ASGITransport`),
+    все сессии которого работают с БД бенчмарка
+    :param db: подключение к БД бенчмарка
+    """
+    from main import app
+
+    instrument_db(db)
+    overrides = {
+        e_store_db.session_dependency: db.session_dependency,
+        e_store_db.read_session_dependency: db.read_session_dependency,
+        e_store_db.db_dependency: db.db_dependency,
+    }
+    app.dependency_overrides.update(overrides)
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            yield client
+    finally:
+        for dependency in overrides:
+            app.dependency_overrides.pop(dependency, None)
+
+
+_SERVER_TIMING_METRIC = re.compile(
+    r'(?P<name>[\w-]+)(?:;dur=(?P<dur>[\d.]+))?(?:;desc="(?P<desc>[^"]*)")?'
+)
+
+
+def parse_server_timing(header: str | None) -> dict[str, float]:
+    """
+    Длительности (в миллисекундах) и число SQL-запросов из заголовка `Server-Timing`
+    (`{"db": 1.2, "db_queries": 3, "pool": 0.0, "app": 4.5}`)
+    :param header: значение заголовка (`None`, если его нет)
+    """
+    timings: dict[str, float] = {}
+    for part in (header or "").split(","):
+        match = _SERVER_TIMING_METRIC.fullmatch(part.strip())
+        if match is None:
+            continue
+        if match["dur"] is not None:
+            timings[match["name"]] = float(match["dur"])
+        if match["name"] == "db" and match["desc"]:
+            timings["db_queries"] = float(match["desc"].split()[0])
+    return timings
+
+
+def timing_means(timings: list[dict[str, float]]) -> dict[str, float]:
+    """
+    Средние значения `Server-Timing` по ответам: SQL-запросы, время SQL и ожидание пула
+    :param timings: разобранные заголовки ответов
+    """
+    means = {}
+    for name, key in (
+        ("db_queries", "db_queries_mean"),
+        ("db", "db_ms_mean"),
+        ("pool", "pool_ms_mean"),
+    ):
+        values = [timing[name] for timing in timings if name in timing]
+        if values:
+            means[key] = sum(values) / len(values)
+    return means
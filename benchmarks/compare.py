@@ -0,0 +1,75 @@
+"""
+Сравнение двух отчётов `benchmarks.run`.
+
+Регрессией считается рост p50/p95/p99 или падение пропускной способности
+сценария больше чем на `--threshold` (доля). При регрессии код выхода 1,
+поэтому сравнение можно запускать в CI.
+
+Запуск: python -m benchmarks.compare base.json candidate.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+# Метрика отчёта и направление: 1 - чем больше, тем хуже; -1 - наоборот
+METRICS = {"p50_ms": 1, "p95_ms": 1, "p99_ms": 1, "throughput_rps": -1}
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> dict:
+    """
+    Относительные изменения метрик по сценариям, общих для обоих отчётов
+    :param baseline: отчёт базового прогона
+    :param candidate: отчёт проверяемого прогона
+    :param threshold: допустимое ухудшение (доля)
+    """
+    workloads = {}
+    for name, base in baseline["workloads"].items():
+        current = candidate["workloads"].get(name)
+        if current is None:
+            continue
+
+        metrics = {}
+        for metric, direction in METRICS.items():
+            change = (
+                (current[metric] - base[metric]) / base[metric] if base[metric] else 0.0
+            )
+            metrics[metric] = {
+                "baseline": base[metric],
+                "candidate": current[metric],
+                "change": change,
+                "regression": change * direction > threshold,
+            }
+        workloads[name] = {
+            "metrics": metrics,
+            "regression": any(metric["regression"] for metric in metrics.values()),
+        }
+
+    return {
+        "threshold": threshold,
+        "config_changed": baseline.get("config") != candidate.get("config"),
+        "workloads": workloads,
+        "regression": any(workload["regression"] for workload in workloads.values()),
+    }
+
+
+def main(baseline: Path, candidate: Path, threshold: float) -> dict:
+    return compare(
+        json.loads(baseline.read_text()),
+        json.loads(candidate.read_text()),
+        threshold,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    result = main(**vars(args))
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["regression"] else 0)
@@ -0,0 +1,70 @@
+"""
+Бенчмарк сборки ответа со списком заказов.
+
+Сравнивает прежний путь (ORM-объекты и валидация схемой `Page[Order]`)
+с документом, который собирается средствами БД (`read_orders_json`).
+
+Запуск: python -m benchmarks.order_json --orders 2000 --lines 20
+"""
+
+import argparse
+import asyncio
+import json
+
+from api_v1__warehouse.orders import crud
+from api_v1__warehouse.orders.schemas import Order
+from api_v1__warehouse.pagination import Page
+from .common import Stopwatch, bench_schema, seed_orders, seed_products, summarize
+
+
+async def orm_page(session, page: int) -> bytes:
+    orders_list, next_cursor = await crud.read_orders(session=session, limit=page)
+    document = Page[Order].model_validate(
+        {"items": orders_list, "next_cursor": next_cursor}, from_attributes=True
+    )
+    return json.dumps(
+        document.model_dump(mode="json"), ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+async def sql_page(session, page: int) -> bytes:
+    return await crud.read_orders_json(session=session, limit=page)
+
+
+STRATEGIES = {"orm_pydantic": orm_page, "sql_json": sql_page}
+
+
+async def main(orders: int, lines: int, page: int, repeat: int) -> dict:
+    async with bench_schema() as db:
+        await seed_products(db, products=max(lines * 10, 1000))
+        await seed_orders(db, orders=orders, lines=lines)
+
+        report = {"orders": orders, "lines": lines, "page": page, "strategies": {}}
+        responses = {}
+        for name, build_page in STRATEGIES.items():
+            stopwatch = Stopwatch()
+
+            for _ in range(repeat):
+                async with db.async_session() as session:
+                    with stopwatch.measure():
+                        responses[name] = await build_page(session, page)
+
+            report["strategies"][name] = {
+                "bytes": len(responses[name]),
+                **summarize(stopwatch.durations),
+            }
+
+        report["identical"] = len(set(responses.values())) == 1
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(main(**vars(args))), indent=2))
@@ -0,0 +1,70 @@
+"""
+Бенчмарк стратегий загрузки заказов с позициями и товарами.
+
+Сравнивает прежнюю загрузку (два `selectinload` по одной и той же таблице связи)
+с `ORDER_DETAILS_LOADER` по количеству SQL-запросов и задержке чтения страницы.
+
+Запуск: python -m benchmarks.order_loading --orders 2000 --lines 20
+"""
+
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import desc, select
+from sqlalchemy.orm import selectinload
+
+from api_v1__warehouse.orders.crud import ORDER_DETAILS_LOADER
+from api_v1__warehouse.orders.schemas import Order
+from models import OrderModel
+from monitoring import count_queries
+from .common import Stopwatch, bench_schema, seed_orders, seed_products, summarize
+
+
+STRATEGIES = {
+    "double_selectinload": (
+        selectinload(OrderModel.products_details),
+        selectinload(OrderModel.products),
+    ),
+    "selectinload_joinedload": (ORDER_DETAILS_LOADER,),
+}
+
+
+async def main(orders: int, lines: int, page: int, repeat: int) -> dict:
+    async with bench_schema() as db:
+        await seed_products(db, products=max(lines * 10, 1000))
+        await seed_orders(db, orders=orders, lines=lines)
+
+        report = {"orders": orders, "lines": lines, "page": page, "strategies": {}}
+        for name, options in STRATEGIES.items():
+            query = (
+                select(OrderModel)
+                .options(*options)
+                .order_by(desc(OrderModel.created_at), desc(OrderModel.id))
+                .limit(page)
+            )
+            stopwatch = Stopwatch()
+
+            for _ in range(repeat):
+                async with db.async_session() as session:
+                    with count_queries(db) as statements, stopwatch.measure():
+                        result = (await session.scalars(query)).all()
+                        [Order.model_validate(order) for order in result]
+
+            report["strategies"][name] = {
+                "queries": len(statements),
+                **summarize(stopwatch.durations),
+            }
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(main(**vars(args))), indent=2))
@@ -0,0 +1,165 @@
+"""
+Бенчмарк чтения недавних заказов без секционирования и с помесячными секциями.
+
+Для каждой схемы таблиц (`plain`, `partitioned`) запускается отдельный процесс
+(схема задаётся настройкой `DB_ORDERS_PARTITIONING` при импорте моделей),
+который наполняет тестовую БД заказами (по минуте между заказами,
+10 млн заказов - около 19 лет истории), и замеряет:
+- первую страницу списка заказов;
+- следующие страницы по курсору;
+- страницу заказов за последние сутки (`created_from`);
+- заказ по `id` среди недавних.
+
+Запуск: python -m benchmarks.order_partitions --orders 10000000 --lines 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, select, text
+
+from api_v1__warehouse.orders import crud
+from api_v1__warehouse.orders.partitions import ensure_partitions, list_partitions
+from models import OrderModel
+from models.partitioning import ORDERS_PARTITIONED, months_between, upcoming_months
+from .common import Stopwatch, bench_schema, seed_orders, seed_products, summarize
+
+
+ROOT = Path(__file__).resolve().parent.parent
+LAYOUTS = {"plain": "false", "partitioned": "true"}
+
+
+async def measure(
+    orders: int,
+    lines: int,
+    page: int,
+    pages: int,
+    repeat: int,
+    seed: int,
+) -> dict:
+    """Наполнение БД и замеры в текущей схеме таблиц"""
+    async with bench_schema() as db:
+        if ORDERS_PARTITIONED:
+            oldest = date.today() - timedelta(minutes=orders)
+            months = months_between(oldest, date.today()) + upcoming_months()
+            await ensure_partitions(db, months)
+        await seed_products(db, products=max(lines * 10, 1000))
+        await seed_orders(db, orders=orders, lines=lines)
+        async with db.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM ANALYZE orders, order_product_relation"))
+
+        async with db.async_session() as session:
+            last_id = await session.scalar(select(func.max(OrderModel.id)))
+        rng = random.Random(seed)
+        stopwatches = {
+            name: Stopwatch()
+            for name in ("first_page", "next_pages", "last_day", "order_by_id")
+        }
+
+        for _ in range(repeat):
+            async with db.async_session() as session:
+                with stopwatches["first_page"].measure():
+                    _, cursor = await crud.read_orders(session, limit=page)
+
+                for _ in range(pages):
+                    with stopwatches["next_pages"].measure():
+                        _, cursor = await crud.read_orders(
+                            session, limit=page, cursor=cursor
+                        )
+
+                with stopwatches["last_day"].measure():
+                    await crud.read_orders(
+                        session,
+                        limit=page,
+                        created_from=datetime.now() - timedelta(days=1),
+                    )
+
+                order_id = rng.randint(max(last_id - 10_000, 1), last_id)
+                with stopwatches["order_by_id"].measure():
+                    await crud.read_order(session, order_id=order_id)
+
+        return {
+            "partitions": len(await list_partitions(db)),
+            **{
+                name: summarize(stopwatch.durations)
+                for name, stopwatch in stopwatches.items()
+            },
+        }
+
+
+def run_layout(layout: str, arguments: list[str]) -> dict:
+    """
+    Замеры в отдельном процессе с заданной схемой таблиц
+    :param layout: `plain` или `partitioned`
+    :param arguments: параметры бенчмарка
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.order_partitions", "--layout", layout]
+        + arguments,
+        cwd=ROOT,
+        env={**os.environ, "DB_ORDERS_PARTITIONING": LAYOUTS[layout]},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def main(args: argparse.Namespace) -> dict:
+    arguments = [
+        f"--orders={args.orders}",
+        f"--lines={args.lines}",
+        f"--page={args.page}",
+        f"--pages={args.pages}",
+        f"--repeat={args.repeat}",
+        f"--seed={args.seed}",
+    ]
+    report = {
+        "orders": args.orders,
+        "lines": args.lines,
+        "page": args.page,
+        "layouts": {layout: run_layout(layout, arguments) for layout in LAYOUTS},
+    }
+    plain, partitioned = report["layouts"]["plain"], report["layouts"]["partitioned"]
+    report["p50_ratio"] = {
+        name: partitioned[name]["p50_ms"] / plain[name]["p50_ms"]
+        for name in ("first_page", "next_pages", "last_day", "order_by_id")
+    }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--layout", choices=LAYOUTS, default=None)
+    parser.add_argument("--orders", type=int, default=10_000_000)
+    parser.add_argument("--lines", type=int, default=3)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.layout is None:
+        report = main(args)
+    else:
+        report = asyncio.run(
+            measure(
+                orders=args.orders,
+                lines=args.lines,
+                page=args.page,
+                pages=args.pages,
+                repeat=args.repeat,
+                seed=args.seed,
+            )
+        )
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,121 @@
+"""
+Бенчмарк поиска товаров по каталогу заданного размера.
+
+Наполняет тестовую БД товарами с названиями и описаниями из случайных слов
+словаря и замеряет:
+- подсказки по началу названия (`/api/products/suggest`) для префиксов
+  длиной от `--min-prefix` символов;
+- полнотекстовый поиск (`/api/products/search`) по одному слову
+  и по двум словам, первую страницу и страницу по курсору.
+
+Запуск: python -m benchmarks.product_search --products 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+
+from sqlalchemy import text
+
+from api_v1__warehouse.products import crud
+from .common import Stopwatch, bench_schema, summarize
+
+
+WORDS = (
+    "alpha amber anchor apple arrow atlas beacon berry blade bloom bolt breeze "
+    "cable canyon carbon cedar chalk cinder cobalt comet copper coral crystal "
+    "delta desert dune eagle echo ember falcon fern flint forest frost galaxy "
+    "garnet glacier granite harbor hazel horizon indigo iron ivory jade jasper "
+    "kettle lantern lemon lotus lunar maple marble meadow mint nebula nickel "
+    "oak ocean olive onyx orbit pearl pepper pine plasma prism quartz raven "
+    "river ruby saffron sage silver slate solar spruce stone summit thunder "
+    "timber topaz tulip velvet willow zephyr"
+).split()
+
+
+async def seed_catalog(db, products: int, seed: int) -> None:
+    """
+    Наполнение каталога товарами из трёх случайных слов с номером в названии
+    :param db: подключение к БД бенчмарка
+    :param products: количество товаров
+    :param seed: начальное значение генератора случайных чисел Postgres
+    """
+    async with db.engine.begin() as conn:
+        await conn.execute(text("SELECT setseed(:seed)"), {"seed": seed / 2**31})
+        await conn.execute(
+            text(
+                "INSERT INTO products (title, description, price, quantity) "
+                "SELECT "
+                "  (CAST(:words AS text[]))[1 + floor(random() * :total)::int] || ' ' || "
+                "  (CAST(:words AS text[]))[1 + floor(random() * :total)::int] || ' ' || g, "
+                "  (CAST(:words AS text[]))[1 + floor(random() * :total)::int] || ' ' || "
+                "  (CAST(:words AS text[]))[1 + floor(random() * :total)::int] || ' ' || "
+                "  (CAST(:words AS text[]))[1 + floor(random() * :total)::int], "
+                "  1 + g % 1000, g % 50 "
+                "FROM generate_series(1, :products) AS g"
+            ),
+            {"words": list(WORDS), "total": len(WORDS), "products": products},
+        )
+    async with db.engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE products"))
+
+
+async def main(
+    products: int,
+    repeat: int,
+    page: int,
+    min_prefix: int,
+    seed: int,
+) -> dict:
+    rng = random.Random(seed)
+    stopwatches = {
+        name: Stopwatch()
+        for name in ("suggest", "search_word", "search_words", "search_next_page")
+    }
+    async with bench_schema() as db:
+        await seed_catalog(db, products=products, seed=seed)
+
+        for _ in range(repeat):
+            word = rng.choice(WORDS)
+            prefix = word[: rng.randint(min_prefix, len(word))]
+            async with db.async_session() as session:
+                with stopwatches["suggest"].measure():
+                    await crud.suggest_products(session, q=prefix, limit=10)
+
+                with stopwatches["search_word"].measure():
+                    _, cursor = await crud.search_products(
+                        session, q=word, limit=page, min_quantity=1
+                    )
+                with stopwatches["search_next_page"].measure():
+                    await crud.search_products(
+                        session, q=word, limit=page, cursor=cursor, min_quantity=1
+                    )
+
+                words = f"{rng.choice(WORDS)} {rng.choice(WORDS)}"
+                with stopwatches["search_words"].measure():
+                    await crud.search_products(session, q=words, limit=page)
+
+    return {
+        "products": products,
+        "page": page,
+        **{
+            name: summarize(stopwatch.durations)
+            for name, stopwatch in stopwatches.items()
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--min-prefix", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(main(**vars(args))), indent=2))
@@ -0,0 +1,292 @@
+"""
+Воспроизведение записанного трафика (JSONL) против приложения.
+
+Каждая строка файла - один запрос:
+`{"method": "GET", "path": "/api/products/7", "params": {...}, "headers": {...},
+"json": {...}, "timestamp": 1700000000.25}`. Обязательны только `method`
+и `path` (в `path` может быть строка запроса); `timestamp` - секунды или
+время в ISO 8601. Строки без `method` и `path` пропускаются и учитываются
+в отчёте как `skipped`, строки без `timestamp` отправляются без ожидания.
+
+Запросы отправляются в приложение без сети (`ASGITransport`, тестовая БД
+наполняется заново) или в запущенный сервер (`--url`). Интервалы между
+запросами сохраняются с множителем `--time-scale` (0 - без пауз).
+В отчёте распределение задержек, число SQL-запросов (из `Server-Timing`)
+и ошибки клиента (исключения при отправке) по каждому маршруту.
+Параметры движка для сравнения настроек задаются через `--engine-option`,
+например `--engine-option pool_size=20`.
+
+Запуск: python -m benchmarks.replay traffic.jsonl --concurrency 32 --time-scale 0.5
+"""
+
+import argparse
+import asyncio
+import json
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from time import monotonic, perf_counter
+from typing import Any, AsyncIterator
+
+from httpx import AsyncClient
+from starlette.routing import Match
+
+from config import TEST_DB_PATH
+from models import DBConnect
+from .common import (
+    bench_client,
+    bench_schema,
+    parse_server_timing,
+    seed_orders,
+    seed_products,
+    summarize,
+    timing_means,
+)
+
+
+@dataclass
+class RecordedRequest:
+    method: str
+    path: str
+    params: dict[str, Any] | None = None
+    headers: dict[str, str] | None = None
+    json: Any = None
+    content: str | None = None
+    timestamp: float | None = None
+
+
+def _timestamp(value: Any) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+def load_traffic(path: Path) -> tuple[list[RecordedRequest], int]:
+    """
+    Чтение записанных запросов, упорядоченных по времени
+    :param path: файл JSONL
+    """
+    recorded = []
+    skipped = 0
+    with path.open() as lines:
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                recorded.append(
+                    RecordedRequest(
+                        method=entry["method"].upper(),
+                        path=entry["path"],
+                        params=entry.get("params"),
+                        headers=entry.get("headers"),
+                        json=entry.get("json"),
+                        content=entry.get("content"),
+                        timestamp=_timestamp(entry.get("timestamp")),
+                    )
+                )
+            except (ValueError, KeyError, TypeError, AttributeError):
+                skipped += 1
+
+    if all(request.timestamp is not None for request in recorded):
+        recorded.sort(key=lambda request: request.timestamp)
+    return recorded, skipped
+
+
+def route_template(routes: list, method: str, path: str) -> str:
+    """
+    Шаблон пути маршрута приложения (`/api/orders/{id}`) для группировки запросов
+    :param routes: маршруты приложения
+    :param method: метод запроса
+    :param path: путь запроса
+    """
+    scope = {"type": "http", "method": method, "path": path.split("?", 1)[0]}
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return scope["path"]
+
+
+@asynccontextmanager
+async def replay_client(
+    url: str | None,
+    engine_options: dict[str, Any],
+    products: int,
+    orders: int,
+    lines: int,
+) -> AsyncIterator[AsyncClient]:
+    """
+    Клиент запущенного сервера или приложения на наполненной тестовой БД
+    :param url: адрес сервера (`None` - приложение без сети)
+    :param engine_options: параметры `DBConnect` для приложения без сети
+    :param products: количество товаров в тестовой БД
+    :param orders: количество заказов в тестовой БД
+    :param lines: количество позиций в заказе
+    """
+    if url is not None:
+        async with AsyncClient(base_url=url, timeout=None) as client:
+            yield client
+        return
+
+    db = DBConnect(url=TEST_DB_PATH, **engine_options)
+    async with bench_schema(db):
+        await seed_products(db, products=products)
+        await seed_orders(db, orders=orders, lines=lines)
+        async with bench_client(db) as client:
+            yield client
+
+
+async def replay(
+    client: AsyncClient,
+    recorded: list[RecordedRequest],
+    concurrency: int,
+    time_scale: float,
+) -> dict:
+    """
+    Отправка записанных запросов с сохранением интервалов между ними
+    :param client: клиент приложения
+    :param recorded: записанные запросы
+    :param concurrency: максимальное число одновременных запросов
+    :param time_scale: множитель интервалов (0 - без пауз)
+    """
+    from main import app
+
+    semaphore = asyncio.Semaphore(concurrency)
+    durations: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, Counter[int]] = defaultdict(Counter)
+    timings: dict[str, list[dict[str, float]]] = defaultdict(list)
+    errors: dict[str, Counter[str]] = defaultdict(Counter)
+    lag: list[float] = []
+
+    async def send(request: RecordedRequest, endpoint: str) -> None:
+        try:
+            started = perf_counter()
+            try:
+                response = await client.request(
+                    request.method,
+                    request.path,
+                    params=request.params,
+                    headers=request.headers,
+                    json=request.json,
+                    content=request.content,
+                )
+            except Exception as exc:
+                # Ошибка одного запроса (в том числе исключение приложения,
+                # которое `ASGITransport` пробрасывает) не прерывает прогон
+                errors[endpoint][type(exc).__name__] += 1
+                return
+            durations[endpoint].append(perf_counter() - started)
+            statuses[endpoint][response.status_code] += 1
+            timings[endpoint].append(
+                parse_server_timing(response.headers.get("server-timing"))
+            )
+        finally:
+            semaphore.release()
+
+    # Отсчёт от первого запроса со временем: запросы без него не ждут
+    first_timestamp = next(
+        (request.timestamp for request in recorded if request.timestamp is not None),
+        None,
+    )
+    tasks = []
+    started = monotonic()
+    for request in recorded:
+        if time_scale and request.timestamp is not None:
+            due = (request.timestamp - first_timestamp) * time_scale
+            delay = due - (monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await semaphore.acquire()
+        if time_scale and request.timestamp is not None:
+            lag.append(max(monotonic() - started - due, 0.0))
+
+        route = route_template(app.routes, request.method, request.path)
+        endpoint = f"{request.method} {route}"
+        tasks.append(asyncio.create_task(send(request, endpoint)))
+    await asyncio.gather(*tasks)
+    elapsed = monotonic() - started
+
+    endpoints = {}
+    for endpoint in sorted(durations.keys() | errors.keys()):
+        endpoint_durations = durations[endpoint]
+        endpoints[endpoint] = {
+            **(summarize(endpoint_durations) if endpoint_durations else {"count": 0}),
+            "statuses": {
+                str(code): count for code, count in sorted(statuses[endpoint].items())
+            },
+            "errors": dict(errors[endpoint]),
+            **timing_means(timings[endpoint]),
+        }
+
+    return {
+        "requests": len(recorded),
+        "duration_s": elapsed,
+        "throughput_rps": len(recorded) / elapsed if elapsed else 0.0,
+        "dispatch_lag_ms_max": max(lag, default=0.0) * 1000,
+        "errors": sum(sum(counts.values()) for counts in errors.values()),
+        "endpoints": endpoints,
+    }
+
+
+def engine_option(value: str) -> tuple[str, Any]:
+    """Параметр `DBConnect` из строки `name=value` (значение разбирается как JSON)"""
+    name, _, raw = value.partition("=")
+    try:
+        return name, json.loads(raw)
+    except ValueError:
+        return name, raw
+
+
+async def main(
+    traffic: Path,
+    url: str | None,
+    concurrency: int,
+    time_scale: float,
+    engine_options: list[tuple[str, Any]],
+    products: int,
+    orders: int,
+    lines: int,
+) -> dict:
+    recorded, skipped = load_traffic(traffic)
+    options = dict(engine_options)
+
+    async with replay_client(url, options, products, orders, lines) as client:
+        report = await replay(client, recorded, concurrency, time_scale)
+
+    return {
+        "config": {
+            "traffic": str(traffic),
+            "target": url or "asgi",
+            "concurrency": concurrency,
+            "time_scale": time_scale,
+            "engine_options": options,
+        },
+        "skipped": skipped,
+        **report,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("traffic", type=Path)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--time-scale", type=float, default=0.0)
+    parser.add_argument(
+        "--engine-option",
+        dest="engine_options",
+        type=engine_option,
+        action="append",
+        default=[],
+    )
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--lines", type=int, default=3)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(main(**vars(args))), indent=2))
@@ -0,0 +1,85 @@
+"""
+Бенчмарк сериализации большого списка заказов в ответ.
+
+Один и тот же список ORM-объектов отдаётся через штатный маршрут FastAPI
+(валидация, `jsonable`-словарь, `json.dumps`) и через `FastJSONRoute`.
+
+Запуск: python -m benchmarks.response_serialization --orders 10000 --lines 5
+"""
+
+import argparse
+import asyncio
+import json
+
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from api_v1__warehouse.orders.crud import ORDER_DETAILS_LOADER
+from api_v1__warehouse.orders.schemas import Order
+from api_v1__warehouse.responses import FastJSONResponse, FastJSONRoute
+from models import OrderModel
+from .common import Stopwatch, bench_schema, seed_orders, seed_products, summarize
+
+
+def make_app(route_class: type[APIRoute], orders_list: list[OrderModel]) -> FastAPI:
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/orders", response_model=list[Order])
+    async def get_orders():
+        return orders_list
+
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(router)
+    return app
+
+
+STRATEGIES = {"standard": APIRoute, "fast_json": FastJSONRoute}
+
+
+async def main(orders: int, lines: int, repeat: int) -> dict:
+    async with bench_schema() as db:
+        await seed_products(db, products=max(lines * 10, 1000))
+        await seed_orders(db, orders=orders, lines=lines)
+
+        async with db.async_session() as session:
+            orders_list = list(
+                (
+                    await session.scalars(
+                        select(OrderModel).options(ORDER_DETAILS_LOADER)
+                    )
+                ).all()
+            )
+
+    report = {"orders": orders, "lines": lines, "strategies": {}}
+    bodies = {}
+    for name, route_class in STRATEGIES.items():
+        app = make_app(route_class, orders_list)
+        stopwatch = Stopwatch()
+
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            for _ in range(repeat):
+                with stopwatch.measure():
+                    response = await client.get("/orders")
+                bodies[name] = response.content
+
+        report["strategies"][name] = {
+            "bytes": len(bodies[name]),
+            **summarize(stopwatch.durations),
+        }
+
+    report["identical"] = len(set(bodies.values())) == 1
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(main(**vars(args))), indent=2))
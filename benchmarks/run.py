@@ -0,0 +1,106 @@
+"""
+Нагрузочный прогон API без сети (`ASGITransport`) на тестовой БД.
+
+Наполняет БД каталогом и заказами заданного объёма, выполняет сценарии
+из `benchmarks.workloads` и печатает перцентили задержки и пропускную
+способность каждого сценария в JSON. Отчёт можно сохранить в файл
+и сравнить с другим прогоном (`python -m benchmarks.compare`).
+
+Запуск: python -m benchmarks.run --products 10000 --orders 5000 --output base.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+from pathlib import Path
+
+from api_v1__warehouse.products.catalog import product_catalog
+from .common import bench_client, bench_schema, seed_orders, seed_products
+from .workloads import WORKLOADS, BenchContext, run_workload
+
+
+async def main(
+    products: int,
+    orders: int,
+    lines: int,
+    hot_products: int,
+    hot_ratio: float,
+    workloads: list[str],
+    requests: int,
+    concurrency: int,
+    seed: int,
+    catalog_snapshot: bool,
+    output: Path | None,
+) -> dict:
+    async with bench_schema() as db:
+        await seed_products(db, products=products)
+        await seed_orders(db, orders=orders, lines=lines)
+        context = await BenchContext.load(
+            db, hot_products=hot_products, hot_ratio=hot_ratio
+        )
+
+        if catalog_snapshot:
+            await product_catalog.start(db)
+            while not product_catalog.is_fresh():
+                await asyncio.sleep(0.05)
+
+        report = {
+            "config": {
+                "products": products,
+                "orders": orders,
+                "lines": lines,
+                "hot_products": hot_products,
+                "hot_ratio": hot_ratio,
+                "requests": requests,
+                "concurrency": concurrency,
+                "seed": seed,
+                "catalog_snapshot": catalog_snapshot,
+                "python": platform.python_version(),
+            },
+            "workloads": {},
+        }
+        try:
+            async with bench_client(db) as client:
+                for name in workloads:
+                    report["workloads"][name] = await run_workload(
+                        client,
+                        WORKLOADS[name],
+                        context,
+                        requests=requests,
+                        concurrency=concurrency,
+                        seed=seed,
+                    )
+        finally:
+            await product_catalog.stop()
+
+    if output is not None:
+        output.write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=5_000)
+    parser.add_argument("--lines", type=int, default=3)
+    parser.add_argument("--hot-products", type=int, default=5)
+    parser.add_argument("--hot-ratio", type=float, default=0.5)
+    parser.add_argument(
+        "--workloads",
+        type=lambda value: value.split(","),
+        default=list(WORKLOADS),
+        help=f"список через запятую из: {', '.join(WORKLOADS)}",
+    )
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--catalog-snapshot", action="store_true")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+
+    print(json.dumps(asyncio.run(main(**vars(args))), indent=2))
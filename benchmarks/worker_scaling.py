@@ -0,0 +1,155 @@
+"""
+Бенчмарк масштабирования пропускной способности по числу процессов `serve.py`.
+
+Для каждого числа процессов запускает `serve.py` на тестовой БД,
+выполняет сценарий из `benchmarks.workloads` по сети и печатает
+пропускную способность, перцентили задержки и ускорение относительно
+первого значения `--workers`. Ускорение ограничено числом доступных ядер
+(`cpus` в отчёте) и тем, что клиент работает в одном процессе.
+
+Запуск: python -m benchmarks.worker_scaling --workers 1,2,4 --workload catalog_reads
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+
+import config
+from serve import available_cpus, event_loop, http_protocol
+from .common import bench_schema, seed_orders, seed_products
+from .workloads import WORKLOADS, BenchContext, run_workload
+
+
+ROOT = Path(__file__).resolve().parent.parent
+STARTUP_TIMEOUT = 30.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    """
+    Запуск `serve.py` на тестовой БД
+    :param workers: количество процессов
+    :param port: порт сервера
+    """
+    env = {
+        **os.environ,
+        "DB_USER": config.DB_USER_TEST,
+        "DB_PASSWORD": config.DB_PASSWORD_TEST,
+        "DB_NAME": config.DB_NAME_TEST,
+        "DB_HOST": config.DB_HOST_TEST,
+        "DB_PORT": config.DB_PORT_TEST,
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "SERVER_WORKERS": str(workers),
+    }
+    return subprocess.Popen(
+        [sys.executable, "serve.py"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient) -> None:
+    deadline = asyncio.get_running_loop().time() + STARTUP_TIMEOUT
+    while True:
+        try:
+            if (await client.get("/internal/db/pool")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if asyncio.get_running_loop().time() > deadline:
+            raise TimeoutError("serve.py did not start")
+        await asyncio.sleep(0.2)
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=STARTUP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+async def main(
+    workers: list[int],
+    workload: str,
+    requests: int,
+    concurrency: int,
+    products: int,
+    orders: int,
+    seed: int,
+) -> dict:
+    report = {
+        "cpus": available_cpus(),
+        "loop": event_loop(),
+        "http": http_protocol(),
+        "workload": workload,
+        "requests": requests,
+        "concurrency": concurrency,
+        "workers": {},
+    }
+    async with bench_schema() as db:
+        await seed_products(db, products=products)
+        await seed_orders(db, orders=orders, lines=3)
+        context = await BenchContext.load(db, hot_products=5, hot_ratio=0.5)
+
+        for count in workers:
+            port = free_port()
+            server = start_server(count, port)
+            try:
+                async with httpx.AsyncClient(
+                    base_url=f"http://127.0.0.1:{port}",
+                    limits=httpx.Limits(max_connections=concurrency),
+                    timeout=None,
+                ) as client:
+                    await wait_ready(client)
+                    report["workers"][str(count)] = await run_workload(
+                        client,
+                        WORKLOADS[workload],
+                        context,
+                        requests=requests,
+                        concurrency=concurrency,
+                        seed=seed,
+                    )
+            finally:
+                stop_server(server)
+
+    baseline = report["workers"][str(workers[0])]["throughput_rps"]
+    report["speedup"] = {
+        count: result["throughput_rps"] / baseline
+        for count, result in report["workers"].items()
+    }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--workers",
+        type=lambda value: [int(count) for count in value.split(",")],
+        default=[1, 2, 4],
+    )
+    parser.add_argument("--workload", choices=list(WORKLOADS), default="catalog_reads")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(main(**vars(args))), indent=2))
@@ -0,0 +1,170 @@
+"""
+Модуль со сценариями нагрузки на API.
+
+Сценарий - асинхронная функция, которая выполняет один запрос к API
+и возвращает ответ. Случайные параметры берутся из переданного генератора,
+поэтому при одинаковом `seed` прогоны повторяют одну и ту же нагрузку
+"""
+
+import asyncio
+import random
+from collections import Counter
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Awaitable, Callable
+
+from httpx import AsyncClient, Response
+from sqlalchemy import func, select
+
+from models import DBConnect, OrderModel, ProductModel
+from models.order import OrderStatus
+from .common import Stopwatch, parse_server_timing, summarize, timing_means
+
+
+@dataclass
+class BenchContext:
+    """Диапазоны данных, по которым сценарии выбирают параметры запросов"""
+
+    first_product_id: int
+    last_product_id: int
+    hot_product_ids: list[int]
+    hot_ratio: float
+    orders: int
+    max_price: int
+
+    @classmethod
+    async def load(cls, db: DBConnect, hot_products: int, hot_ratio: float):
+        """
+        Чтение диапазонов из наполненной БД
+        :param db: подключение к БД бенчмарка
+        :param hot_products: количество «горячих» товаров, за которые идёт конкуренция
+        :param hot_ratio: доля заказов с «горячими» товарами
+        """
+        async with db.async_session() as session:
+            first_id, last_id, max_price = (
+                await session.execute(
+                    select(
+                        func.min(ProductModel.id),
+                        func.max(ProductModel.id),
+                        func.max(ProductModel.price),
+                    )
+                )
+            ).one()
+            orders = await session.scalar(select(func.count(OrderModel.id)))
+        return cls(
+            first_product_id=first_id,
+            last_product_id=last_id,
+            hot_product_ids=list(range(first_id, first_id + hot_products)),
+            hot_ratio=hot_ratio,
+            orders=orders,
+            max_price=max_price,
+        )
+
+    def random_product_id(self, rng: random.Random) -> int:
+        return rng.randint(self.first_product_id, self.last_product_id)
+
+
+Workload = Callable[[AsyncClient, random.Random, BenchContext], Awaitable[Response]]
+
+
+async def catalog_reads(
+    client: AsyncClient, rng: random.Random, context: BenchContext
+) -> Response:
+    """Страница каталога в случайном диапазоне цен или один товар по id"""
+    if rng.random() < 0.3:
+        return await client.get(f"/api/products/{context.random_product_id(rng)}")
+
+    min_price = rng.randint(1, context.max_price)
+    return await client.get(
+        "/api/products/",
+        params={
+            "limit": 50,
+            "min_price": min_price,
+            "max_price": min(min_price + rng.randint(10, 200), context.max_price),
+        },
+    )
+
+
+async def order_creation(
+    client: AsyncClient, rng: random.Random, context: BenchContext
+) -> Response:
+    """Создание заказа; с вероятностью `hot_ratio` - на один из «горячих» товаров"""
+    if context.hot_product_ids and rng.random() < context.hot_ratio:
+        product_id = rng.choice(context.hot_product_ids)
+    else:
+        product_id = context.random_product_id(rng)
+
+    return await client.post(
+        "/api/orders/",
+        params={
+            "product_id": product_id,
+            "product_count": rng.randint(1, 3),
+            "order_status": OrderStatus.in_process.value,
+        },
+    )
+
+
+async def order_listing(
+    client: AsyncClient, rng: random.Random, context: BenchContext
+) -> Response:
+    """Страница списка заказов со случайного места (заказы созданы раз в минуту)"""
+    params: dict[str, object] = {"limit": 50}
+    if rng.random() < 0.3:
+        params["order_status"] = rng.choice(list(OrderStatus)).value
+    response = await client.get("/api/orders/", params=params)
+
+    next_cursor = response.json().get("next_cursor") if response.is_success else None
+    if next_cursor is not None and rng.random() < 0.5:
+        response = await client.get(
+            "/api/orders/", params={**params, "cursor": next_cursor}
+        )
+    return response
+
+
+WORKLOADS: dict[str, Workload] = {
+    "catalog_reads": catalog_reads,
+    "order_creation": order_creation,
+    "order_listing": order_listing,
+}
+
+
+async def run_workload(
+    client: AsyncClient,
+    workload: Workload,
+    context: BenchContext,
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> dict:
+    """
+    Выполнение `requests` операций сценария `concurrency` параллельными клиентами
+    :param client: клиент приложения
+    :param workload: сценарий
+    :param context: диапазоны данных
+    :param requests: количество операций
+    :param concurrency: количество параллельных клиентов
+    :param seed: начальное значение генераторов случайных чисел
+    """
+    stopwatch = Stopwatch()
+    statuses: Counter[int] = Counter()
+    timings: list[dict[str, float]] = []
+    operations = iter(range(requests))
+
+    async def worker(index: int) -> None:
+        rng = random.Random(f"{seed}:{index}")
+        for _ in operations:
+            with stopwatch.measure():
+                response = await workload(client, rng, context)
+            statuses[response.status_code] += 1
+            timings.append(parse_server_timing(response.headers.get("server-timing")))
+
+    started = perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = perf_counter() - started
+
+    return {
+        **summarize(stopwatch.durations),
+        "throughput_rps": requests / elapsed,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        **timing_means(timings),
+    }
@@ -14,6 +14,67 @@ class SettingsDB(BaseSettings):
     db_url: str
     db_echo: bool = False
     # db_echo: bool = True
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+    db_jit: bool = False
+    db_statement_timeout: int = 0
+    db_replica_urls: list[str] = []
+    db_replica_retry_interval: float = 30.0
+    db_create_schema: bool = True
+    db_orders_partitioning: bool = False
+    db_orders_partitions_ahead: int = 3
+    db_orders_partitions_check_interval: float = 3600.0
+
+
+class SettingsCache(BaseSettings):
+    product_cache_size: int = 10_000
+    product_cache_ttl: float = 30.0
+    product_catalog_max_staleness: float = 1.0
+
+
+class SettingsInventory(BaseSettings):
+    inventory_reorder_level: int = 10
+
+
+class SettingsReports(BaseSettings):
+    reports_refresh_interval: float = 60.0
+    reports_refresh_lag: float = 5.0
+    reports_default_days: int = 30
+
+
+class SettingsIdempotency(BaseSettings):
+    idempotency_key_ttl: int = 86400
+    idempotency_cleanup_interval: float = 3600.0
+    idempotency_wait_timeout: float = 10.0
+
+
+class SettingsMonitoring(BaseSettings):
+    request_monitoring: bool = True
+    slow_query_threshold: float = 0.2
+    metrics_multiprocess_dir: str | None = None
+    metrics_flush_interval: float = 5.0
+
+
+class SettingsOutbox(BaseSettings):
+    outbox_workers: int = 1
+    outbox_batch_size: int = 100
+    outbox_poll_interval: float = 1.0
+    outbox_max_attempts: int = 5
+    outbox_backoff_base: float = 1.0
+    outbox_backoff_max: float = 300.0
+    outbox_lease: float = 60.0
+    stock_alert_threshold: int = 10
+
+
+class SettingsServer(BaseSettings):
+    server_host: str = "0.0.0.0"
+    server_port: int = 5010
+    server_workers: int = 0
+    server_graceful_timeout: float = 30.0
 
 
 DB_USER = os.getenv("DB_USER")
@@ -32,3 +93,10 @@ DB_PATH = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB
 TEST_DB_PATH = f"postgresql+asyncpg://{DB_USER_TEST}:{DB_PASSWORD_TEST}@{DB_HOST_TEST}:{DB_PORT_TEST}/{DB_NAME_TEST}"
 
 settings_db = SettingsDB(db_url=DB_PATH)
+settings_cache = SettingsCache()
+settings_inventory = SettingsInventory()
+settings_reports = SettingsReports()
+settings_idempotency = SettingsIdempotency()
+settings_monitoring = SettingsMonitoring()
+settings_outbox = SettingsOutbox()
+settings_server = SettingsServer()
@@ -1,24 +1,88 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 # import uvicorn
 from fastapi import FastAPI
 
+from config import settings_db, settings_monitoring, settings_reports
 from models import Base, e_store_db
+from models.partitioning import ORDERS_PARTITIONED
+from monitoring import RequestMonitoringMiddleware, instrument_db
+from monitoring.metrics import metrics_registry, run_metrics_flush
 from api_v1__warehouse.products.views import router as products_router
 from api_v1__warehouse.orders.views import router as orders_router
+from api_v1__warehouse.reports.views import router as reports_router
+from api_v1__warehouse.products.catalog import (
+    install_catalog_triggers,
+    product_catalog,
+)
+from api_v1__warehouse.internal.views import router as internal_router
+from api_v1__warehouse.internal.views import metrics_router
+from api_v1__warehouse.responses import FastJSONResponse
+from api_v1__warehouse.idempotency import run_idempotency_keys_cleanup
+from api_v1__warehouse.outbox.worker import outbox_worker
+from api_v1__warehouse.orders.partitions import run_partitions_maintenance
+from api_v1__warehouse.reports.rollups import run_reports_refresh
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with e_store_db.engine.begin() as conn:
-        # await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
+    if settings_db.db_create_schema:
+        async with e_store_db.engine.begin() as conn:
+            # await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            await install_catalog_triggers(conn)
+    await product_catalog.start(e_store_db)
+    await outbox_worker.start(e_store_db)
+    background_tasks = [
+        asyncio.create_task(run_idempotency_keys_cleanup(e_store_db)),
+        asyncio.create_task(
+            run_reports_refresh(
+                e_store_db,
+                interval=settings_reports.reports_refresh_interval,
+                lag=settings_reports.reports_refresh_lag,
+            )
+        ),
+    ]
+    if ORDERS_PARTITIONED:
+        background_tasks.append(
+            asyncio.create_task(
+                run_partitions_maintenance(
+                    e_store_db,
+                    interval=settings_db.db_orders_partitions_check_interval,
+                )
+            )
+        )
+    if settings_monitoring.metrics_multiprocess_dir:
+        background_tasks.append(
+            asyncio.create_task(
+                run_metrics_flush(
+                    metrics_registry,
+                    directory=settings_monitoring.metrics_multiprocess_dir,
+                    interval=settings_monitoring.metrics_flush_interval,
+                )
+            )
+        )
     yield
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await outbox_worker.stop()
+    await product_catalog.stop()
+    await e_store_db.dispose()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 app.include_router(products_router)
 app.include_router(orders_router)
+app.include_router(reports_router)
+app.include_router(internal_router)
+app.include_router(metrics_router)
+
+if settings_monitoring.request_monitoring:
+    instrument_db(e_store_db)
+    app.add_middleware(RequestMonitoringMiddleware)
 
 
 # if __name__ == "__main__":
@@ -6,9 +6,26 @@ __all__ = (
     "OrderModel",
     "OrderStatus",
     "OrderItemModel",
+    "OrderStatusHistoryModel",
+    "IdempotencyKeyModel",
+    "OutboxEventModel",
+    "OutboxStatus",
+    "ProductInventoryModel",
+    "ProductSalesModel",
+    "ReportDailyStatusModel",
+    "ReportDailyProductModel",
+    "ReportWatermarkModel",
 )
 
 from .base import Base, DBConnect, e_store_db
 from .product import ProductModel
 from .order import OrderModel, OrderStatus
 from .order_product_rel import OrderItemModel
+from .order_status_history import OrderStatusHistoryModel
+from .idempotency_key import IdempotencyKeyModel
+from .outbox_event import OutboxEventModel, OutboxStatus
+from .product_inventory import ProductInventoryModel
+from .product_sales import ProductSalesModel
+from .report_daily_status import ReportDailyStatusModel
+from .report_daily_product import ReportDailyProductModel
+from .report_watermark import ReportWatermarkModel
@@ -1,15 +1,39 @@
 """Модуль для создания: базового класса для моделей БД и асинхронного подключения к БД"""
 
 from asyncio import current_task
+from datetime import datetime
+from itertools import count
+from time import monotonic, perf_counter
+from typing import Sequence
 
+from fastapi import Request
+from sqlalchemy import DateTime, func
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     create_async_engine,
     async_sessionmaker,
     async_scoped_session,
 )
 
 from config import settings_db
+from monitoring import record_pool_wait
+
+
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+TRUTHY = ("1", "true", "yes")
+
+
+def read_your_writes(request: Request) -> bool:
+    """Запрошено ли чтение только что записанных данных (из основной БД)"""
+    return request.headers.get(READ_YOUR_WRITES_HEADER, "").lower() in TRUTHY
+
+
+def is_replica_session(session) -> bool:
+    """Привязана ли сессия к реплике (данные могут отставать от основной БД)"""
+    return session.info.get("replica", False)
 
 
 class Base(DeclarativeBase):
@@ -17,37 +41,264 @@ class Base(DeclarativeBase):
 
     __abstract__ = True
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    # `autoincrement` явно: у секционированных таблиц первичный ключ составной
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+
+
+class VersionMixin:
+    """
+    Версия и время последнего изменения записи
+    (для ETag и Last-Modified в ответах на условные запросы)
+    """
+
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+    @classmethod
+    def next_version(cls) -> dict:
+        """Значения для `UPDATE`: версия увеличивается, время изменения - текущее"""
+        return {"version": cls.version + 1, "updated_at": func.now()}
+
+    def touch(self) -> None:
+        """Отметка изменения записи при следующей фиксации сессии"""
+        for _name, _value in self.next_version().items():
+            setattr(self, _name, _value)
+
+
+class MonitoredPool(AsyncAdaptedQueuePool):
+    """Пул подключений, считающий время ожидания подключения и тайм-ауты"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self):
+        started = perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait = perf_counter() - started
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            record_pool_wait(wait)
+
+
+class Replica:
+    """Реплика БД только для чтения и её доступность"""
+
+    def __init__(self, engine: AsyncEngine, session_factory: async_sessionmaker):
+        self.engine = engine
+        self.async_session = session_factory
+        self.down_until = 0.0
+
+    @property
+    def name(self) -> str:
+        """Адрес реплики без учётных данных"""
+
+        url = self.engine.url
+        return f"{url.host}:{url.port}/{url.database}"
+
+    @property
+    def healthy(self) -> bool:
+        return monotonic() >= self.down_until
+
+    def mark_down(self, retry_interval: float) -> None:
+        """Вывод реплики из ротации на `retry_interval` секунд"""
+
+        self.down_until = monotonic() + retry_interval
 
 
 class DBConnect:
     """Класс для создания асинхронного подключения к БД"""
 
-    def __init__(self, url: str, echo: bool = False):
-        self.engine = create_async_engine(
-            url=url,
+    def __init__(
+        self,
+        url: str,
+        echo: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int = 100,
+        jit: bool | None = None,
+        statement_timeout: int = 0,
+        replica_urls: Sequence[str] = (),
+        replica_retry_interval: float = 30.0,
+    ):
+        self.max_overflow = max_overflow
+        self.replica_retry_interval = replica_retry_interval
+
+        server_settings = {}
+        if jit is not None:
+            server_settings["jit"] = "on" if jit else "off"
+        if statement_timeout:
+            server_settings["statement_timeout"] = str(statement_timeout)
+
+        engine_options = dict(
             echo=echo,
+            poolclass=MonitoredPool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+            connect_args={
+                "statement_cache_size": statement_cache_size,
+                "server_settings": server_settings,
+            },
         )
-        self.async_session = async_sessionmaker(
-            bind=self.engine,
+
+        self.engine = create_async_engine(url=url, **engine_options)
+        self.async_session = self._create_session_factory(self.engine)
+
+        self.replicas: list[Replica] = []
+        for replica_url in replica_urls:
+            replica_engine = create_async_engine(url=replica_url, **engine_options)
+            self.replicas.append(
+                Replica(
+                    engine=replica_engine,
+                    session_factory=self._create_session_factory(replica_engine),
+                )
+            )
+        self._replicas_cycle = count()
+
+    @staticmethod
+    def _create_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+        return async_sessionmaker(
+            bind=engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
 
-    def get_scoped_session(self):
+    def get_scoped_session(self, session_factory: async_sessionmaker | None = None):
         session = async_scoped_session(
-            session_factory=self.async_session,
+            session_factory=session_factory or self.async_session,
             scopefunc=current_task,
         )
         return session
 
+    def choose_replica(self) -> Replica | None:
+        """
+        Метод для выбора доступной реплики по кругу
+        (`None`, если реплик нет или все выведены из ротации)
+        """
+
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._replicas_cycle) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+    def read_session_factory(self) -> async_sessionmaker:
+        """Метод для получения фабрики сессий для чтения (реплика или основная БД)"""
+
+        replica = self.choose_replica()
+        return replica.async_session if replica is not None else self.async_session
+
+    def pool_status(self) -> dict:
+        """Метод для получения состояния пула подключений"""
+
+        pool: MonitoredPool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": self.max_overflow,
+            "checkouts": pool.checkouts,
+            "timeouts": pool.timeouts,
+            "wait_avg_ms": pool.wait_total * 1000 / max(pool.checkouts, 1),
+            "wait_max_ms": pool.wait_max * 1000,
+        }
+
+    def replicas_status(self) -> list[dict]:
+        """Метод для получения доступности реплик"""
+
+        return [
+            {"name": replica.name, "healthy": replica.healthy}
+            for replica in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        """Метод для закрытия всех подключений к основной БД и репликам"""
+
+        await self.engine.dispose()
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def db_dependency(self) -> "DBConnect":
+        """Метод для передачи в endpoint самого подключения (например, для стриминга)"""
+
+        return self
+
     async def session_dependency(self):
         """Метод для создания сессии для каждого запроса"""
 
         session = self.get_scoped_session()
-        yield session
-        await session.remove()
+        try:
+            yield session
+        finally:
+            await session.remove()
+
+    async def read_session_dependency(self, request: Request):
+        """
+        Метод для создания сессии только для чтения: запрос уходит на доступную
+        реплику, а с заголовком `X-Read-Your-Writes` - в основную БД.
+        Реплика, к которой не удалось подключиться, выводится из ротации,
+        и запрос переключается на следующую реплику или на основную БД.
+        """
 
+        replica = None
+        session = None
 
-e_store_db = DBConnect(url=settings_db.db_url, echo=settings_db.db_echo)
+        if not read_your_writes(request):
+            while (replica := self.choose_replica()) is not None:
+                session = self.get_scoped_session(replica.async_session)
+                try:
+                    await session.connection()
+                    session.info["replica"] = True
+                    break
+                except (OSError, DBAPIError):
+                    await session.remove()
+                    replica.mark_down(self.replica_retry_interval)
+
+        if replica is None:
+            session = self.get_scoped_session()
+
+        try:
+            yield session
+        except (OSError, DBAPIError) as exc:
+            if replica is not None and (
+                isinstance(exc, OSError) or exc.connection_invalidated
+            ):
+                replica.mark_down(self.replica_retry_interval)
+            raise
+        finally:
+            await session.remove()
+
+
+e_store_db = DBConnect(
+    url=settings_db.db_url,
+    echo=settings_db.db_echo,
+    pool_size=settings_db.db_pool_size,
+    max_overflow=settings_db.db_max_overflow,
+    pool_timeout=settings_db.db_pool_timeout,
+    pool_recycle=settings_db.db_pool_recycle,
+    pool_pre_ping=settings_db.db_pool_pre_ping,
+    statement_cache_size=settings_db.db_statement_cache_size,
+    jit=settings_db.db_jit,
+    statement_timeout=settings_db.db_statement_timeout,
+    replica_urls=settings_db.db_replica_urls,
+    replica_retry_interval=settings_db.db_replica_retry_interval,
+)
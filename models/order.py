@@ -4,10 +4,11 @@ from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import func
+from sqlalchemy import Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from .base import Base
+from .base import Base, VersionMixin
+from .partitioning import ORDERS_PARTITIONED, partitioned_by, register_partitioned
 
 
 if TYPE_CHECKING:
@@ -21,18 +22,56 @@ class OrderStatus(Enum):
     delivered = "Доставлен"
 
 
-class OrderModel(Base):
+# Допустимые переходы между статусами заказа
+ORDER_STATUS_TRANSITIONS: dict[OrderStatus, tuple[OrderStatus, ...]] = {
+    OrderStatus.in_process: (OrderStatus.sent,),
+    OrderStatus.sent: (OrderStatus.delivered,),
+    OrderStatus.delivered: (),
+}
+
+
+class OrderModel(VersionMixin, Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index(
+            "idx_orders_created_at_id",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "idx_orders_status",
+            "status",
+        ),
+        # Заказы, изменённые после последнего пересчёта отчётов
+        Index(
+            "idx_orders_updated_at",
+            "updated_at",
+        ),
+        partitioned_by("created_at"),
+    )
+    # В секционированной таблице первичный ключ `(id, created_at)`,
+    # но `id` по-прежнему уникален и однозначно определяет заказ
+    __mapper_args__ = {"primary_key": ["id"]}
 
     created_at: Mapped[datetime] = mapped_column(
-        server_default=func.now(), default=datetime.now
+        server_default=func.now(),
+        default=datetime.now,
+        primary_key=ORDERS_PARTITIONED,
+        sort_order=1,
     )
     status: Mapped[OrderStatus]
 
     products: Mapped[list["ProductModel"]] = relationship(
         secondary="order_product_relation",
         back_populates="orders",
+        viewonly=True,
     )
     products_details: Mapped[list["OrderItemModel"]] = relationship(
-        back_populates="order"
+        back_populates="order",
+        primaryjoin="OrderModel.id == OrderItemModel.order_id",
+        foreign_keys="OrderItemModel.order_id",
+        order_by="OrderItemModel.id",
     )
+
+
+register_partitioned(OrderModel.__table__)
@@ -1,11 +1,19 @@
 """Модуль для создания модели связи `Product` и `Order` в БД"""
 
+from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import UniqueConstraint, ForeignKey
+from sqlalchemy import (
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    UniqueConstraint,
+    event,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
+from .partitioning import ORDERS_PARTITIONED, partitioned_by, register_partitioned
 
 
 if TYPE_CHECKING:
@@ -19,13 +27,57 @@ class OrderItemModel(Base):
         UniqueConstraint(
             "order_id",
             "product_id",
+            # Уникальный ключ секционированной таблицы включает ключ секционирования
+            *(("order_created_at",) if ORDERS_PARTITIONED else ()),
             name="idx_unique_order_product",
         ),
+        *(
+            (
+                ForeignKeyConstraint(
+                    ["order_id", "order_created_at"],
+                    ["orders.id", "orders.created_at"],
+                ),
+            )
+            if ORDERS_PARTITIONED
+            else ()
+        ),
+        # Позиции заказов за день для пересчёта отчётов
+        Index(
+            "idx_order_product_relation_order_created_at",
+            "order_created_at",
+        ),
+        partitioned_by("order_created_at"),
     )
+    __mapper_args__ = {"primary_key": ["id"]}
 
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
+    order_id: Mapped[int] = mapped_column(
+        *(() if ORDERS_PARTITIONED else (ForeignKey("orders.id"),))
+    )
+    # Дата создания заказа (ключ секционирования позиций вместе с заказом)
+    order_created_at: Mapped[datetime] = mapped_column(primary_key=ORDERS_PARTITIONED)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
     product_count: Mapped[int] = mapped_column(default=1, server_default="1")
+    # Цена товара на момент добавления в заказ
+    unit_price: Mapped[int]
 
     product: Mapped["ProductModel"] = relationship(back_populates="orders_details")
-    order: Mapped["OrderModel"] = relationship(back_populates="products_details")
+    order: Mapped["OrderModel"] = relationship(
+        back_populates="products_details",
+        primaryjoin="OrderModel.id == OrderItemModel.order_id",
+        foreign_keys=[order_id],
+    )
+
+
+@event.listens_for(OrderItemModel, "before_insert")
+def _snapshot_order_item(mapper, connection, target: OrderItemModel) -> None:
+    """
+    В новую позицию переносятся дата создания заказа и текущая цена товара
+    из объектов в сессии
+    """
+    if target.order_created_at is None:
+        target.order_created_at = target.order.created_at
+    if target.unit_price is None:
+        target.unit_price = target.product.price
+
+
+register_partitioned(OrderItemModel.__table__)
@@ -0,0 +1,24 @@
+"""Модуль для создания модели истории смены статусов `Order` в БД"""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .order import OrderStatus
+from .partitioning import ORDERS_PARTITIONED
+
+
+class OrderStatusHistoryModel(Base):
+    __tablename__ = "order_status_history"
+
+    # На секционированную таблицу заказов можно сослаться только по `(id, created_at)`
+    order_id: Mapped[int] = mapped_column(
+        *(() if ORDERS_PARTITIONED else (ForeignKey("orders.id"),)), index=True
+    )
+    from_status: Mapped[OrderStatus]
+    to_status: Mapped[OrderStatus]
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
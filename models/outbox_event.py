@@ -0,0 +1,50 @@
+"""Модуль для создания модели событий исходящей очереди (transactional outbox) в БД"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Any
+
+from sqlalchemy import DateTime, Index, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class OutboxStatus(Enum):
+    pending = "pending"
+    dead = "dead"
+
+
+class OutboxEventModel(Base):
+    """
+    Событие, записанное в одной транзакции с изменением заказа.
+    Обработанные события удаляются, а исчерпавшие попытки остаются
+    со статусом `dead` и текстом последней ошибки
+    """
+
+    __tablename__ = "outbox_events"
+
+    event_type: Mapped[str] = mapped_column(String(64))
+    payload: Mapped[dict[str, Any]] = mapped_column(JSONB)
+    status: Mapped[OutboxStatus] = mapped_column(
+        default=OutboxStatus.pending, server_default=OutboxStatus.pending.name
+    )
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    last_error: Mapped[str | None] = mapped_column(Text)
+
+    __table_args__ = (
+        # Очередь готовых к обработке событий без обработанных и «мёртвых»
+        Index(
+            "idx_outbox_events_pending",
+            "available_at",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
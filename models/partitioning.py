@@ -0,0 +1,109 @@
+"""
+Модуль для помесячного секционирования таблиц заказов по дате создания.
+
+Секционирование включается настройкой `DB_ORDERS_PARTITIONING` до создания
+таблиц: `orders` секционируется по `created_at`, `order_product_relation` -
+по дате создания заказа `order_created_at`. Первичные ключи этих таблиц
+включают ключ секционирования, а позиции ссылаются на заказ по паре
+`(id, created_at)`. Секции создаются на месяц вперёд от текущего,
+строки вне созданных месяцев попадают в секцию по умолчанию
+"""
+
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import Connection, Table, event, text
+
+from config import settings_db
+
+
+ORDERS_PARTITIONED = settings_db.db_orders_partitioning
+DEFAULT_PARTITION_SUFFIX = "default"
+
+
+def partitioned_by(column: str) -> dict:
+    """
+    Параметры таблицы, секционированной по диапазонам `column`
+    (пустые, если секционирование выключено)
+    :param column: ключ секционирования
+    """
+    if not ORDERS_PARTITIONED:
+        return {}
+    return {"postgresql_partition_by": f"RANGE ({column})"}
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(first: date, last: date) -> list[date]:
+    """
+    Первые числа месяцев от `first` до `last` включительно
+    :param first: дата в первом месяце
+    :param last: дата в последнем месяце
+    """
+    months = []
+    month = month_start(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def upcoming_months(ahead: int | None = None) -> list[date]:
+    """
+    Текущий месяц и `ahead` следующих
+    :param ahead: количество месяцев вперёд (`DB_ORDERS_PARTITIONS_AHEAD`)
+    """
+    if ahead is None:
+        ahead = settings_db.db_orders_partitions_ahead
+    current = month_start(date.today())
+    return [add_months(current, months) for months in range(ahead + 1)]
+
+
+def partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_{month:%Y_%m}"
+
+
+def create_partitions(
+    connection: Connection, table: Table, months: Iterable[date]
+) -> None:
+    """
+    Создание отсутствующих секций таблицы за месяцы `months`
+    :param connection: подключение к БД
+    :param table: секционированная таблица
+    :param months: первые числа месяцев
+    """
+    for month in months:
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(table.name, month)} "
+                f"PARTITION OF {table.name} "
+                f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            )
+        )
+
+
+def _create_initial_partitions(table: Table, connection: Connection, **kw) -> None:
+    """Секция по умолчанию и секции ближайших месяцев сразу после создания таблицы"""
+    connection.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {table.name}_{DEFAULT_PARTITION_SUFFIX} "
+            f"PARTITION OF {table.name} DEFAULT"
+        )
+    )
+    create_partitions(connection, table, upcoming_months())
+
+
+def register_partitioned(table: Table) -> None:
+    """
+    Создание секций вместе с таблицей (`create_all`), если секционирование включено
+    :param table: секционированная таблица
+    """
+    if ORDERS_PARTITIONED:
+        event.listen(table, "after_create", _create_initial_partitions)
@@ -2,10 +2,11 @@
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String, Text
+from sqlalchemy import Computed, Index, String, Text, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from .base import Base
+from .base import Base, VersionMixin
 
 
 if TYPE_CHECKING:
@@ -13,17 +14,51 @@ if TYPE_CHECKING:
     from .order_product_rel import OrderItemModel
 
 
-class ProductModel(Base):
+# Конфигурация полнотекстового поиска: русские слова и латиница со стеммингом
+SEARCH_CONFIG = "russian"
+
+
+class ProductModel(VersionMixin, Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index(
+            "idx_products_price_id",
+            "price",
+            "id",
+        ),
+        # Полнотекстовый поиск по названию и описанию (`/api/products/search`)
+        Index(
+            "idx_products_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        # Поиск по началу названия (`/api/products/suggest`): побайтовое
+        # сравнение позволяет искать префикс диапазоном по индексу
+        Index(
+            "idx_products_title_prefix",
+            text('lower(title) COLLATE "C"'),
+        ),
+    )
 
     title: Mapped[str] = mapped_column(String(50), unique=True)
     description: Mapped[str] = mapped_column(Text)
     price: Mapped[int]
     quantity: Mapped[int] = mapped_column(default=0, server_default="0")
+    # Название важнее описания при ранжировании результатов поиска
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', title), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', description), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     orders: Mapped[list["OrderModel"]] = relationship(
         secondary="order_product_relation",
         back_populates="products",
+        viewonly=True,
     )
     orders_details: Mapped[list["OrderItemModel"]] = relationship(
         back_populates="product"
@@ -0,0 +1,42 @@
+"""Модуль для создания модели складской проекции `Product` в БД"""
+
+from datetime import datetime
+
+from sqlalchemy import Computed, DateTime, ForeignKey, Index, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ProductInventoryModel(Base):
+    """
+    Остаток, резерв и признак дозаказа товара. Строка обновляется
+    в одной транзакции с изменением товара или заказа приращениями,
+    без пересчёта по заказам
+    """
+
+    __tablename__ = "product_inventory"
+    __table_args__ = (
+        # Товары для дозаказа по возрастанию остатка (`/api/products/low-stock`)
+        Index(
+            "idx_product_inventory_reorder",
+            "available",
+            "product_id",
+            postgresql_where=text("needs_reorder"),
+        ),
+    )
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"), unique=True
+    )
+    # Остаток на складе (`products.quantity`)
+    available: Mapped[int] = mapped_column(default=0, server_default="0")
+    # Количество в заказах, которые ещё не отправлены
+    reserved: Mapped[int] = mapped_column(default=0, server_default="0")
+    reorder_level: Mapped[int]
+    needs_reorder: Mapped[bool] = mapped_column(
+        Computed("available <= reorder_level", persisted=True)
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
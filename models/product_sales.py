@@ -0,0 +1,25 @@
+"""Модуль для создания модели продаж `Product` по дням в БД"""
+
+from datetime import date
+
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ProductSalesModel(Base):
+    __tablename__ = "product_sales_daily"
+    __table_args__ = (
+        UniqueConstraint(
+            "product_id",
+            "day",
+            name="idx_unique_product_sales_day",
+        ),
+    )
+
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE")
+    )
+    day: Mapped[date]
+    units: Mapped[int] = mapped_column(default=0, server_default="0")
@@ -0,0 +1,37 @@
+"""Модуль для создания модели дневных итогов продаж `Product` в БД"""
+
+from datetime import date
+
+from sqlalchemy import BigInteger, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ReportDailyProductModel(Base):
+    """
+    Проданные единицы товара и выручка по ценам на момент заказа
+    за день создания заказа
+    """
+
+    __tablename__ = "report_daily_product"
+    __table_args__ = (
+        UniqueConstraint(
+            "day",
+            "product_id",
+            name="idx_unique_report_daily_product",
+        ),
+        # Продажи одного товара по дням
+        Index(
+            "idx_report_daily_product_product_day",
+            "product_id",
+            "day",
+        ),
+    )
+
+    day: Mapped[date]
+    product_id: Mapped[int] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE")
+    )
+    units: Mapped[int]
+    revenue: Mapped[int] = mapped_column(BigInteger)
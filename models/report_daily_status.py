@@ -0,0 +1,32 @@
+"""Модуль для создания модели дневных итогов заказов по статусу в БД"""
+
+from datetime import date
+
+from sqlalchemy import BigInteger, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .order import OrderStatus
+
+
+class ReportDailyStatusModel(Base):
+    """
+    Количество заказов, единиц товара и выручка за день создания заказа
+    по текущему статусу заказа. Строки дня пересчитываются целиком
+    при изменении любого заказа этого дня
+    """
+
+    __tablename__ = "report_daily_status"
+    __table_args__ = (
+        UniqueConstraint(
+            "day",
+            "status",
+            name="idx_unique_report_daily_status",
+        ),
+    )
+
+    day: Mapped[date]
+    status: Mapped[OrderStatus]
+    orders: Mapped[int]
+    units: Mapped[int]
+    revenue: Mapped[int] = mapped_column(BigInteger)
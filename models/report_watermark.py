@@ -0,0 +1,20 @@
+"""Модуль для создания модели отметки пересчёта отчётов в БД"""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ReportWatermarkModel(Base):
+    """
+    Время изменения заказов, до которого отчёты уже пересчитаны:
+    следующий пересчёт затрагивает только дни заказов, изменённых позже
+    """
+
+    __tablename__ = "report_watermarks"
+
+    name: Mapped[str] = mapped_column(String(64), unique=True)
+    watermark: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -0,0 +1,26 @@
+"""Пакет для измерения работы с БД в рамках HTTP-запросов"""
+
+__all__ = (
+    "RequestStats",
+    "current_request_stats",
+    "Histogram",
+    "RouteMetrics",
+    "RouteMetricsRegistry",
+    "route_metrics",
+    "instrument_db",
+    "count_queries",
+    "record_pool_wait",
+    "RequestMonitoringMiddleware",
+    "SERVER_TIMING_HEADER",
+)
+
+from .stats import (
+    Histogram,
+    RequestStats,
+    RouteMetrics,
+    RouteMetricsRegistry,
+    current_request_stats,
+    route_metrics,
+)
+from .db import count_queries, instrument_db, record_pool_wait
+from .middleware import SERVER_TIMING_HEADER, RequestMonitoringMiddleware
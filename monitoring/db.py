@@ -0,0 +1,110 @@
+"""
+Модуль для учёта SQL-запросов через события движка SQLAlchemy.
+Время запроса и их количество относятся к текущему HTTP-запросу,
+медленные запросы пишутся в журнал одной строкой JSON
+"""
+
+import json
+import logging
+import weakref
+from contextlib import contextmanager
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings_monitoring
+from .stats import current_request_stats
+
+if TYPE_CHECKING:
+    from models.base import DBConnect
+
+
+slow_query_logger = logging.getLogger("monitoring.slow_queries")
+
+_STARTED_KEY = "monitoring_query_started"
+_STATEMENT_MAX_LENGTH = 2000
+_instrumented: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def record_pool_wait(wait: float) -> None:
+    """
+    Учёт ожидания свободного подключения в пуле
+    :param wait: время ожидания в секундах
+    """
+    stats = current_request_stats()
+    if stats is not None:
+        stats.pool_wait += wait
+
+
+@contextmanager
+def count_queries(db: "DBConnect") -> Iterator[list[str]]:
+    """
+    Сбор SQL-запросов, выполненных через подключение `db`
+    (для тестов и бенчмарков, независимо от текущего HTTP-запроса)
+    :param db: подключение к БД
+    """
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(
+            db.engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request_stats() is not None:
+        conn.info.setdefault(_STARTED_KEY, []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats()
+    started = conn.info.get(_STARTED_KEY)
+    if stats is None or not started:
+        return
+
+    elapsed = perf_counter() - started.pop()
+    stats.queries += 1
+    stats.sql_time += elapsed
+
+    if elapsed >= settings_monitoring.slow_query_threshold:
+        slow_query_logger.warning(
+            json.dumps(
+                {
+                    "event": "slow_query",
+                    "method": stats.method,
+                    "route": stats.route,
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "statement": " ".join(statement.split())[:_STATEMENT_MAX_LENGTH],
+                },
+                ensure_ascii=False,
+            )
+        )
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and conn.info.get(_STARTED_KEY):
+        conn.info[_STARTED_KEY].pop()
+
+
+def instrument_db(db: "DBConnect") -> None:
+    """
+    Подключение учёта SQL-запросов к основной БД и репликам (повторно не подключается)
+    :param db: подключение к БД
+    """
+    for engine in (db.engine, *(replica.engine for replica in db.replicas)):
+        sync_engine = engine.sync_engine
+        if sync_engine in _instrumented:
+            continue
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+        _instrumented.add(sync_engine)
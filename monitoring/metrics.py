@@ -0,0 +1,265 @@
+"""
+Модуль для метрик в текстовом формате Prometheus (без сторонних библиотек).
+
+Каждый процесс собирает метрики в своей памяти без блокировок.
+Если задан каталог `METRICS_MULTIPROCESS_DIR`, процессы периодически
+сохраняют туда свои снимки, а `/metrics` складывает счётчики и гистограммы
+всех процессов и отдаёт текущие значения (gauge) с меткой `worker`
+"""
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import time
+from typing import Callable, Iterable
+
+from .stats import Histogram, RouteMetricsRegistry, route_metrics
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class MetricFamily:
+    """Метрика с одинаковыми именем и типом и её значения по меткам"""
+
+    name: str
+    type: str
+    help: str
+    samples: dict[tuple[str, Labels], float] = field(default_factory=dict)
+
+    def add(self, value: float, suffix: str = "", **labels: object) -> None:
+        """
+        Добавление значения
+        :param value: значение
+        :param suffix: суффикс имени (`_bucket`, `_sum`, `_count` для гистограмм)
+        :param labels: метки значения
+        """
+        key = (suffix, tuple((name, str(label)) for name, label in labels.items()))
+        self.samples[key] = self.samples.get(key, 0) + value
+
+
+class Counter:
+    """Счётчик процесса с метками (для бизнес-событий)"""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: object) -> None:
+        key = tuple((name, str(label)) for name, label in labels.items())
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, "counter", self.help)
+        for labels, value in self._values.items():
+            family.samples[("", labels)] = value
+        return family
+
+
+orders_created = Counter("warehouse_orders_created_total", "Созданные заказы")
+stock_reservation_conflicts = Counter(
+    "warehouse_stock_reservation_conflicts_total",
+    "Отказы в резервировании товара из-за нехватки остатка (409)",
+)
+
+
+def collect_request_metrics(
+    registry: RouteMetricsRegistry = route_metrics,
+) -> list[MetricFamily]:
+    """
+    Метрики HTTP-запросов: выполняющиеся запросы и гистограммы по маршрутам
+    :param registry: гистограммы запросов процесса
+    """
+    in_flight = MetricFamily(
+        "http_requests_in_flight", "gauge", "Выполняющиеся HTTP-запросы"
+    )
+    in_flight.add(registry.in_flight)
+    families = [in_flight]
+
+    for attribute, name, help in (
+        ("duration", "http_request_duration_seconds", "Длительность HTTP-запросов"),
+        ("sql_time", "http_request_sql_seconds", "Время SQL в HTTP-запросе"),
+        ("pool_wait", "http_request_pool_wait_seconds", "Ожидание пула в запросе"),
+        ("queries", "http_request_queries", "Число SQL-запросов в HTTP-запросе"),
+    ):
+        family = MetricFamily(name, "histogram", help)
+        for (method, route, status), metrics in registry.routes.items():
+            add_histogram(
+                family,
+                getattr(metrics, attribute),
+                method=method,
+                route=route,
+                status=status,
+            )
+        families.append(family)
+    return families
+
+
+def add_histogram(family: MetricFamily, histogram: Histogram, **labels: object) -> None:
+    """
+    Добавление корзин, суммы и количества гистограммы
+    :param family: метрика типа `histogram`
+    :param histogram: гистограмма
+    :param labels: метки значений
+    """
+    snapshot = histogram.snapshot()
+    for bound, count in zip([*snapshot["buckets"], "+Inf"], snapshot["counts"]):
+        family.add(count, "_bucket", **labels, le=_format_value(bound))
+    family.add(snapshot["sum"], "_sum", **labels)
+    family.add(snapshot["count"], "_count", **labels)
+
+
+def _format_value(value: float | str) -> str:
+    if isinstance(value, str):
+        return value
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    """
+    Текстовый формат Prometheus
+    :param families: метрики
+    """
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {_escape(family.help)}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for (suffix, labels), value in family.samples.items():
+            label_text = ",".join(
+                f'{name}="{_escape(label)}"' for name, label in labels
+            )
+            if label_text:
+                label_text = f"{{{label_text}}}"
+            lines.append(f"{family.name}{suffix}{label_text} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsRegistry:
+    """Источники метрик процесса и их объединение между процессами"""
+
+    def __init__(self):
+        self._collectors: list[Callable[[], Iterable[MetricFamily]]] = []
+
+    def register(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """
+        Добавление источника метрик
+        :param collector: функция, возвращающая метрики процесса
+        """
+        self._collectors.append(collector)
+
+    def collect(self) -> list[MetricFamily]:
+        """Метрики текущего процесса"""
+        families = []
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+    def write_snapshot(self, directory: str) -> None:
+        """
+        Сохранение метрик процесса в `<directory>/<pid>.json`
+        :param directory: общий каталог процессов
+        """
+        snapshot = [
+            {
+                "name": family.name,
+                "type": family.type,
+                "help": family.help,
+                "samples": [
+                    [suffix, list(map(list, labels)), value]
+                    for (suffix, labels), value in family.samples.items()
+                ],
+            }
+            for family in self.collect()
+        ]
+        path = Path(directory) / f"{os.getpid()}.json"
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(snapshot))
+        temporary.replace(path)
+
+    def merge_snapshots(self, directory: str, max_age: float) -> list[MetricFamily]:
+        """
+        Объединение снимков всех процессов: счётчики и гистограммы складываются
+        (в том числе завершившихся процессов), текущие значения берутся только
+        из снимков моложе `max_age` секунд и получают метку `worker`
+        :param directory: общий каталог процессов
+        :param max_age: возраст снимка, после которого процесс считается завершённым
+        """
+        merged: dict[str, MetricFamily] = {}
+        now = time()
+        for path in sorted(Path(directory).glob("*.json")):
+            try:
+                snapshot = json.loads(path.read_text())
+                modified = path.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            worker = path.stem
+            for item in snapshot:
+                family = merged.setdefault(
+                    item["name"], MetricFamily(item["name"], item["type"], item["help"])
+                )
+                is_gauge = item["type"] == "gauge"
+                if is_gauge and now - modified > max_age:
+                    continue
+                for suffix, labels, value in item["samples"]:
+                    labels = tuple(map(tuple, labels))
+                    if is_gauge:
+                        labels += (("worker", worker),)
+                    key = (suffix, labels)
+                    family.samples[key] = family.samples.get(key, 0) + value
+        return list(merged.values())
+
+    def exposition(self, directory: str | None = None, max_age: float = 0) -> str:
+        """
+        Метрики в текстовом формате Prometheus
+        :param directory: общий каталог процессов (`None` - только текущий процесс)
+        :param max_age: возраст снимка, после которого процесс считается завершённым
+        """
+        if directory is None:
+            return render(self.collect())
+        self.write_snapshot(directory)
+        return render(self.merge_snapshots(directory, max_age))
+
+
+async def run_metrics_flush(
+    registry: MetricsRegistry,
+    directory: str,
+    interval: float,
+) -> None:
+    """
+    Фоновое сохранение снимка метрик процесса
+    :param registry: метрики процесса
+    :param directory: общий каталог процессов
+    :param interval: период сохранения в секундах
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    try:
+        while True:
+            try:
+                registry.write_snapshot(directory)
+            except OSError:
+                logger.exception("Metrics snapshot failed")
+            await asyncio.sleep(interval)
+    finally:
+        registry.write_snapshot(directory)
+
+
+metrics_registry = MetricsRegistry()
+metrics_registry.register(collect_request_metrics)
+metrics_registry.register(
+    lambda: [orders_created.collect(), stock_reservation_conflicts.collect()]
+)
@@ -0,0 +1,58 @@
+"""Модуль для ASGI-middleware, измеряющего работу с БД в каждом запросе"""
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .stats import RequestStats, RouteMetricsRegistry, _request_stats, route_metrics
+
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+
+def server_timing(stats: RequestStats) -> str:
+    """
+    Значение заголовка `Server-Timing` (длительности в миллисекундах):
+    время SQL и число запросов, ожидание пула и время обработки
+    :param stats: счётчики запроса
+    """
+    return (
+        f'db;dur={stats.sql_time * 1000:.3f};desc="{stats.queries} queries", '
+        f"pool;dur={stats.pool_wait * 1000:.3f}, "
+        f"app;dur={stats.elapsed() * 1000:.3f}"
+    )
+
+
+class RequestMonitoringMiddleware:
+    """
+    Middleware, которое считает SQL-запросы, время SQL и ожидание пула
+    для каждого HTTP-запроса, отдаёт их в заголовке `Server-Timing`
+    и собирает гистограммы по маршрутам
+    """
+
+    def __init__(self, app: ASGIApp, registry: RouteMetricsRegistry = route_metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        self.registry.in_flight += 1
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                stats.status_code = message["status"]
+                MutableHeaders(scope=message).append(
+                    SERVER_TIMING_HEADER, server_timing(stats)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            self.registry.in_flight -= 1
+            self.registry.observe(stats, stats.elapsed())
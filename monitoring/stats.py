@@ -0,0 +1,147 @@
+"""Модуль для счётчиков запроса и гистограмм по маршрутам"""
+
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Sequence
+
+
+# Границы корзин гистограмм (как в клиентах Prometheus, корзина `+Inf` добавляется)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestStats:
+    """Счётчики работы с БД в рамках одного HTTP-запроса"""
+
+    __slots__ = ("scope", "started", "queries", "sql_time", "pool_wait", "status_code")
+
+    def __init__(self, scope: dict[str, Any]):
+        self.scope = scope
+        self.started = perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.pool_wait = 0.0
+        self.status_code = 500
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+    @property
+    def route(self) -> str:
+        """Шаблон пути маршрута (`/api/orders/{id}`), а не сам путь запроса"""
+        route = self.scope.get("route")
+        return getattr(route, "path", UNMATCHED_ROUTE)
+
+    def elapsed(self) -> float:
+        return perf_counter() - self.started
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def current_request_stats() -> RequestStats | None:
+    """Счётчики текущего HTTP-запроса (`None` вне запроса или без мониторинга)"""
+    return _request_stats.get()
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Накопленные количества по верхним границам корзин (`le`),
+        последнее количество - для корзины `+Inf`
+        """
+        cumulative = []
+        total = 0
+        for bucket_count in self.counts:
+            total += bucket_count
+            cumulative.append(total)
+        return {
+            "buckets": list(self.buckets),
+            "counts": cumulative,
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class RouteMetrics:
+    """Гистограммы запросов одного маршрута с одним статусом ответа"""
+
+    __slots__ = ("duration", "sql_time", "pool_wait", "queries")
+
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.sql_time = Histogram(DURATION_BUCKETS)
+        self.pool_wait = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERIES_BUCKETS)
+
+    def observe(self, stats: RequestStats, duration: float) -> None:
+        self.duration.observe(duration)
+        self.sql_time.observe(stats.sql_time)
+        self.pool_wait.observe(stats.pool_wait)
+        self.queries.observe(stats.queries)
+
+
+class RouteMetricsRegistry:
+    """
+    Гистограммы запросов по маршрутам и статусам и число выполняющихся
+    запросов. Счётчики живут в памяти процесса и меняются только из его
+    цикла событий, поэтому обходятся без блокировок
+    """
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str, int], RouteMetrics] = {}
+        self.in_flight = 0
+
+    def observe(self, stats: RequestStats, duration: float) -> None:
+        """
+        Учёт завершённого запроса
+        :param stats: счётчики запроса
+        :param duration: длительность запроса в секундах
+        """
+        key = (stats.method, stats.route, stats.status_code)
+        metrics = self.routes.get(key)
+        if metrics is None:
+            metrics = self.routes[key] = RouteMetrics()
+        metrics.observe(stats, duration)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Состояние гистограмм всех маршрутов"""
+        return [
+            {
+                "method": method,
+                "route": route,
+                "status": status_code,
+                "requests": metrics.duration.count,
+                "duration": metrics.duration.snapshot(),
+                "sql_time": metrics.sql_time.snapshot(),
+                "pool_wait": metrics.pool_wait.snapshot(),
+                "queries": metrics.queries.snapshot(),
+            }
+            for (method, route, status_code), metrics in sorted(self.routes.items())
+        ]
+
+    def clear(self) -> None:
+        self.routes.clear()
+
+
+route_metrics = RouteMetricsRegistry()
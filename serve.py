@@ -0,0 +1,83 @@
+"""
+Запуск приложения в production: несколько процессов uvicorn по числу
+доступных ядер, uvloop и httptools (если установлены), без `--reload`.
+
+Таблицы и триггеры создаются один раз до запуска процессов, а не в `lifespan`
+каждого процесса. По SIGTERM/SIGINT процессы завершают начатые запросы
+(не дольше `SERVER_GRACEFUL_TIMEOUT` секунд) и закрывают пулы подключений.
+
+Запуск: python serve.py
+"""
+
+import asyncio
+import os
+import tempfile
+from importlib.util import find_spec
+
+import uvicorn
+
+from config import settings_db, settings_monitoring, settings_server
+from models import Base, e_store_db
+from api_v1__warehouse.products.catalog import install_catalog_triggers
+
+
+def available_cpus() -> int:
+    """Количество ядер, доступных процессу (с учётом ограничения affinity)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def workers_count(configured: int = settings_server.server_workers) -> int:
+    """
+    Количество процессов
+    :param configured: значение `SERVER_WORKERS` (0 - по числу доступных ядер)
+    """
+    return configured if configured > 0 else available_cpus()
+
+
+def event_loop() -> str:
+    return "uvloop" if find_spec("uvloop") is not None else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if find_spec("httptools") is not None else "h11"
+
+
+async def prepare_schema() -> None:
+    """Создание таблиц и триггеров до запуска процессов"""
+    async with e_store_db.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await install_catalog_triggers(conn)
+    await e_store_db.dispose()
+
+
+def main() -> None:
+    if settings_db.db_create_schema:
+        asyncio.run(prepare_schema())
+
+    # Настройки передаются процессам через окружение (они запускаются заново),
+    # а при одном процессе приложение работает в этом же интерпретаторе
+    os.environ["DB_CREATE_SCHEMA"] = "false"
+    settings_db.db_create_schema = False
+
+    workers = workers_count()
+    if workers > 1 and not settings_monitoring.metrics_multiprocess_dir:
+        metrics_dir = tempfile.mkdtemp(prefix="warehouse-metrics-")
+        os.environ["METRICS_MULTIPROCESS_DIR"] = metrics_dir
+        settings_monitoring.metrics_multiprocess_dir = metrics_dir
+
+    uvicorn.run(
+        "main:app",
+        host=settings_server.server_host,
+        port=settings_server.server_port,
+        workers=workers,
+        loop=event_loop(),
+        http=http_protocol(),
+        timeout_graceful_shutdown=settings_server.server_graceful_timeout,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,18 +6,26 @@ from httpx import ASGITransport, AsyncClient
 
 from config import TEST_DB_PATH
 from main import app
+from api_v1__warehouse.products.catalog import install_catalog_triggers
 from models.base import Base, DBConnect, e_store_db
 from models.product import ProductModel
+from monitoring import instrument_db
 
 
 test_db = DBConnect(url=TEST_DB_PATH, echo=False)
 app.dependency_overrides[e_store_db.session_dependency] = test_db.session_dependency
+app.dependency_overrides[e_store_db.db_dependency] = test_db.db_dependency
+app.dependency_overrides[e_store_db.read_session_dependency] = (
+    test_db.read_session_dependency
+)
+instrument_db(test_db)
 
 
 @pytest_asyncio.fixture(autouse=True, scope="session")
 async def prepare_db():
     async with test_db.engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await install_catalog_triggers(conn)
     yield
     async with test_db.engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
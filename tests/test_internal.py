@@ -0,0 +1,102 @@
+"""Модуль для тестов служебных endpoint`ов"""
+
+import json
+import logging
+import os
+
+import pytest
+from httpx import AsyncClient
+
+from config import settings_monitoring
+from monitoring.metrics import metrics_registry, render
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_db_pool_status(ac: AsyncClient):
+    """Тест на получение состояния пула подключений к БД"""
+
+    await ac.get("/api/products/")
+    response = await ac.get("/internal/db/pool")
+
+    assert response.status_code == 200
+    assert response.json()["checkouts"] > 0
+    assert response.json()["checked_out"] == 0
+    assert response.json()["timeouts"] == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_product_catalog_stats(ac: AsyncClient):
+    """Тест на получение состояния снимка каталога товаров"""
+
+    response = await ac.get("/internal/catalog/products")
+
+    assert response.status_code == 200
+    assert response.json()["fresh"] is False
+    assert "memory_bytes" in response.json()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_request_monitoring(
+    ac: AsyncClient, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+):
+    """Тест на учёт SQL-запросов в `Server-Timing`, журнале и гистограммах"""
+
+    monkeypatch.setattr(settings_monitoring, "slow_query_threshold", 0.0)
+    with caplog.at_level(logging.WARNING, logger="monitoring.slow_queries"):
+        response = await ac.get("/api/orders/")
+
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("db;dur=") and '"1 queries"' in timing
+    slow_query = json.loads(caplog.records[-1].getMessage())
+    assert slow_query["route"] == "/api/orders/"
+    assert slow_query["statement"].startswith("SELECT")
+
+    response = await ac.get("/internal/requests")
+    routes = {
+        (route["method"], route["route"], route["status"]): route
+        for route in response.json()
+    }
+    orders_route = routes[("GET", "/api/orders/", 200)]
+
+    assert response.status_code == 200
+    assert orders_route["requests"] >= 1
+    assert orders_route["queries"]["sum"] >= 1
+    assert len(orders_route["queries"]["counts"]) == (
+        len(orders_route["queries"]["buckets"]) + 1
+    )
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_metrics(ac: AsyncClient, tmp_path):
+    """Тест на метрики в текстовом формате Prometheus (в том числе нескольких процессов)"""
+
+    await ac.get("/api/products/")
+    response = await ac.get("/metrics")
+    lines = response.text.splitlines()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in lines
+    assert any(
+        line.startswith(
+            'http_request_duration_seconds_count{method="GET",route="/api/products/",'
+            'status="200"}'
+        )
+        for line in lines
+    )
+    assert "http_requests_in_flight 1.0" in lines
+    assert any(line.startswith("db_pool_checkouts_total ") for line in lines)
+    assert any(line.startswith("product_cache_requests_total{") for line in lines)
+
+    metrics_registry.write_snapshot(str(tmp_path))
+    (tmp_path / "1.json").write_text((tmp_path / f"{os.getpid()}.json").read_text())
+    merged = render(metrics_registry.merge_snapshots(str(tmp_path), max_age=60))
+
+    own_checkouts = next(
+        float(line.split()[-1])
+        for line in render(metrics_registry.collect()).splitlines()
+        if line.startswith("db_pool_checkouts_total ")
+    )
+    assert f"db_pool_checkouts_total {own_checkouts * 2:.1f}" in merged.splitlines()
+    assert 'http_requests_in_flight{worker="1"} 0.0' in merged.splitlines()
@@ -1,11 +1,34 @@
 """Модуль для тестов endpoint`ов связанных с моделью `Order`"""
 
+import asyncio
+import base64
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
-from sqlalchemy import select, desc
+from sqlalchemy import desc, func, select
 
 from .conftest import test_db
+from api_v1__warehouse import idempotency
+from api_v1__warehouse.orders import crud
+from api_v1__warehouse.orders.schemas import Order
+from api_v1__warehouse.outbox.events import (
+    ORDER_CREATED,
+    ORDER_PRODUCT_ADDED,
+    ORDER_STATUS_CHANGED,
+)
+from api_v1__warehouse.outbox.worker import OutboxWorker
+from api_v1__warehouse.pagination import Page
+from models.idempotency_key import IdempotencyKeyModel
 from models.order import OrderModel, OrderStatus
+from models.order_product_rel import OrderItemModel
+from models.order_status_history import OrderStatusHistoryModel
+from models.outbox_event import OutboxEventModel, OutboxStatus
+from models.product import ProductModel
+from monitoring import count_queries
 
 
 @pytest.mark.asyncio(scope="session")
@@ -26,7 +49,47 @@ async def test_get_orders(ac: AsyncClient):
     response = await ac.get("/api/orders/")
 
     assert response.status_code == 200
-    assert len(response.json()) == order_quantity
+    assert len(response.json()["items"]) == order_quantity
+    assert response.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_get_orders_pages(ac: AsyncClient):
+    """Тест на постраничное получение списка заказов по курсору"""
+
+    response = await ac.get("/api/orders/?limit=2")
+    first_page = response.json()
+
+    assert response.status_code == 200
+    assert len(first_page["items"]) == 2
+    assert first_page["next_cursor"] is not None
+
+    response = await ac.get(f"/api/orders/?limit=2&cursor={first_page['next_cursor']}")
+    second_page = response.json()
+
+    assert response.status_code == 200
+    assert len(second_page["items"]) == 1
+    assert second_page["next_cursor"] is None
+    assert second_page["items"][0]["id"] not in [
+        order["id"] for order in first_page["items"]
+    ]
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_get_orders_invalid_cursor(ac: AsyncClient):
+    """Тест на получение списка заказов с некорректным курсором"""
+
+    response = await ac.get("/api/orders/?cursor=foo")
+
+    assert response.status_code == 400
+
+    for raw in ('["2024-01-01T00:00:00",1e400]', '["2024-01-01T00:00:00",2147483648]'):
+        response = await ac.get(
+            "/api/orders/",
+            params={"cursor": base64.urlsafe_b64encode(raw.encode()).decode()},
+        )
+
+        assert response.status_code == 400
 
 
 @pytest.mark.asyncio(scope="session")
@@ -113,3 +176,794 @@ async def test_update_order_status(ac: AsyncClient):
     assert (
         test_order.status.value != response.json()["status"]
     ), "Запрашиваемый status совпадает со старым status"
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_export_orders(ac: AsyncClient, product_for_orders):
+    """Тест на потоковую выгрузку заказов в NDJSON"""
+
+    async with test_db.async_session() as session:
+        orders_count = len((await session.scalars(select(OrderModel.id))).all())
+
+    response = await ac.get("/api/orders/export")
+    documents = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert len(documents) == orders_count
+    assert any(
+        detail["product"]["title"] == product_for_orders.title
+        for document in documents
+        for detail in document["products_details"]
+    )
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_export_orders_csv(ac: AsyncClient):
+    """Тест на потоковую выгрузку позиций заказов в CSV"""
+
+    response = await ac.get(
+        f"/api/orders/export?export_format=csv&order_status={OrderStatus.in_process.value}"
+    )
+    rows = list(csv.reader(io.StringIO(response.text)))
+
+    assert response.status_code == 200
+    assert rows[0][:3] == ["order_id", "status", "created_at"]
+    assert all(row[1] == OrderStatus.in_process.value for row in rows[1:])
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_post_orders_concurrently_without_oversell(ac: AsyncClient):
+    """Тест на отсутствие перепродажи при параллельном создании заказов"""
+
+    stock = 1000
+    orders_count = 2000
+
+    async with test_db.async_session() as session:
+        hot_product = ProductModel(
+            title="Hot product",
+            description="FooBar",
+            price=100,
+            quantity=stock,
+        )
+        session.add(hot_product)
+        await session.commit()
+
+    responses = await asyncio.gather(
+        *(
+            ac.post(
+                f"/api/orders/?product_id={hot_product.id}&product_count=1&order_status={OrderStatus.in_process.value}"
+            )
+            for _ in range(orders_count)
+        )
+    )
+    status_codes = [response.status_code for response in responses]
+
+    async with test_db.async_session() as session:
+        quantity = await session.scalar(
+            select(ProductModel.quantity).filter(ProductModel.id == hot_product.id)
+        )
+        sold = await session.scalar(
+            select(func.sum(OrderItemModel.product_count)).filter(
+                OrderItemModel.product_id == hot_product.id
+            )
+        )
+
+    assert status_codes.count(201) == stock
+    assert status_codes.count(409) == orders_count - stock
+    assert quantity == 0
+    assert sold == stock
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_post_orders_batch(ac: AsyncClient, product_for_orders):
+    """Тест на создание нескольких заказов одним запросом"""
+
+    async with test_db.async_session() as session:
+        second_product = ProductModel(
+            title="Watch strap",
+            description="Leather",
+            price=50,
+            quantity=10,
+        )
+        session.add(second_product)
+        await session.commit()
+
+    response = await ac.post(
+        "/api/orders/batch",
+        json=[
+            {
+                "status": OrderStatus.in_process.value,
+                "products_details": [
+                    {"product_id": product_for_orders.id, "product_count": 2},
+                    {"product_id": second_product.id, "product_count": 3},
+                    {"product_id": product_for_orders.id, "product_count": 1},
+                ],
+            },
+            {
+                "status": OrderStatus.sent.value,
+                "products_details": [
+                    {"product_id": second_product.id, "product_count": 7},
+                ],
+            },
+        ],
+    )
+
+    async with test_db.async_session() as session:
+        second_product_quantity = await session.scalar(
+            select(ProductModel.quantity).filter(ProductModel.id == second_product.id)
+        )
+
+    assert response.status_code == 201
+    assert len(response.json()) == 2
+    assert sorted(
+        detail["product_count"] for detail in response.json()[0]["products_details"]
+    ) == [3, 3]
+    assert second_product_quantity == 0
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_post_orders_batch_out_of_stock(ac: AsyncClient, product_for_orders):
+    """Тест на откат всей пачки заказов при нехватке одного из товаров"""
+
+    async with test_db.async_session() as session:
+        quantity_before = await session.scalar(
+            select(ProductModel.quantity).filter(
+                ProductModel.id == product_for_orders.id
+            )
+        )
+        orders_before = await session.scalar(func.count(OrderModel.id))
+
+    response = await ac.post(
+        "/api/orders/batch",
+        json=[
+            {
+                "status": OrderStatus.in_process.value,
+                "products_details": [
+                    {"product_id": product_for_orders.id, "product_count": 1},
+                ],
+            },
+            {
+                "status": OrderStatus.in_process.value,
+                "products_details": [
+                    {"product_id": product_for_orders.id, "product_count": 10**6},
+                ],
+            },
+        ],
+    )
+
+    async with test_db.async_session() as session:
+        quantity_after = await session.scalar(
+            select(ProductModel.quantity).filter(
+                ProductModel.id == product_for_orders.id
+            )
+        )
+        orders_after = await session.scalar(func.count(OrderModel.id))
+
+    assert response.status_code == 409
+    assert quantity_after == quantity_before
+    assert orders_after == orders_before
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_get_orders_query_count(ac: AsyncClient):
+    """Тест на загрузку ORM-объектов заказов, позиций и товаров двумя запросами"""
+
+    async with test_db.async_session() as session:
+        products = [
+            ProductModel(
+                title=f"Query count {num}",
+                description="FooBar",
+                price=10,
+                quantity=10,
+            )
+            for num in range(5)
+        ]
+        session.add_all(products)
+        await session.commit()
+
+    response = await ac.post(
+        "/api/orders/batch",
+        json=[
+            {
+                "status": OrderStatus.in_process.value,
+                "products_details": [
+                    {"product_id": product.id, "product_count": 1}
+                    for product in products
+                ],
+            }
+        ],
+    )
+    order_id = response.json()[0]["id"]
+
+    async with test_db.async_session() as session:
+        with count_queries(test_db) as statements:
+            order = await crud.read_order(session=session, order_id=order_id)
+
+        assert len(statements) == 2
+        assert [detail.product.title for detail in order.products_details] == [
+            product.title for product in products
+        ]
+
+        with count_queries(test_db) as statements:
+            orders_list, _ = await crud.read_orders(session=session, limit=20)
+
+        assert len(statements) == 2
+        assert len(orders_list) == 20
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_get_orders_json_matches_schema(ac: AsyncClient):
+    """Тест на побайтное совпадение собранного в БД JSON со схемой `Order`"""
+
+    async with test_db.async_session() as session:
+        products = [
+            ProductModel(
+                title='Кавычки "и" \\ слэш',
+                description="Строка\nс переводом\tи \x01 символом, 💡",
+                price=1,
+                quantity=10,
+            ),
+            ProductModel(
+                title="Plain / product",
+                description="",
+                price=2,
+                quantity=10,
+            ),
+        ]
+        orders = [
+            OrderModel(
+                status=OrderStatus.delivered,
+                created_at=datetime(2030, 1, 2, 3, 4, 5, 60),
+            ),
+            OrderModel(
+                status=OrderStatus.in_process,
+                created_at=datetime(2030, 1, 2, 3, 4, 6),
+            ),
+        ]
+        orders[0].products_details.extend(
+            OrderItemModel(product=product, product_count=num + 1)
+            for num, product in enumerate(products)
+        )
+        session.add_all(orders)
+        await session.commit()
+
+        expected_orders = [
+            await crud.read_order(session=session, order_id=order.id)
+            for order in orders
+        ]
+
+    for order in expected_orders:
+        with count_queries(test_db) as statements:
+            response = await ac.get(f"/api/orders/{order.id}")
+
+        assert len(statements) == 1
+        assert response.headers["content-type"] == "application/json"
+        assert response.content == encode_json(
+            Order.model_validate(order).model_dump(mode="json")
+        )
+
+    response = await ac.get("/api/orders/?limit=2")
+    expected_page = Page[Order](
+        items=list(reversed(expected_orders)),
+        next_cursor=response.json()["next_cursor"],
+    )
+
+    assert response.json()["next_cursor"] is not None
+    assert response.content == encode_json(expected_page.model_dump(mode="json"))
+
+
+def encode_json(document: dict) -> bytes:
+    """Кодирование документа так же, как это делает `JSONResponse`"""
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_get_order_by_id_conditional(ac: AsyncClient):
+    """Тест на ответ 304 для заказа и смену `ETag` при изменении заказа или товара"""
+
+    async with test_db.async_session() as session:
+        product = ProductModel(
+            title="Conditional order product",
+            description="FooBar",
+            price=10,
+            quantity=10,
+        )
+        test_order = OrderModel(status=OrderStatus.in_process)
+        test_order.products_details.append(
+            OrderItemModel(product=product, product_count=1)
+        )
+        session.add(test_order)
+        await session.commit()
+
+    response = await ac.get(f"/api/orders/{test_order.id}")
+    etag = response.headers["ETag"]
+
+    with count_queries(test_db) as statements:
+        response = await ac.get(
+            f"/api/orders/{test_order.id}", headers={"If-None-Match": etag}
+        )
+
+    assert response.status_code == 304
+    assert len(statements) == 1
+
+    response = await ac.get(
+        f"/api/orders/{test_order.id}",
+        headers={"If-Modified-Since": response.headers["Last-Modified"]},
+    )
+
+    assert response.status_code == 304
+
+    await ac.patch(
+        f"/api/orders/{test_order.id}/status?order_status={OrderStatus.sent.value}"
+    )
+    response = await ac.get(
+        f"/api/orders/{test_order.id}", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["status"] == OrderStatus.sent.value
+    etag = response.headers["ETag"]
+
+    await ac.put(
+        f"/api/products/{product.id}",
+        json={
+            "title": "Conditional order product",
+            "description": "Renamed",
+            "price": 10,
+            "quantity": 10,
+        },
+    )
+    response = await ac.get(
+        f"/api/orders/{test_order.id}", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["products_details"][0]["product"]["description"] == (
+        "Renamed"
+    )
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_update_orders_status_by_ids(ac: AsyncClient):
+    """Тест на смену статуса списка заказов с отчётом по каждому заказу"""
+
+    async with test_db.async_session() as session:
+        orders = [
+            OrderModel(status=OrderStatus.in_process),
+            OrderModel(status=OrderStatus.in_process),
+            OrderModel(status=OrderStatus.delivered),
+            OrderModel(status=OrderStatus.sent),
+        ]
+        session.add_all(orders)
+        await session.commit()
+    ids = [order.id for order in orders]
+    missing_id = ids[-1] + 10**6
+
+    with count_queries(test_db) as statements:
+        response = await ac.patch(
+            "/api/orders/status",
+            json={"status": OrderStatus.sent.value, "ids": ids[:2]},
+        )
+
+    assert response.status_code == 200
+    assert len(statements) == 1
+    assert response.json()["updated"] == 2
+
+    response = await ac.patch(
+        "/api/orders/status",
+        json={"status": OrderStatus.sent.value, "ids": [*ids, missing_id]},
+    )
+
+    assert response.json()["updated"] == 0
+    assert response.json()["rejected"] == 2
+    assert [
+        (result["id"], result["result"], result["status"])
+        for result in response.json()["results"]
+    ] == [
+        (ids[0], "unchanged", OrderStatus.sent.value),
+        (ids[1], "unchanged", OrderStatus.sent.value),
+        (ids[2], "invalid_transition", OrderStatus.delivered.value),
+        (ids[3], "unchanged", OrderStatus.sent.value),
+        (missing_id, "not_found", None),
+    ]
+
+    async with test_db.async_session() as session:
+        history = (
+            await session.execute(
+                select(
+                    OrderStatusHistoryModel.order_id,
+                    OrderStatusHistoryModel.from_status,
+                    OrderStatusHistoryModel.to_status,
+                ).filter(OrderStatusHistoryModel.order_id.in_(ids))
+            )
+        ).all()
+
+    assert sorted(history) == [
+        (ids[0], OrderStatus.in_process, OrderStatus.sent),
+        (ids[1], OrderStatus.in_process, OrderStatus.sent),
+    ]
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_update_orders_status_by_filter(ac: AsyncClient):
+    """Тест на смену статуса заказов, подходящих под фильтр"""
+
+    created_at = datetime(2040, 1, 1)
+    async with test_db.async_session() as session:
+        orders = [
+            OrderModel(status=OrderStatus.sent, created_at=created_at),
+            OrderModel(status=OrderStatus.sent, created_at=created_at),
+            OrderModel(status=OrderStatus.in_process, created_at=created_at),
+        ]
+        session.add_all(orders)
+        await session.commit()
+
+    response = await ac.patch(
+        "/api/orders/status",
+        json={
+            "status": OrderStatus.delivered.value,
+            "filter": {
+                "created_from": created_at.isoformat(),
+                "created_to": datetime(2040, 1, 2).isoformat(),
+            },
+        },
+    )
+
+    assert response.status_code == 200
+    assert sorted(result["id"] for result in response.json()["results"]) == [
+        orders[0].id,
+        orders[1].id,
+    ]
+
+    response = await ac.patch(
+        "/api/orders/status",
+        json={"status": OrderStatus.delivered.value, "ids": [1], "filter": {}},
+    )
+
+    assert response.status_code == 422
+
+    response = await ac.patch(
+        "/api/orders/status",
+        json={"status": OrderStatus.delivered.value, "filter": {}},
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_update_order_status_invalid_transition(ac: AsyncClient):
+    """Тест на запрет недопустимого перехода статуса заказа"""
+
+    async with test_db.async_session() as session:
+        test_order = OrderModel(status=OrderStatus.delivered)
+        session.add(test_order)
+        await session.commit()
+
+    response = await ac.patch(
+        f"/api/orders/{test_order.id}/status?order_status={OrderStatus.in_process.value}"
+    )
+
+    assert response.status_code == 409
+
+    response = await ac.patch("/api/orders/999999999/status?order_status=Отправлен")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_post_order_idempotency_key_concurrent(ac: AsyncClient):
+    """Тест на однократное создание заказа при одновременных повторах с одним ключом"""
+
+    async with test_db.async_session() as session:
+        product = ProductModel(
+            title="Idempotent", description="retry", price=10, quantity=100
+        )
+        session.add(product)
+        await session.commit()
+
+    url = "/api/orders/"
+    params = {
+        "product_id": product.id,
+        "product_count": 3,
+        "order_status": OrderStatus.in_process.value,
+    }
+    headers = {"Idempotency-Key": "post-order-retry"}
+    responses = await asyncio.gather(
+        *(ac.post(url, params=params, headers=headers) for _ in range(10))
+    )
+
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.content for response in responses}) == 1
+    assert sum("Idempotent-Replayed" in response.headers for response in responses) == 9
+
+    async with test_db.async_session() as session:
+        assert (await session.get(ProductModel, product.id)).quantity == 97
+        assert (
+            await session.scalar(
+                select(func.count()).filter(OrderItemModel.product_id == product.id)
+            )
+        ) == 1
+
+    response = await ac.post(url, params=params, headers=headers)
+    assert response.status_code == 201
+    assert response.content == responses[0].content
+
+    response = await ac.post(
+        url, params={**params, "product_count": 4}, headers=headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_order_outbox_events(ac: AsyncClient):
+    """Тест на запись событий заказа в исходящую очередь, повторы и статус `dead`"""
+
+    async with test_db.async_session() as session:
+        product = ProductModel(
+            title="Outbox", description="events", price=5, quantity=20
+        )
+        session.add(product)
+        await session.commit()
+
+    response = await ac.post(
+        "/api/orders/",
+        params={
+            "product_id": product.id,
+            "product_count": 2,
+            "order_status": OrderStatus.in_process.value,
+        },
+    )
+    assert response.status_code == 201
+    order_id = response.json()["id"]
+    response = await ac.patch(
+        f"/api/orders/{order_id}/status",
+        params={"order_status": OrderStatus.sent.value},
+    )
+    assert response.status_code == 200
+
+    async with test_db.async_session() as session:
+        events = (
+            await session.scalars(
+                select(OutboxEventModel)
+                .filter(OutboxEventModel.payload["order_id"].as_integer() == order_id)
+                .order_by(OutboxEventModel.id)
+            )
+        ).all()
+    assert [event.event_type for event in events] == [
+        ORDER_CREATED,
+        ORDER_STATUS_CHANGED,
+    ]
+    assert events[0].payload["products"] == [
+        {"product_id": product.id, "product_count": 2}
+    ]
+    assert events[1].payload == {
+        "order_id": order_id,
+        "from_status": "in_process",
+        "to_status": "sent",
+    }
+
+    async def failing(db, payload):
+        raise RuntimeError("handler failed")
+
+    worker = OutboxWorker(
+        workers=0,
+        batch_size=10_000,
+        poll_interval=0,
+        max_attempts=2,
+        backoff_base=0,
+        backoff_max=0,
+        lease=60,
+        handlers={ORDER_CREATED: [failing], ORDER_STATUS_CHANGED: [failing]},
+    )
+    await worker.start(test_db)
+    assert await worker.process_batch() > 0
+    assert await worker.process_batch() > 0
+    assert await worker.process_batch() == 0
+
+    async with test_db.async_session() as session:
+        for event in events:
+            event = await session.get(OutboxEventModel, event.id)
+            assert event.status is OutboxStatus.dead
+            assert event.attempts == 2
+            assert "handler failed" in event.last_error
+
+    handled = []
+
+    async def recording(db, payload):
+        handled.append(payload["order_id"])
+
+    response = await ac.post(
+        f"/api/orders/{order_id}/product",
+        params={"product_id": product.id, "product_count": 1},
+    )
+    assert response.status_code == 201
+
+    worker.handlers = {ORDER_PRODUCT_ADDED: [recording]}
+    assert await worker.process_batch() >= 1
+    assert order_id in handled
+    assert worker.stats().processed >= 1
+    assert worker.stats().dead_lettered >= 2
+
+    async with test_db.async_session() as session:
+        assert (
+            await session.scalar(
+                select(func.count()).filter(
+                    OutboxEventModel.status == OutboxStatus.pending,
+                    OutboxEventModel.event_type == ORDER_PRODUCT_ADDED,
+                )
+            )
+        ) == 0
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_order_lines_keep_order_created_at(ac: AsyncClient):
+    """Тест на перенос даты создания заказа (ключа секционирования) в его позиции"""
+
+    async with test_db.async_session() as session:
+        product = ProductModel(
+            title="Partition key", description="", price=1, quantity=10
+        )
+        session.add(product)
+        await session.commit()
+
+    response = await ac.post(
+        "/api/orders/",
+        params={
+            "product_id": product.id,
+            "product_count": 1,
+            "order_status": OrderStatus.in_process.value,
+        },
+    )
+    order_id = response.json()["id"]
+
+    async with test_db.async_session() as session:
+        order = await session.get(OrderModel, order_id)
+        order_created_at = await session.scalar(
+            select(OrderItemModel.order_created_at).filter(
+                OrderItemModel.order_id == order_id
+            )
+        )
+
+    assert order_created_at == order.created_at
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_post_orders_batch_overlapping_concurrent(ac: AsyncClient):
+    """Тест на параллельные пакеты заказов с одними товарами в разном порядке"""
+
+    async with test_db.async_session() as session:
+        products = [
+            ProductModel(
+                title=f"Overlap {index}", description="batch", price=5, quantity=100
+            )
+            for index in range(3)
+        ]
+        session.add_all(products)
+        await session.commit()
+    product_ids = [product.id for product in products]
+
+    def batch(ids: list[int]) -> list[dict]:
+        return [
+            {
+                "status": OrderStatus.in_process.value,
+                "products_details": [
+                    {"product_id": product_id, "product_count": 1} for product_id in ids
+                ],
+            }
+        ]
+
+    responses = await asyncio.gather(
+        *(
+            ac.post(
+                "/api/orders/batch",
+                json=batch(product_ids if index % 2 else product_ids[::-1]),
+            )
+            for index in range(20)
+        )
+    )
+
+    assert {response.status_code for response in responses} == {201}
+    async with test_db.async_session() as session:
+        quantities = await session.scalars(
+            select(ProductModel.quantity).filter(ProductModel.id.in_(product_ids))
+        )
+        assert set(quantities) == {80}
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_post_order_idempotency_key_not_orphaned(
+    ac: AsyncClient, monkeypatch: pytest.MonkeyPatch
+):
+    """Тест на откат ключа вместе с заказом, если ответ не удалось сохранить"""
+
+    async with test_db.async_session() as session:
+        product = ProductModel(
+            title="Idempotent failure", description="retry", price=10, quantity=10
+        )
+        session.add(product)
+        await session.commit()
+
+    async def failing_save(*args, **kwargs):
+        raise RuntimeError("response was not saved")
+
+    url = "/api/orders/"
+    params = {
+        "product_id": product.id,
+        "product_count": 2,
+        "order_status": OrderStatus.in_process.value,
+    }
+    headers = {"Idempotency-Key": "post-order-failure"}
+    with monkeypatch.context() as patch:
+        patch.setattr(idempotency, "save_idempotent_response", failing_save)
+        with pytest.raises(RuntimeError):
+            await ac.post(url, params=params, headers=headers)
+
+    async with test_db.async_session() as session:
+        assert (await session.get(ProductModel, product.id)).quantity == 10
+        assert (
+            await session.scalar(
+                select(func.count()).filter(
+                    IdempotencyKeyModel.key == "post-order-failure"
+                )
+            )
+        ) == 0
+
+    response = await ac.post(url, params=params, headers=headers)
+    assert response.status_code == 201
+    response = await ac.post(url, params=params, headers=headers)
+    assert response.status_code == 201
+    assert response.headers["Idempotent-Replayed"] == "true"
+
+
+@pytest.mark.asyncio(scope="session")
+async def test_orders_filter_with_timezone(ac: AsyncClient):
+    """Тест на фильтры по дате создания заказа с часовым поясом"""
+
+    async with test_db.async_session() as session:
+        test_order = OrderModel(status=OrderStatus.in_process)
+        session.add(test_order)
+        await session.commit()
+
+    created_at = test_order.created_at.astimezone()
+    bounds = [
+        (created_at - timedelta(minutes=1)).astimezone(timezone.utc),
+        (created_at + timedelta(minutes=1)).astimezone(timezone(timedelta(hours=3))),
+    ]
+    created_from, created_to = (
+        bounds[0].isoformat().replace("+00:00", "Z"),
+        bounds[1].isoformat(),
+    )
+    assert created_to.endswith("+03:00")
+
+    response = await ac.get(
+        "/api/orders/",
+        params={"created_from": created_from, "created_to": created_to},
+    )
+    assert response.status_code == 200
+    assert test_order.id in [order["id"] for order in response.json()["items"]]
+
+    response = await ac.get(
+        "/api/orders/",
+        params={"created_from": bounds[1].isoformat()},
+    )
+    assert response.status_code == 200
+    assert test_order.id not in [order["id"] for order in response.json()["items"]]
+
+    response = await ac.get(
+        "/api/orders/export",
+        params={"created_from": created_from, "created_to": created_to},
+    )
+    assert response.status_code == 200
+    exported = [json.loads(line)["id"] for line in response.text.splitlines()]
+    assert test_order.id in exported
+
+    response = await ac.patch(
+        "/api/orders/status",
+        json={
+            "status": OrderStatus.sent.value,
+            "filter": {"created_from": created_from, "created_to": created_to},
+        },
+    )
+    assert response.status_code == 200
+    assert test_order.id in [result["id"] for result in response.json()["results"]]
@@ -1,11 +1,19 @@
 """Модуль для тестов endpoint`ов связанных с моделью `Product`"""
 
+import asyncio
+import base64
+import csv
+import io
+
 import pytest
 from httpx import AsyncClient
-from sqlalchemy import select, desc
+from sqlalchemy import desc, func, select
 
 from .conftest import test_db
+from api_v1__warehouse.products.catalog import product_catalog
+from models.order import OrderStatus
 from models.product import ProductModel
+from monitoring import count_queries
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -15,6 +23,8 @@ async def test_get_products(ac: AsyncClient):
     product_quantity = 3
 
     async with test_db.async_session() as session:
+        products_before = await session.scalar(func.count(ProductModel.id))
+
         for num in range(product_quantity):
             test_product = ProductModel(
                 title=f"Moto{num}",
@@ -28,7 +38,39 @@ async def test_get_products(ac: AsyncClient):
     response = await ac.get("/api/products/")
 
     assert response.status_code == 200
-    assert len(response.json()) == product_quantity + 1
+    assert len(response.json()["items"]) == products_before + product_quantity
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_products_filtered_by_price(ac: AsyncClient):
+    """Тест на получение списка продуктов в диапазоне цен"""
+
+    response = await ac.get("/api/products/?min_price=700&max_price=800&limit=2")
+    first_page = response.json()
+
+    assert response.status_code == 200
+    assert [product["price"] for product in first_page["items"]] == [777, 777]
+
+    response = await ac.get(
+        f"/api/products/?min_price=700&max_price=800&cursor={first_page['next_cursor']}"
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 1
+    assert response.json()["next_cursor"] is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_products_invalid_cursor(ac: AsyncClient):
+    """Тест на получение списка продуктов с некорректным курсором"""
+
+    for raw in ("[1e400,1]", "[1,2147483648]", '["foo",1]'):
+        response = await ac.get(
+            "/api/products/",
+            params={"cursor": base64.urlsafe_b64encode(raw.encode()).decode()},
+        )
+
+        assert response.status_code == 400
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -130,3 +172,399 @@ async def test_delete_product_by_id(ac: AsyncClient):
         assert result is None or result.id != test_product.id
 
     assert response.status_code == 204
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_export_products_csv(ac: AsyncClient):
+    """Тест на потоковую выгрузку продуктов в CSV"""
+
+    async with test_db.async_session() as session:
+        titles = set((await session.scalars(select(ProductModel.title))).all())
+
+    response = await ac.get("/api/products/export?export_format=csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+
+    assert response.status_code == 200
+    assert {row["title"] for row in rows} == titles
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_post_products_bulk_csv(ac: AsyncClient):
+    """Тест на загрузку каталога товаров в CSV"""
+
+    response = await ac.post(
+        "/api/products/bulk",
+        content=(
+            "title,description,price,quantity\n"
+            'Bulk lamp,"Table lamp,\nwarm light",150,10\n'
+            "Bulk chair,Chair,abc,1\n"
+            "Bulk desk,Desk,900,2\n"
+        ),
+        headers={"Content-Type": "text/csv"},
+    )
+
+    async with test_db.async_session() as session:
+        lamp = await session.scalar(
+            select(ProductModel).filter(ProductModel.title == "Bulk lamp")
+        )
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2
+    assert response.json()["rejected"] == 1
+    assert response.json()["errors"][0]["row"] == 2
+    assert lamp.description == "Table lamp,\nwarm light"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_post_products_bulk_ndjson_upsert(ac: AsyncClient):
+    """Тест на обновление существующих товаров при загрузке NDJSON"""
+
+    response = await ac.post(
+        "/api/products/bulk",
+        content=(
+            '{"title": "Bulk desk", "description": "Desk", "price": 950, "quantity": 5}\n'
+            '{"title": "Bulk sofa", "description": "Sofa", "price": 3000, "quantity": 1}\n'
+            "not a json\n"
+        ),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    async with test_db.async_session() as session:
+        desk = await session.scalar(
+            select(ProductModel).filter(ProductModel.title == "Bulk desk")
+        )
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 1
+    assert response.json()["updated"] == 1
+    assert response.json()["rejected"] == 1
+    assert desk.price == 950
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_product_by_id_from_cache(ac: AsyncClient):
+    """Тест на чтение товара из кэша и сброс кэша при обновлении товара"""
+
+    async with test_db.async_session() as session:
+        test_product: ProductModel = ProductModel(
+            title="Cached",
+            description="FooBar",
+            price=100,
+            quantity=5,
+        )
+        session.add(test_product)
+        await session.commit()
+
+    await ac.get(f"/api/products/{test_product.id}")
+    stats_before = (await ac.get("/internal/cache/products")).json()
+    response = await ac.get(f"/api/products/{test_product.id}")
+    stats_after = (await ac.get("/internal/cache/products")).json()
+
+    assert response.status_code == 200
+    assert stats_after["hits"] == stats_before["hits"] + 1
+
+    await ac.put(
+        f"/api/products/{test_product.id}",
+        json={
+            "title": "Cached",
+            "description": "FooBar",
+            "price": 200,
+            "quantity": 5,
+        },
+    )
+    response = await ac.get(f"/api/products/{test_product.id}")
+
+    assert response.json()["price"] == 200
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_product_by_id_conditional(ac: AsyncClient):
+    """Тест на ответ 304 по `ETag` и `Last-Modified` и смену версии товара"""
+
+    async with test_db.async_session() as session:
+        test_product: ProductModel = ProductModel(
+            title="Conditional",
+            description="FooBar",
+            price=100,
+            quantity=5,
+        )
+        session.add(test_product)
+        await session.commit()
+
+    response = await ac.get(f"/api/products/{test_product.id}")
+    etag = response.headers["ETag"]
+    last_modified = response.headers["Last-Modified"]
+
+    response = await ac.get(
+        f"/api/products/{test_product.id}", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    response = await ac.get(
+        f"/api/products/{test_product.id}",
+        headers={"If-Modified-Since": last_modified},
+    )
+
+    assert response.status_code == 304
+
+    await ac.put(
+        f"/api/products/{test_product.id}",
+        json={
+            "title": "Conditional",
+            "description": "FooBar",
+            "price": 200,
+            "quantity": 5,
+        },
+    )
+    response = await ac.get(
+        f"/api/products/{test_product.id}", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["price"] == 200
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_products_conditional(ac: AsyncClient):
+    """Тест на ответ 304 для неизменной страницы списка товаров"""
+
+    url = "/api/products/?min_price=5000&max_price=5001"
+
+    async with test_db.async_session() as session:
+        test_product: ProductModel = ProductModel(
+            title="Conditional list",
+            description="FooBar",
+            price=5000,
+            quantity=5,
+        )
+        session.add(test_product)
+        await session.commit()
+
+    response = await ac.get(url)
+    etag = response.headers["ETag"]
+
+    with count_queries(test_db) as statements:
+        response = await ac.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert len(statements) == 1
+
+    async with test_db.async_session() as session:
+        session.add(
+            ProductModel(
+                title="Conditional list 2",
+                description="FooBar",
+                price=5001,
+                quantity=5,
+            )
+        )
+        await session.commit()
+
+    response = await ac.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()["items"]) == 2
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    """Ожидание выполнения условия фоновыми задачами"""
+
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_products_from_catalog_snapshot(ac: AsyncClient):
+    """Тест на чтение списка товаров из снимка каталога и его обновление"""
+
+    url = "/api/products/?min_price=7000&max_price=7999&limit=2"
+    primary = {"X-Read-Your-Writes": "1"}
+
+    def snapshot_page() -> bytes:
+        return product_catalog.page(limit=2, min_price=7000, max_price=7999)[0]
+
+    await product_catalog.start(test_db)
+    try:
+        await wait_for(product_catalog.is_fresh)
+
+        response = await ac.post(
+            "/api/products/",
+            json={
+                "title": "Snapshot",
+                "description": "Снимок",
+                "price": 7000,
+                "quantity": 3,
+            },
+        )
+        product_id = response.json()["id"]
+        await wait_for(lambda: b"Snapshot" in snapshot_page())
+
+        with count_queries(test_db) as statements:
+            response = await ac.get(url)
+        from_db = await ac.get(url, headers=primary)
+
+        assert len(statements) == 0
+        assert [product["id"] for product in response.json()["items"]] == [product_id]
+        assert response.content == from_db.content
+        assert response.headers["ETag"] == from_db.headers["ETag"]
+
+        await ac.put(
+            f"/api/products/{product_id}",
+            json={
+                "title": "Snapshot",
+                "description": "Снимок",
+                "price": 7500,
+                "quantity": 3,
+            },
+        )
+        await wait_for(lambda: b"7500" in snapshot_page())
+        response = await ac.get(url)
+
+        assert response.json()["items"][0]["price"] == 7500
+        assert response.content == (await ac.get(url, headers=primary)).content
+
+        await ac.delete(f"/api/products/{product_id}")
+        await wait_for(lambda: b"Snapshot" not in snapshot_page())
+        response = await ac.get(url)
+
+        assert response.json()["items"] == []
+        assert product_catalog.stats().memory_bytes > 0
+    finally:
+        await product_catalog.stop()
+
+    assert product_catalog.page(limit=1) is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_product_inventory_projection(ac: AsyncClient):
+    """Тест на обновление складской проекции заказами и изменением товара"""
+
+    response = await ac.post(
+        "/api/products/",
+        json={
+            "title": "Inventory",
+            "description": "Проекция",
+            "price": 300,
+            "quantity": 15,
+        },
+    )
+    product_id = response.json()["id"]
+
+    async def low_stock_ids() -> list[int]:
+        response = await ac.get("/api/products/low-stock", params={"limit": 500})
+        assert response.status_code == 200
+        return [product["product_id"] for product in response.json()["items"]]
+
+    assert product_id not in await low_stock_ids()
+
+    for product_count in (4, 2):
+        response = await ac.post(
+            "/api/orders/",
+            params={
+                "product_id": product_id,
+                "product_count": product_count,
+                "order_status": OrderStatus.in_process.value,
+            },
+        )
+        assert response.status_code == 201
+    order_id = response.json()["id"]
+
+    response = await ac.get(f"/api/products/{product_id}/sales")
+    sales = response.json()
+    assert response.status_code == 200
+    assert (sales["available"], sales["reserved"], sales["units"]) == (9, 6, 6)
+    assert sales["needs_reorder"] is True
+    assert [day["units"] for day in sales["days"]] == [6]
+    assert product_id in await low_stock_ids()
+
+    response = await ac.patch(
+        f"/api/orders/{order_id}/status",
+        params={"order_status": OrderStatus.sent.value},
+    )
+    assert response.status_code == 200
+
+    response = await ac.put(
+        f"/api/products/{product_id}",
+        json={
+            "title": "Inventory",
+            "description": "Проекция",
+            "price": 300,
+            "quantity": 100,
+        },
+    )
+    assert response.status_code == 200
+
+    sales = (await ac.get(f"/api/products/{product_id}/sales")).json()
+    assert (sales["available"], sales["reserved"], sales["units"]) == (100, 4, 6)
+    assert sales["needs_reorder"] is False
+    assert product_id not in await low_stock_ids()
+
+    response = await ac.get("/api/products/999999999/sales")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_search_products(ac: AsyncClient):
+    """Тест на полнотекстовый поиск и подсказки по началу названия"""
+
+    for title, description, price, quantity in (
+        ("Searchable kettle", "Steel electric teapot", 2500, 5),
+        ("Searchable lamp", "Desk lamp for a tea room", 1500, 0),
+        ("Teapots set", "Ceramic", 900, 12),
+    ):
+        response = await ac.post(
+            "/api/products/",
+            json={
+                "title": title,
+                "description": description,
+                "price": price,
+                "quantity": quantity,
+            },
+        )
+        assert response.status_code == 201
+
+    response = await ac.get("/api/products/search", params={"q": "teapot"})
+    assert response.status_code == 200
+    titles = [product["title"] for product in response.json()["items"]]
+    # Совпадение в названии важнее совпадения в описании
+    assert titles == ["Teapots set", "Searchable kettle"]
+
+    response = await ac.get(
+        "/api/products/search", params={"q": "teapot", "min_quantity": 10}
+    )
+    assert [product["title"] for product in response.json()["items"]] == ["Teapots set"]
+
+    response = await ac.get("/api/products/search", params={"q": "search", "limit": 1})
+    page = response.json()
+    assert response.status_code == 200
+    assert len(page["items"]) == 1 and page["next_cursor"] is not None
+    response = await ac.get(
+        "/api/products/search",
+        params={"q": "search", "limit": 1, "cursor": page["next_cursor"]},
+    )
+    next_page = response.json()
+    assert {page["items"][0]["title"], next_page["items"][0]["title"]} == {
+        "Searchable kettle",
+        "Searchable lamp",
+    }
+    assert next_page["next_cursor"] is None
+
+    response = await ac.get("/api/products/suggest", params={"q": "SEARCHABLE"})
+    assert response.status_code == 200
+    assert [product["title"] for product in response.json()] == [
+        "Searchable kettle",
+        "Searchable lamp",
+    ]
+    response = await ac.get(
+        "/api/products/suggest", params={"q": "searchable", "max_price": 2000}
+    )
+    assert [product["title"] for product in response.json()] == ["Searchable lamp"]
+
+    response = await ac.get("/api/products/search", params={"q": ""})
+    assert response.status_code == 422
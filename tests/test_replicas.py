@@ -0,0 +1,108 @@
+"""Модуль для тестов распределения чтения по репликам БД"""
+
+import pytest
+from fastapi import Request
+from httpx import AsyncClient
+
+from .conftest import test_db
+from config import TEST_DB_PATH
+from api_v1__warehouse.products import crud
+from api_v1__warehouse.products.cache import product_cache
+from api_v1__warehouse.products.schemas import Product, ProductSnapshot
+from models.base import DBConnect, READ_YOUR_WRITES_HEADER
+from models.product import ProductModel
+
+
+def make_request(headers: dict[str, str] | None = None) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "headers": [
+                (name.lower().encode(), value.encode())
+                for name, value in (headers or {}).items()
+            ],
+        }
+    )
+
+
+async def read_session_engine(db: DBConnect, request: Request):
+    """Получение движка, к которому привязана сессия для чтения"""
+
+    sessions = db.read_session_dependency(request)
+    session = await anext(sessions)
+    engine = session.bind
+    await sessions.aclose()
+    return engine
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_read_session_uses_replicas():
+    """Тест на чтение с реплик по кругу и из основной БД по заголовку"""
+
+    db = DBConnect(url=TEST_DB_PATH, replica_urls=[TEST_DB_PATH, TEST_DB_PATH])
+    replica_engines = {replica.engine for replica in db.replicas}
+
+    first = await read_session_engine(db, make_request())
+    second = await read_session_engine(db, make_request())
+    primary = await read_session_engine(
+        db, make_request({READ_YOUR_WRITES_HEADER: "1"})
+    )
+
+    await db.dispose()
+
+    assert {first, second} == replica_engines
+    assert primary is db.engine
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_read_session_skips_unhealthy_replica():
+    """Тест на вывод недоступной реплики из ротации"""
+
+    broken_url = TEST_DB_PATH.rsplit("@", 1)[0] + "@127.0.0.1:1/broken"
+    db = DBConnect(url=TEST_DB_PATH, replica_urls=[broken_url, TEST_DB_PATH])
+    broken, healthy = db.replicas
+
+    engines = [await read_session_engine(db, make_request()) for _ in range(3)]
+    await db.dispose()
+
+    assert not broken.healthy
+    assert engines == [healthy.engine] * 3
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_replica_reads_bypass_product_cache(ac: AsyncClient):
+    """
+    Тест на то, что товар с реплики не попадает в кэш,
+    а чтение с `X-Read-Your-Writes` не отдаёт запись из кэша
+    """
+
+    async with test_db.async_session() as session:
+        product = ProductModel(
+            title="Replica cached", description="lag", price=10, quantity=1
+        )
+        session.add(product)
+        await session.commit()
+    await product_cache.delete(product.id)
+
+    db = DBConnect(url=TEST_DB_PATH, replica_urls=[TEST_DB_PATH])
+    sessions = db.read_session_dependency(make_request())
+    session = await anext(sessions)
+    snapshot = await crud.read_product_by_id_cached(session, product_id=product.id)
+    await sessions.aclose()
+    await db.dispose()
+
+    assert snapshot.product.title == "Replica cached"
+    assert await product_cache.get(product.id) is None
+
+    stale = ProductSnapshot(
+        product=Product.model_validate({**snapshot.product.model_dump(), "price": 1}),
+        version=snapshot.version,
+        updated_at=snapshot.updated_at,
+    )
+    await product_cache.set(product.id, stale)
+    response = await ac.get(
+        f"/api/products/{product.id}", headers={READ_YOUR_WRITES_HEADER: "1"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["price"] == 10
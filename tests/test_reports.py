@@ -0,0 +1,110 @@
+"""Модуль для тестов отчётов по выручке"""
+
+import pytest
+from httpx import AsyncClient
+
+from .conftest import test_db
+from api_v1__warehouse.orders import crud
+from api_v1__warehouse.reports.rollups import refresh_reports
+from models.order import OrderStatus
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_reports_use_order_time_prices(ac: AsyncClient):
+    """Тест на пересчёт дневных итогов по ценам на момент заказа"""
+
+    await refresh_reports(test_db, lag=0)
+
+    async def statuses() -> dict[str, int]:
+        response = await ac.get("/api/reports/revenue/statuses")
+        assert response.status_code == 200
+        assert response.json()["refreshed_to"] is not None
+        return {row["status"]: row["revenue"] for row in response.json()["items"]}
+
+    revenue_before = await statuses()
+
+    response = await ac.post(
+        "/api/products/",
+        json={"title": "Report", "description": "Отчёт", "price": 200, "quantity": 10},
+    )
+    product_id = response.json()["id"]
+    response = await ac.post(
+        "/api/orders/",
+        params={
+            "product_id": product_id,
+            "product_count": 3,
+            "order_status": OrderStatus.in_process.value,
+        },
+    )
+    order_id = response.json()["id"]
+    response = await ac.put(
+        f"/api/products/{product_id}",
+        json={"title": "Report", "description": "Отчёт", "price": 500, "quantity": 7},
+    )
+    assert response.status_code == 200
+
+    assert await refresh_reports(test_db, lag=0) >= 1
+
+    response = await ac.get("/api/reports/revenue/products", params={"limit": 500})
+    assert response.status_code == 200
+    products = {row["product_id"]: row for row in response.json()["items"]}
+    assert (products[product_id]["units"], products[product_id]["revenue"]) == (3, 600)
+
+    revenue = await statuses()
+    in_process = OrderStatus.in_process.value
+    assert revenue[in_process] == revenue_before.get(in_process, 0) + 600
+
+    response = await ac.patch(
+        f"/api/orders/{order_id}/status",
+        params={"order_status": OrderStatus.sent.value},
+    )
+    assert response.status_code == 200
+    assert await refresh_reports(test_db, lag=0) >= 1
+
+    revenue_sent = await statuses()
+    sent = OrderStatus.sent.value
+    assert revenue_sent.get(in_process, 0) == revenue_before.get(in_process, 0)
+    assert revenue_sent[sent] == revenue.get(sent, 0) + 600
+
+    response = await ac.get("/api/reports/revenue/daily", params={"order_status": sent})
+    assert response.status_code == 200
+    assert response.json()["items"][-1]["revenue"] >= 600
+
+    response = await ac.get(
+        "/api/reports/revenue/daily",
+        params={"date_from": "2024-02-01", "date_to": "2024-01-01"},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_reports_wait_for_open_transactions(ac: AsyncClient):
+    """
+    Тест на учёт заказа, транзакция которого была открыта во время пересчёта
+    (время изменения заказа раньше отметки пересчёта)
+    """
+
+    response = await ac.post(
+        "/api/products/",
+        json={"title": "Slow", "description": "Долгая", "price": 300, "quantity": 10},
+    )
+    product_id = response.json()["id"]
+
+    async def refresh_before_commit(order) -> None:
+        await refresh_reports(test_db, lag=0)
+
+    async with test_db.async_session() as session:
+        await crud.create_order(
+            session=session,
+            product_id=product_id,
+            product_count=2,
+            order_status=OrderStatus.in_process,
+            before_commit=refresh_before_commit,
+        )
+
+    assert await refresh_reports(test_db, lag=0) >= 1
+
+    response = await ac.get("/api/reports/revenue/products", params={"limit": 500})
+    assert response.status_code == 200
+    products = {row["product_id"]: row for row in response.json()["items"]}
+    assert (products[product_id]["units"], products[product_id]["revenue"]) == (2, 600)
@@ -0,0 +1,103 @@
+"""Модуль для тестов быстрой сериализации ответов"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, Response
+from fastapi.exceptions import ResponseValidationError
+from httpx import ASGITransport, AsyncClient
+
+from api_v1__warehouse.orders.schemas import Order
+from api_v1__warehouse.responses import (
+    FastJSONResponse,
+    FastJSONRoute,
+    standard_serialization,
+)
+from models.order import OrderStatus
+
+
+ORDER = SimpleNamespace(
+    id=1,
+    status=OrderStatus.in_process,
+    created_at=datetime(2030, 1, 2, 3, 4, 5, 6),
+    products_details=[
+        SimpleNamespace(
+            product_count=2,
+            product=SimpleNamespace(title="Часы", description='"CASIO"', price=10),
+        )
+    ],
+)
+
+
+def set_dependency_header(response: Response) -> None:
+    response.headers["X-Dependency"] = "1"
+
+
+def make_app(route_class: type) -> FastAPI:
+    """Приложение с одинаковыми endpoint`ами на заданном классе маршрутов"""
+
+    router = APIRouter(route_class=route_class)
+
+    @router.get(
+        "/orders",
+        response_model=list[Order],
+        status_code=201,
+        dependencies=[Depends(set_dependency_header)],
+    )
+    async def get_orders(response: Response, limit: int = 1):
+        response.headers["X-Limit"] = str(limit)
+        return [ORDER] * limit
+
+    @router.get("/orders/invalid", response_model=Order)
+    async def get_invalid_order():
+        return SimpleNamespace(id="foo")
+
+    @router.get("/orders/standard", response_model=Order)
+    @standard_serialization
+    async def get_order_standard():
+        return ORDER
+
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(router)
+    return app
+
+
+async def get(app: FastAPI, url: str):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        return await client.get(url)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_fast_json_route_matches_standard_route():
+    """Тест на совпадение ответа быстрого и штатного маршрутов"""
+
+    fast_response = await get(make_app(FastJSONRoute), "/orders?limit=3")
+    standard_response = await get(make_app(APIRouter().route_class), "/orders?limit=3")
+
+    assert fast_response.status_code == standard_response.status_code == 201
+    assert fast_response.content == standard_response.content
+    assert fast_response.headers == standard_response.headers
+    assert fast_response.headers["X-Limit"] == "3"
+    assert fast_response.headers["X-Dependency"] == "1"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_fast_json_route_validates_response():
+    """Тест на проверку результата endpoint`а по `response_model`"""
+
+    with pytest.raises(ResponseValidationError):
+        await get(make_app(FastJSONRoute), "/orders/invalid")
+
+
+def test_standard_serialization_fallback():
+    """Тест на отключение быстрой сериализации для отдельного endpoint`а"""
+
+    app = make_app(FastJSONRoute)
+    endpoints = {route.path: route.endpoint for route in app.routes}
+
+    assert endpoints["/orders/standard"].__name__ == "get_order_standard"
+    assert not hasattr(endpoints["/orders/standard"], "__wrapped__")
+    assert hasattr(endpoints["/orders"], "__wrapped__")